@@ -0,0 +1,5 @@
+"""Performance benchmarks for svg_to_usd.
+
+These are not shipped with the package. Run them from the repository root,
+e.g. ``python -m benchmarks.kernels --output kernels.json``.
+"""
@@ -0,0 +1,39 @@
+""" Compare two benchmark JSON reports.
+
+Usage::
+
+    python -m benchmarks.compare before.json after.json [--key ops_per_sec]
+"""
+import argparse
+
+from . import runner
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare benchmark reports")
+    parser.add_argument("old")
+    parser.add_argument("new")
+    parser.add_argument("--key", default="ops_per_sec")
+    args = parser.parse_args(argv)
+
+    old = runner.load_report(args.old)
+    new = runner.load_report(args.new)
+
+    print(
+        "{} ({}) -> {} ({})".format(
+            args.old, old["meta"].get("revision"), args.new, new["meta"].get("revision")
+        )
+    )
+    print("{:<40} {:>14} {:>14} {:>8}".format("case", "old", "new", "ratio"))
+    for name, old_value, new_value, ratio in runner.compare_reports(
+        old, new, args.key
+    ):
+        print(
+            "{:<40} {:>14.1f} {:>14.1f} {:>7.2f}x".format(
+                name, old_value, new_value, ratio
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
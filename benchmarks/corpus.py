@@ -0,0 +1,257 @@
+""" Generator for a reproducible local SVG corpus.
+
+The corpus mirrors the kinds of documents we convert in production: icon
+sets, text heavy posters, map exports and files with embedded images. The
+same ``seed`` and ``scale`` always produce byte identical files.
+
+Usage::
+
+    python -m benchmarks.corpus --output corpus/ [--seed 0] [--scale 1]
+"""
+import argparse
+import base64
+import math
+import os
+import random
+import struct
+import zlib
+
+SVG_HEADER = (
+    '<svg xmlns="http://www.w3.org/2000/svg" '
+    'xmlns:xlink="http://www.w3.org/1999/xlink" '
+    'width="{w}" height="{h}" viewBox="0 0 {w} {h}">\n'
+)
+SVG_FOOTER = "</svg>\n"
+
+WORDS = (
+    "lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod "
+    "tempor incididunt ut labore et dolore magna aliqua"
+).split()
+
+
+def _color(rng):
+    return "#{:06x}".format(rng.randrange(0xFFFFFF))
+
+
+def _fmt(value):
+    return "{:.2f}".format(value)
+
+
+def _polygon(rng, cx, cy, radius, num_points):
+    points = []
+    for i in range(num_points):
+        angle = 2.0 * math.pi * i / num_points
+        r = radius * rng.uniform(0.7, 1.0)
+        points.append((cx + math.cos(angle) * r, cy + math.sin(angle) * r))
+    return points
+
+
+def _points_attr(points):
+    return " ".join("{},{}".format(_fmt(x), _fmt(y)) for x, y in points)
+
+
+def _path_data(points, closed=True):
+    d = "M" + " L".join("{} {}".format(_fmt(x), _fmt(y)) for x, y in points)
+    return d + " Z" if closed else d
+
+
+def icon_set(rng, scale):
+    """ A grid of small icons, each a group of a few primitives. """
+    count = 48 * scale
+    cols = 8
+    out = [SVG_HEADER.format(w=cols * 32, h=(count // cols + 1) * 32)]
+    for i in range(count):
+        x, y = (i % cols) * 32, (i // cols) * 32
+        out.append('<g id="icon_{}" transform="translate({},{})">\n'.format(i, x, y))
+        out.append(
+            '<rect x="2" y="2" width="28" height="28" fill="{}"/>\n'.format(
+                _color(rng)
+            )
+        )
+        out.append(
+            '<circle cx="16" cy="16" r="{}" fill="{}"/>\n'.format(
+                _fmt(rng.uniform(4, 10)), _color(rng)
+            )
+        )
+        ring = _polygon(rng, 16, 16, 12, 12)
+        hole = list(reversed(_polygon(rng, 16, 16, 5, 8)))
+        out.append(
+            '<path d="{} {}" fill="{}"/>\n'.format(
+                _path_data(ring), _path_data(hole), _color(rng)
+            )
+        )
+        out.append(
+            '<line x1="4" y1="28" x2="28" y2="4" stroke="{}" stroke-width="2"/>\n'.format(
+                _color(rng)
+            )
+        )
+        out.append("</g>\n")
+    out.append(SVG_FOOTER)
+    return "".join(out)
+
+
+def text_poster(rng, scale):
+    """ A poster made mostly of text runs over a few background shapes. """
+    lines = 60 * scale
+    out = [SVG_HEADER.format(w=800, h=lines * 20 + 40)]
+    out.append('<rect x="0" y="0" width="800" height="{}" fill="#fafafa"/>\n'.format(lines * 20 + 40))
+    for i in range(lines):
+        words = " ".join(rng.choice(WORDS) for _ in range(rng.randrange(3, 10)))
+        out.append(
+            '<text id="line_{}" x="20" y="{}" font-family="DejaVu Sans" '
+            'font-size="{}" fill="{}">{}</text>\n'.format(
+                i, 30 + i * 20, rng.choice([12, 14, 16]), _color(rng), words
+            )
+        )
+    out.append(SVG_FOOTER)
+    return "".join(out)
+
+
+def map_export(rng, scale):
+    """ Long polylines (roads, rivers) and filled polygons (parcels, lakes). """
+    width, height = 2000, 2000
+    out = [SVG_HEADER.format(w=width, h=height)]
+    out.append('<g id="parcels">\n')
+    for i in range(40 * scale):
+        cx, cy = rng.uniform(0, width), rng.uniform(0, height)
+        points = _polygon(rng, cx, cy, rng.uniform(10, 60), rng.randrange(6, 40))
+        out.append(
+            '<polygon points="{}" fill="{}"/>\n'.format(_points_attr(points), _color(rng))
+        )
+    out.append("</g>\n<g id=\"lakes\">\n")
+    for i in range(10 * scale):
+        cx, cy = rng.uniform(100, width - 100), rng.uniform(100, height - 100)
+        shore = _polygon(rng, cx, cy, 80, 120)
+        island = list(reversed(_polygon(rng, cx, cy, 20, 30)))
+        out.append(
+            '<path d="{} {}" fill="#3a7bd5"/>\n'.format(
+                _path_data(shore), _path_data(island)
+            )
+        )
+    out.append("</g>\n<g id=\"roads\">\n")
+    for i in range(20 * scale):
+        x, y = rng.uniform(0, width), rng.uniform(0, height)
+        points = []
+        for _ in range(400):
+            x += rng.uniform(-5, 5)
+            y += rng.uniform(-5, 5)
+            points.append((x, y))
+        if i % 2:
+            out.append(
+                '<polyline points="{}" fill="none" stroke="#555555" '
+                'stroke-width="2"/>\n'.format(_points_attr(points))
+            )
+        else:
+            out.append(
+                '<path d="{}" fill="none" stroke="#885522" stroke-width="3"/>\n'.format(
+                    _path_data(points, closed=False)
+                )
+            )
+    out.append("</g>\n")
+    out.append(SVG_FOOTER)
+    return "".join(out)
+
+
+def _png(rng, size):
+    """ A small RGB PNG with random pixels, encoded without any imaging
+    library.
+    """
+    rows = b"".join(
+        b"\x00" + bytes(rng.randrange(256) for _ in range(size * 3))
+        for _ in range(size)
+    )
+
+    def chunk(tag, data):
+        body = tag + data
+        return struct.pack(">I", len(data)) + body + struct.pack(">I", zlib.crc32(body))
+
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", struct.pack(">IIBBBBB", size, size, 8, 2, 0, 0, 0))
+        + chunk(b"IDAT", zlib.compress(rows, 9))
+        + chunk(b"IEND", b"")
+    )
+
+
+def embedded_images(rng, scale):
+    """ Rects filled with patterns that use base64 embedded PNG images. """
+    images = 4 * scale
+    out = [SVG_HEADER.format(w=512, h=512), "<defs>\n"]
+    for i in range(images):
+        data = base64.b64encode(_png(rng, 32)).decode("ascii")
+        out.append(
+            '<pattern id="pattern_{0}" width="1" height="1">'
+            '<use xlink:href="#image_{0}"/></pattern>\n'.format(i)
+        )
+        out.append(
+            '<image id="image_{}" width="32" height="32" '
+            'xlink:href="data:image/png;base64,{}"/>\n'.format(i, data)
+        )
+    out.append("</defs>\n")
+    for i in range(images * 8):
+        out.append(
+            '<rect id="tile_{}" x="{}" y="{}" width="60" height="60" '
+            'fill="url(#pattern_{})"/>\n'.format(
+                i, (i % 8) * 64, (i // 8) * 64, i % images
+            )
+        )
+    out.append(SVG_FOOTER)
+    return "".join(out)
+
+
+CATEGORIES = {
+    "icons": icon_set,
+    "posters": text_poster,
+    "maps": map_export,
+    "images": embedded_images,
+}
+
+
+def generate(output_dir, seed=0, scale=1, documents=3):
+    """ Write ``documents`` files per category under ``output_dir/<category>``
+    and return ``{category: [paths]}``.
+    """
+    corpus = {}
+    for category, factory in sorted(CATEGORIES.items()):
+        category_dir = os.path.join(output_dir, category)
+        os.makedirs(category_dir, exist_ok=True)
+        corpus[category] = []
+        for index in range(documents):
+            rng = random.Random("{}:{}:{}".format(seed, category, index))
+            path = os.path.join(category_dir, "{}_{:03d}.svg".format(category, index))
+            with open(path, "w") as fh:
+                fh.write(factory(rng, scale))
+            corpus[category].append(path)
+    return corpus
+
+
+def load(corpus_dir):
+    """ Return ``{category: [paths]}`` for an existing corpus directory. """
+    corpus = {}
+    for category in sorted(os.listdir(corpus_dir)):
+        category_dir = os.path.join(corpus_dir, category)
+        if not os.path.isdir(category_dir):
+            continue
+        corpus[category] = sorted(
+            os.path.join(category_dir, name)
+            for name in os.listdir(category_dir)
+            if name.endswith(".svg")
+        )
+    return corpus
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate the benchmark SVG corpus")
+    parser.add_argument("--output", required=True)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--scale", type=int, default=1)
+    parser.add_argument("--documents", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    corpus = generate(args.output, args.seed, args.scale, args.documents)
+    for category, paths in corpus.items():
+        print("{}: {} documents".format(category, len(paths)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+""" Cold import time of the converter.
+
+Every sample imports a module in a fresh interpreter, the way a per file
+worker process starts. Most of the time goes into ``pxr`` itself, which
+varies with the machine, so the budget is the overhead of every
+``svg_to_usd`` module over a bare ``pxr.Usd`` import, median against
+median. The modules are sampled in turn, so a slow spell of the machine
+hits all of them alike. The run also fails if an import loaded a
+dependency that should only be loaded once a document needs it.
+
+Usage::
+
+    python -m benchmarks.import_time [--overhead-ms 250] [--repeat 5]
+                                     [--output report.json]
+"""
+import argparse
+import json
+import subprocess
+import sys
+
+from . import runner
+
+MODULES = ("pxr.Usd", "svg_to_usd.converter.common", "svg_to_usd.convert")
+
+# What the overhead is measured against.
+REFERENCE = "pxr.Usd"
+
+# Only imported by the converters and fills that need them.
+LAZY = ("matplotlib", "fontTools", "asyncio")
+
+_SNIPPET = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+seconds = time.perf_counter() - start
+print(json.dumps({{"seconds": seconds, "loaded": [m for m in {lazy!r} if m in sys.modules]}}))
+"""
+
+
+def sample(module):
+    output = subprocess.check_output(
+        [sys.executable, "-c", _SNIPPET.format(module=module, lazy=LAZY)]
+    )
+    return json.loads(output.decode().strip().splitlines()[-1])
+
+
+def measure(modules, repeat=5):
+    samples = {module: [] for module in modules}
+    for _ in range(repeat):
+        for module in modules:
+            samples[module].append(sample(module))
+    return {module: _summary(module_samples) for module, module_samples in samples.items()}
+
+
+def _summary(samples):
+    timings = sorted(s["seconds"] for s in samples)
+    return {
+        "seconds_median": timings[len(timings) // 2],
+        "seconds_min": timings[0],
+        "loaded": sorted(set(m for s in samples for m in s["loaded"])),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="svg_to_usd cold import time")
+    parser.add_argument(
+        "--overhead-ms",
+        type=float,
+        default=250.0,
+        help="Allowed median import time of every svg_to_usd module over pxr.Usd",
+    )
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="Write the JSON report to this path")
+    args = parser.parse_args(argv)
+
+    results = measure(MODULES, args.repeat)
+    reference_ms = results[REFERENCE]["seconds_median"] * 1000.0
+    failures = []
+    for module in MODULES:
+        result = results[module]
+        print(
+            "{:<32} {:>8.1f} ms median {:>8.1f} ms min   {}".format(
+                module,
+                result["seconds_median"] * 1000.0,
+                result["seconds_min"] * 1000.0,
+                ", ".join(result["loaded"]),
+            ),
+            file=sys.stderr,
+        )
+        if not module.startswith("svg_to_usd"):
+            continue
+        if result["loaded"]:
+            failures.append(
+                "{} imports {}".format(module, ", ".join(result["loaded"]))
+            )
+        overhead_ms = result["seconds_median"] * 1000.0 - reference_ms
+        if overhead_ms > args.overhead_ms:
+            failures.append(
+                "{} takes {:.1f} ms over {}, budget {:.0f} ms".format(
+                    module, overhead_ms, REFERENCE, args.overhead_ms
+                )
+            )
+
+    if args.output:
+        runner.write_report(results, args.output)
+
+    if failures:
+        print("Import time budget exceeded:", file=sys.stderr)
+        for failure in failures:
+            print("  " + failure, file=sys.stderr)
+        return 1
+    print(
+        "Within the import budget of {:.0f} ms over {}".format(args.overhead_ms, REFERENCE),
+        file=sys.stderr,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,259 @@
+""" Seeded synthetic inputs for the benchmarks.
+
+Every generator takes an explicit ``seed`` so that two runs (or two commits)
+benchmark exactly the same data.
+"""
+import random
+import xml.etree.ElementTree as ET
+
+
+def _rng(seed):
+    return random.Random(seed)
+
+
+def _square(x, y, size, clockwise=False):
+    corners = [(x, y), (x + size, y), (x + size, y + size), (x, y + size)]
+    if clockwise:
+        corners.reverse()
+    return corners
+
+
+def _subpath(points):
+    head = "M{:.3f} {:.3f}".format(*points[0])
+    tail = " ".join("L{:.3f} {:.3f}".format(x, y) for x, y in points[1:])
+    return "{} {} Z".format(head, tail)
+
+
+def polygon_with_holes(num_holes, seed=0):
+    """ Path data for an outer square containing ``num_holes`` jittered,
+    opposite wound square holes.
+    """
+    rng = _rng(seed)
+    cols = max(1, int(num_holes ** 0.5 + 0.999))
+    cell = 10.0
+    size = cols * cell + cell
+    d = [_subpath(_square(0, 0, size))]
+    for i in range(num_holes):
+        cx = cell * (0.5 + i % cols) + rng.uniform(0.5, 1.5)
+        cy = cell * (0.5 + i // cols) + rng.uniform(0.5, 1.5)
+        d.append(_subpath(_square(cx, cy, cell * 0.6, clockwise=True)))
+    return " ".join(d)
+
+
+def polyline_points(num_points, seed=0):
+    """ A random walk of ``num_points`` 2D points. """
+    rng = _rng(seed)
+    x = y = 0.0
+    points = []
+    for _ in range(num_points):
+        x += rng.uniform(0.1, 2.0)
+        y += rng.uniform(-1.0, 1.0)
+        points.append((x, y))
+    return points
+
+
+def polyline_path(num_points, seed=0):
+    """ Open path data for a random walk of ``num_points`` points. """
+    points = polyline_points(num_points, seed)
+    head = "M{:.3f} {:.3f}".format(*points[0])
+    tail = " ".join("L{:.3f} {:.3f}".format(x, y) for x, y in points[1:])
+    return "{} {}".format(head, tail)
+
+
+def curved_path(num_curves, seed=0):
+    """ Closed path data of ``num_curves`` segments, cycling through the
+    curve and arc commands in absolute, relative and shorthand forms.
+    """
+    rng = _rng(seed)
+    d = ["M0 0"]
+    x = 0.0
+    for i in range(num_curves):
+        step = rng.uniform(1.0, 5.0)
+        y = rng.uniform(-10.0, 10.0)
+        kind = i % 6
+        if kind == 0:
+            d.append(
+                "C{:.3f} {:.3f} {:.3f} {:.3f} {:.3f} {:.3f}".format(
+                    x + step / 3, -y, x + 2 * step / 3, y, x + step, y / 2
+                )
+            )
+        elif kind == 1:
+            d.append("s{:.3f} {:.3f} {:.3f} {:.3f}".format(step / 2, y, step, -y / 2))
+        elif kind == 2:
+            d.append("Q{:.3f} {:.3f} {:.3f} {:.3f}".format(x + step / 2, y, x + step, 0.0))
+        elif kind == 3:
+            d.append("t{:.3f} {:.3f}".format(step, y / 2))
+        elif kind == 4:
+            d.append("a{:.3f} {:.3f} 0 0 1 {:.3f} {:.3f}".format(step, step, step, -y / 2))
+        else:
+            d.append("l{:.3f} {:.3f}".format(step, 0.0))
+        x += step
+    d.append("Z")
+    return " ".join(d)
+
+
+def points_attribute(num_points, seed=0):
+    """ A ``points`` attribute for a random walk of ``num_points`` points,
+    mixing the comma, space and newline separators found in exports.
+    """
+    separators = [",", " ", ", ", "\n"]
+    values = []
+    for i, (x, y) in enumerate(polyline_points(num_points, seed)):
+        values.append("{:.3f}{}{:.3f}".format(x, separators[i % len(separators)], y))
+    return "  ".join(values)
+
+
+def ring_points(num_points, seed=0):
+    """ A closed, jittered ring of ``num_points`` points (first point repeated
+    at the end, as ``to_polygons`` returns them).
+    """
+    import math
+
+    rng = _rng(seed)
+    points = []
+    for i in range(num_points):
+        angle = 2.0 * math.pi * i / num_points
+        radius = 50.0 + rng.uniform(-2.0, 2.0)
+        points.append([math.cos(angle) * radius, math.sin(angle) * radius])
+    points.append(list(points[0]))
+    return points
+
+
+def transform_chain(depth, seed=0):
+    """ One transform attribute per nesting level, as found on deeply nested
+    ``<g>`` hierarchies.
+    """
+    rng = _rng(seed)
+    chain = []
+    for _ in range(depth):
+        kind = rng.choice(["translate", "rotate", "both"])
+        tx, ty = rng.uniform(-50, 50), rng.uniform(-50, 50)
+        angle = rng.uniform(-180, 180)
+        if kind == "translate":
+            chain.append("translate({:.3f},{:.3f})".format(tx, ty))
+        elif kind == "rotate":
+            chain.append("rotate({:.3f})".format(angle))
+        else:
+            chain.append(
+                "translate({:.3f} {:.3f}) rotate({:.3f})".format(tx, ty, angle)
+            )
+    return chain
+
+
+_STYLE_KEYS = [
+    ("fill", lambda rng: "#{:06x}".format(rng.randrange(0xFFFFFF))),
+    ("stroke", lambda rng: "#{:06x}".format(rng.randrange(0xFFFFFF))),
+    ("stroke-width", lambda rng: "{:.1f}px".format(rng.uniform(0.5, 4))),
+    ("font-size", lambda rng: "{}px".format(rng.randrange(8, 72))),
+    ("opacity", lambda rng: "{:.2f}".format(rng.random())),
+    ("stroke-linecap", lambda rng: rng.choice(["butt", "round", "square"])),
+    ("font-family", lambda rng: rng.choice(["Arial", "Helvetica", "serif"])),
+    ("display", lambda rng: "inline"),
+]
+
+
+def styled_element(num_declarations, seed=0):
+    """ An ElementTree element carrying an inline ``style`` with
+    ``num_declarations`` declarations plus a few presentation attributes.
+    """
+    rng = _rng(seed)
+    declarations = []
+    for i in range(num_declarations):
+        key, value = _STYLE_KEYS[i % len(_STYLE_KEYS)]
+        suffix = "" if i < len(_STYLE_KEYS) else "-{}".format(i)
+        declarations.append("{}{}: {}".format(key, suffix, value(rng)))
+    element = ET.Element(
+        "{http://www.w3.org/2000/svg}rect",
+        {"x": "1", "y": "2", "width": "3", "height": "4"},
+    )
+    element.set("style", "; ".join(declarations))
+    element.set("tree_id", 0)
+    return element
+
+
+def radial_gradient(num_stops, seed=0):
+    """ A ``<radialGradient>`` element with an offset focus, a transform and
+    ``num_stops`` translucent stops.
+    """
+    rng = _rng(seed)
+    element = ET.Element(
+        "{http://www.w3.org/2000/svg}radialGradient",
+        {
+            "id": "gradient",
+            "cx": "0.5",
+            "cy": "0.5",
+            "r": "0.6",
+            "fx": "0.3",
+            "fy": "0.4",
+            "spreadMethod": "reflect",
+            "gradientTransform": "rotate(20 0.5 0.5) scale(1 0.8)",
+        },
+    )
+    for i in range(num_stops):
+        ET.SubElement(
+            element,
+            "{http://www.w3.org/2000/svg}stop",
+            {
+                "offset": "{:.3f}".format(i / max(num_stops - 1, 1)),
+                "stop-color": "#{:06x}".format(rng.randrange(0xFFFFFF)),
+                "stop-opacity": "{:.2f}".format(rng.uniform(0.5, 1.0)),
+            },
+        )
+    return element
+
+
+def styled_document(num_rules, num_elements=500, seed=0):
+    """ An ElementTree ``<svg>`` root with a ``<style>`` block of
+    ``num_rules`` class, id and tag rules and ``num_elements`` rects that
+    reference some of them, Illustrator style.
+    """
+    rng = _rng(seed)
+    rules = []
+    for i in range(num_rules):
+        selector = (".cls-{}", "#el-{}", "g > rect.cls-{}")[i % 3].format(i)
+        rules.append("{}{{fill:#{:06x};stroke-width:{}px}}".format(
+            selector, rng.randrange(0xFFFFFF), rng.randint(1, 4)
+        ))
+    root = ET.Element("{http://www.w3.org/2000/svg}svg")
+    style = ET.SubElement(root, "{http://www.w3.org/2000/svg}style")
+    style.text = "\n".join(rules)
+    group = ET.SubElement(root, "{http://www.w3.org/2000/svg}g")
+    for i in range(num_elements):
+        ET.SubElement(group, "{http://www.w3.org/2000/svg}rect", {
+            "id": "el-{}".format(i),
+            "class": "cls-{} cls-{}".format(
+                rng.randrange(max(num_rules, 1)), rng.randrange(max(num_rules, 1))
+            ),
+        })
+    return root
+
+
+def glyph_outlines(seed=0):
+    """ A handful of glyph-like outlines in font units: bars, boxes and rings
+    with counters, drawn the way ``text.SVGPen`` emits them.
+    """
+    rng = _rng(seed)
+    glyphs = []
+    for i in range(8):
+        width = 600 + rng.randrange(400)
+        height = 1400
+        outer = _subpath(_square(0, -height, width))
+        if i % 2:
+            glyphs.append((outer, width + 100))
+            continue
+        inset = 150 + rng.randrange(50)
+        inner = [
+            (inset, -height + inset),
+            (inset, -inset),
+            (width - inset, -inset),
+            (width - inset, -height + inset),
+        ]
+        glyphs.append(("{} {}".format(outer, _subpath(inner)), width + 100))
+    return glyphs
+
+
+def glyph_run(length, seed=0):
+    """ ``length`` (path data, advance) pairs drawn from ``glyph_outlines``. """
+    rng = _rng(seed)
+    glyphs = glyph_outlines(seed)
+    return [rng.choice(glyphs) for _ in range(length)]
@@ -0,0 +1,220 @@
+""" Microbenchmarks for the geometry kernels in ``svg_to_usd.converter.utils``.
+
+Usage::
+
+    python -m benchmarks.kernels --output before.json
+    python -m benchmarks.kernels --output after.json
+    python -m benchmarks.compare before.json after.json
+"""
+import argparse
+import fnmatch
+
+import numpy as np
+
+from svg_to_usd.converter import simplify, stroke, stylesheet, svgpath, utils
+from svg_to_usd.converter.fills import gradient
+
+from . import inputs, runner
+
+
+def _setup():
+    # convert() normally picks the position function from the up axis.
+    utils.convert_position = utils.convert_position_y
+
+
+def bench_path_to_mesh(num_holes, seed):
+    svg_path = svgpath.parse(inputs.polygon_with_holes(num_holes, seed))
+
+    def run():
+        utils.path_to_mesh(svg_path, [], [], [])
+
+    return run
+
+
+def bench_parse_path(num_curves, seed):
+    svg_d = inputs.curved_path(num_curves, seed)
+
+    def run():
+        svgpath.parse(svg_d).to_polygons()
+
+    return run
+
+
+def bench_path_bounds(num_curves, seed):
+    svg_d = inputs.curved_path(num_curves, seed)
+
+    def run():
+        svgpath.bounds(svg_d)
+
+    return run
+
+
+def bench_parse_points(num_points, seed):
+    points_attr = inputs.points_attribute(num_points, seed)
+
+    def run():
+        svgpath.parse_points(points_attr)
+
+    return run
+
+
+def bench_simplify(num_points, seed):
+    points = np.array(inputs.polyline_points(num_points, seed))
+
+    def run():
+        simplify.points(points, 0.5)
+
+    return run
+
+
+def bench_path_to_curve(num_points, seed):
+    svg_path = svgpath.parse(inputs.polyline_path(num_points, seed))
+
+    def run():
+        utils.path_to_curve(svg_path, [], [])
+
+    return run
+
+
+def bench_is_counter_clockwise(num_points, seed):
+    points = np.array(inputs.ring_points(num_points, seed))
+
+    def run():
+        utils._is_counter_clockwise(points)
+
+    return run
+
+
+def bench_nested_transforms(depth, seed):
+    chain = inputs.transform_chain(depth, seed)
+
+    def run():
+        world = None
+        for transform in chain:
+            local = utils.convert_transform_attr(transform)
+            world = local if world is None else local * world
+
+    return run
+
+
+def bench_parse_attributes(num_declarations, seed):
+    element = inputs.styled_element(num_declarations, seed)
+
+    def run():
+        utils.parse_attributes(element)
+
+    return run
+
+
+def bench_compute_styles(num_rules, seed):
+    root = inputs.styled_document(num_rules, seed=seed)
+    parent_map = {c: p for p in root.iter() for c in p}
+
+    def run():
+        stylesheet.compute_styles(root, parent_map)
+
+    return run
+
+
+def bench_gradient(num_points, seed):
+    radial = gradient.parse(inputs.radial_gradient(8, seed))
+    points = np.array(inputs.ring_points(num_points, seed)) / 100.0 + 0.5
+
+    def run():
+        radial.evaluate(points)
+
+    return run
+
+
+def bench_stroke(num_points, seed):
+    polylines = [(inputs.polyline_points(num_points, seed), False)]
+    style = stroke.stroke_style(
+        {
+            "stroke": "#000000",
+            "stroke-width": "0.5",
+            "stroke-linejoin": "round",
+            "stroke-linecap": "round",
+            "stroke-dasharray": "4 1",
+        }
+    )
+
+    def run():
+        stroke.outline(polylines, style)
+
+    return run
+
+
+def bench_glyph_run(length, seed):
+    run_glyphs = [(svgpath.parse(d), advance) for d, advance in inputs.glyph_run(length, seed)]
+
+    def run():
+        usd_points, usd_fvi, usd_fvc = [], [], []
+        x_offset = 0
+        for svg_path, advance in run_glyphs:
+            utils.path_to_mesh(
+                svg_path, usd_points, usd_fvi, usd_fvc, x_offset, 0, 72.0 / 2048
+            )
+            x_offset += advance
+
+    return run
+
+
+CASES = [
+    ("parse_path/curves={}", bench_parse_path, [10, 100, 1000]),
+    ("path_bounds/curves={}", bench_path_bounds, [10, 100, 1000]),
+    ("parse_points/points={}", bench_parse_points, [100, 10000, 1000000]),
+    ("path_to_mesh/holes={}", bench_path_to_mesh, [1, 4, 16, 64]),
+    ("path_to_curve/points={}", bench_path_to_curve, [100, 1000, 10000]),
+    ("simplify/points={}", bench_simplify, [100, 10000, 1000000]),
+    ("is_counter_clockwise/points={}", bench_is_counter_clockwise, [100, 1000, 10000]),
+    ("convert_transform_attr/depth={}", bench_nested_transforms, [1, 8, 64]),
+    ("parse_attributes/declarations={}", bench_parse_attributes, [0, 8, 64]),
+    ("compute_styles/rules={}", bench_compute_styles, [10, 100, 1000]),
+    ("gradient/points={}", bench_gradient, [100, 10000, 1000000]),
+    ("stroke/points={}", bench_stroke, [100, 1000, 10000]),
+    ("glyph_run/length={}", bench_glyph_run, [10, 100]),
+]
+
+
+def run_benchmarks(patterns=None, seed=0, min_time=0.2, repeat=5, log=None):
+    _setup()
+    results = {}
+    for name_format, factory, sizes in CASES:
+        for size in sizes:
+            name = name_format.format(size)
+            if patterns and not any(fnmatch.fnmatch(name, p) for p in patterns):
+                continue
+            result = runner.measure(factory(size, seed), min_time, repeat)
+            result["seed"] = seed
+            results[name] = result
+            if log:
+                log(
+                    "{:<40} {:>14.1f} ops/s {:>12} B peak/call".format(
+                        name, result["ops_per_sec"], result["alloc_peak_bytes"]
+                    )
+                )
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="svg_to_usd kernel benchmarks")
+    parser.add_argument("--output", help="Write the JSON report to this path")
+    parser.add_argument(
+        "--filter",
+        action="append",
+        help="Only run cases matching this glob (may be repeated)",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--min-time", type=float, default=0.2)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    import sys
+
+    log = (lambda line: print(line, file=sys.stderr)) if args.output else None
+    results = run_benchmarks(args.filter, args.seed, args.min_time, args.repeat, log)
+    runner.write_report(results, args.output)
+
+
+if __name__ == "__main__":
+    main()
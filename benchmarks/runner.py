@@ -0,0 +1,121 @@
+""" Timing, allocation measurement and JSON reporting shared by the
+benchmark scripts.
+"""
+import gc
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+
+def measure(func, min_time=0.2, repeat=5):
+    """ Time ``func`` and sample its allocations.
+
+    The callable is run in batches until a batch takes at least ``min_time``
+    seconds. The fastest of ``repeat`` batches is reported, which is the
+    least noisy estimate on a shared machine. Allocations are sampled from a
+    single separate call with ``tracemalloc`` so tracing does not skew the
+    timings.
+    """
+    func()
+
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            break
+        if elapsed <= 0:
+            number *= 10
+        else:
+            number = max(number * 2, int(number * min_time / elapsed) + 1)
+
+    timings = [elapsed / number]
+    for _ in range(repeat - 1):
+        gc.collect()
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        timings.append((time.perf_counter() - start) / number)
+
+    best = min(timings)
+
+    gc.collect()
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    before_size, _ = tracemalloc.get_traced_memory()
+    before_blocks = len(tracemalloc.take_snapshot().traces)
+    func()
+    after_size, peak_size = tracemalloc.get_traced_memory()
+    after_blocks = len(tracemalloc.take_snapshot().traces)
+    tracemalloc.stop()
+
+    return {
+        "ops_per_sec": 1.0 / best if best > 0 else float("inf"),
+        "seconds_per_op": best,
+        "seconds_per_op_median": sorted(timings)[len(timings) // 2],
+        "calls_per_batch": number,
+        "alloc_peak_bytes": max(0, peak_size - before_size),
+        "alloc_retained_bytes": max(0, after_size - before_size),
+        "alloc_retained_blocks": max(0, after_blocks - before_blocks),
+    }
+
+
+def git_revision():
+    try:
+        return (
+            subprocess.check_output(
+                ["git", "rev-parse", "--short", "HEAD"],
+                stderr=subprocess.DEVNULL,
+                cwd=os.path.dirname(os.path.abspath(__file__)),
+            )
+            .decode()
+            .strip()
+        )
+    except Exception:
+        return None
+
+
+def metadata():
+    return {
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+
+def write_report(results, path=None):
+    report = {"meta": metadata(), "results": results}
+    text = json.dumps(report, indent=2, sort_keys=True)
+    if path:
+        with open(path, "w") as fh:
+            fh.write(text + "\n")
+    else:
+        sys.stdout.write(text + "\n")
+    return report
+
+
+def load_report(path):
+    with open(path) as fh:
+        return json.load(fh)
+
+
+def compare_reports(old, new, key="ops_per_sec"):
+    """ Return ``(name, old, new, ratio)`` rows for every case present in
+    both reports. A ratio above 1.0 means ``new`` has more of ``key``.
+    """
+    rows = []
+    for name in sorted(set(old["results"]) & set(new["results"])):
+        old_value = old["results"][name].get(key)
+        new_value = new["results"][name].get(key)
+        if old_value is None or new_value is None:
+            continue
+        ratio = new_value / old_value if old_value else float("inf")
+        rows.append((name, old_value, new_value, ratio))
+    return rows
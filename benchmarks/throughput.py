@@ -0,0 +1,288 @@
+""" End to end throughput harness for ``convert.convert_new``.
+
+Converts every document of a corpus (see ``benchmarks.corpus``), reports
+elements/sec, vertices/sec, peak RSS and output bytes per category, and
+compares the numbers against a checked-in baseline. The process exits with
+status 1 when any metric regresses past its threshold.
+
+The corpus is converted ``--repeat`` times, one category after the other,
+and every document counts its fastest conversion, like ``runner.measure``.
+Interleaving the passes keeps a slow spell of the machine from hitting all
+samples of one category. Timings of the same code still vary by up to 40%
+between runs on a shared machine, so the default threshold is 50%. Record
+the baseline with the same ``--repeat``.
+
+Usage::
+
+    python -m benchmarks.throughput [--corpus DIR] [--baseline FILE]
+                                    [--repeat 5] [--threshold 0.5]
+                                    [--metric-threshold peak_rss_kb=0.1]
+                                    [--output report.json] [--update-baseline]
+"""
+import argparse
+import concurrent.futures
+import multiprocessing
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import time
+
+from . import corpus as corpus_module
+from . import runner
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+# Metric name -> True if a larger value is better.
+METRICS = {
+    "elements_per_sec": True,
+    "vertices_per_sec": True,
+    "peak_rss_kb": False,
+    "output_bytes": False,
+}
+
+
+def _count_vertices(stage):
+    from pxr import UsdGeom
+
+    vertices = 0
+    for prim in stage.Traverse():
+        if prim.IsA(UsdGeom.PointBased):
+            points = UsdGeom.PointBased(prim).GetPointsAttr().Get()
+            if points:
+                vertices += len(points)
+    return vertices
+
+
+def _directory_size(path):
+    total = 0
+    for dirpath, _, filenames in os.walk(path):
+        for name in filenames:
+            total += os.path.getsize(os.path.join(dirpath, name))
+    return total
+
+
+def _convert_category(paths, output_dir):
+    """ Runs in a fresh worker process so peak RSS is per category. """
+    import xml.etree.ElementTree as ET
+
+    from svg_to_usd import convert
+    from svg_to_usd.converter import fills, geometry
+
+    # Converters load on first use, import them up front so the first
+    # document is not charged for it. benchmarks.import_time tracks that.
+    for name in geometry.MODULES:
+        getattr(geometry, name)
+    for name in fills.MODULES:
+        getattr(fills, name)
+
+    elements = 0
+    vertices = 0
+    seconds = 0.0
+    documents = []
+    for svg_path in paths:
+        name = os.path.splitext(os.path.basename(svg_path))[0]
+        doc_dir = os.path.join(output_dir, name)
+        os.makedirs(doc_dir, exist_ok=True)
+        usd_path = os.path.join(doc_dir, name + ".usd")
+
+        start = time.perf_counter()
+        stage = convert.convert_new(svg_path, usd_path)
+        elapsed = time.perf_counter() - start
+
+        doc_elements = sum(1 for _ in ET.parse(svg_path).getroot().iter())
+        doc_vertices = _count_vertices(stage)
+        elements += doc_elements
+        vertices += doc_vertices
+        seconds += elapsed
+        documents.append(
+            {
+                "path": os.path.basename(svg_path),
+                "seconds": elapsed,
+                "elements": doc_elements,
+                "vertices": doc_vertices,
+            }
+        )
+
+    return {
+        "documents": documents,
+        "elements": elements,
+        "vertices": vertices,
+        "seconds": seconds,
+        "elements_per_sec": elements / seconds if seconds else 0.0,
+        "vertices_per_sec": vertices / seconds if seconds else 0.0,
+        "peak_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        "output_bytes": _directory_size(output_dir),
+    }
+
+
+def run_corpus(corpus, output_dir, repeat=5):
+    runs = {category: [] for category in corpus}
+    context = multiprocessing.get_context("spawn")
+    for run in range(repeat):
+        for category, paths in sorted(corpus.items()):
+            # A fresh directory per pass, so output bytes are per pass too.
+            category_dir = os.path.join(output_dir, str(run), category)
+            with concurrent.futures.ProcessPoolExecutor(1, mp_context=context) as pool:
+                runs[category].append(
+                    pool.submit(_convert_category, paths, category_dir).result()
+                )
+    return {category: _fastest(category_runs) for category, category_runs in runs.items()}
+
+
+def _fastest(runs):
+    """ Merge the passes over one category, keeping the fastest conversion
+    of every document.
+    """
+    documents = []
+    for passes in zip(*(run["documents"] for run in runs)):
+        document = dict(min(passes, key=lambda d: d["seconds"]))
+        document["seconds_median"] = sorted(d["seconds"] for d in passes)[len(passes) // 2]
+        documents.append(document)
+
+    elements = sum(d["elements"] for d in documents)
+    vertices = sum(d["vertices"] for d in documents)
+    seconds = sum(d["seconds"] for d in documents)
+    return {
+        "documents": documents,
+        "elements": elements,
+        "vertices": vertices,
+        "seconds": seconds,
+        "elements_per_sec": elements / seconds if seconds else 0.0,
+        "vertices_per_sec": vertices / seconds if seconds else 0.0,
+        "peak_rss_kb": min(run["peak_rss_kb"] for run in runs),
+        "output_bytes": runs[0]["output_bytes"],
+    }
+
+
+def compare(results, baseline, threshold, metric_thresholds=None):
+    """ Return a list of human readable regressions of ``results`` against
+    ``baseline``.
+    """
+    metric_thresholds = metric_thresholds or {}
+    regressions = []
+    for category, metrics in sorted(baseline.get("results", {}).items()):
+        if category not in results:
+            continue
+        for metric, higher_is_better in METRICS.items():
+            if metric not in metrics:
+                continue
+            limit = metric_thresholds.get(metric, threshold)
+            expected = metrics[metric]
+            actual = results[category][metric]
+            if not expected:
+                continue
+            change = (actual - expected) / expected
+            if higher_is_better:
+                change = -change
+            if change > limit:
+                regressions.append(
+                    "{}.{}: {:.1f} -> {:.1f} ({:+.1%}, limit {:.0%})".format(
+                        category, metric, expected, actual, change, limit
+                    )
+                )
+    return regressions
+
+
+def _parse_metric_thresholds(values):
+    thresholds = {}
+    for value in values or []:
+        metric, _, limit = value.partition("=")
+        if metric not in METRICS:
+            raise SystemExit("Unknown metric '{}'".format(metric))
+        thresholds[metric] = float(limit)
+    return thresholds
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="svg_to_usd corpus throughput")
+    parser.add_argument("--corpus", help="Existing corpus directory to convert")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--scale", type=int, default=1)
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=5,
+        help="Passes over the corpus, every document counts its fastest one",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.5,
+        help="Allowed relative regression for every metric (0.5 = 50%%)",
+    )
+    parser.add_argument(
+        "--metric-threshold",
+        action="append",
+        help="Per metric override, e.g. peak_rss_kb=0.1",
+    )
+    parser.add_argument("--output", help="Write the JSON report to this path")
+    parser.add_argument(
+        "--update-baseline",
+        action="store_true",
+        help="Overwrite the baseline with this run instead of comparing",
+    )
+    args = parser.parse_args(argv)
+
+    work_dir = tempfile.mkdtemp(prefix="svg_to_usd_bench_")
+    try:
+        if args.corpus:
+            corpus = corpus_module.load(args.corpus)
+        else:
+            corpus = corpus_module.generate(
+                os.path.join(work_dir, "corpus"), args.seed, args.scale
+            )
+        results = run_corpus(corpus, os.path.join(work_dir, "output"), args.repeat)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    for category, metrics in sorted(results.items()):
+        print(
+            "{:<10} {:>12.0f} elements/s {:>12.0f} vertices/s "
+            "{:>10} KB peak {:>12} bytes".format(
+                category,
+                metrics["elements_per_sec"],
+                metrics["vertices_per_sec"],
+                metrics["peak_rss_kb"],
+                metrics["output_bytes"],
+            )
+        )
+
+    if args.output:
+        runner.write_report(results, args.output)
+
+    if args.update_baseline:
+        runner.write_report(
+            {
+                category: {metric: metrics[metric] for metric in METRICS}
+                for category, metrics in results.items()
+            },
+            args.baseline,
+        )
+        print("Baseline written to {}".format(args.baseline))
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print("No baseline at {}, skipping comparison".format(args.baseline))
+        return 0
+
+    regressions = compare(
+        results,
+        runner.load_report(args.baseline),
+        args.threshold,
+        _parse_metric_thresholds(args.metric_threshold),
+    )
+    if regressions:
+        print("Performance regressions:")
+        for regression in regressions:
+            print("  " + regression)
+        return 1
+
+    print("No regressions against {}".format(args.baseline))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -5,6 +5,9 @@ import logging
 parser = argparse.ArgumentParser(description='Convert SVG to USD')
 parser.add_argument('input', type=str, help='Path to SVG input file')
 parser.add_argument('output', type=str, help='Path for USD output file')
+parser.add_argument('--stats-json', type=str, help='Write conversion statistics as JSON to this path')
+parser.add_argument('--slowest', type=int, default=10, help='Number of slowest elements to report in the statistics')
+parser.add_argument('--profile', type=str, help='Write a cProfile dump of the conversion to this path')
 
 args = parser.parse_args()
 
@@ -16,4 +19,20 @@ logging.info("Converting SVG to USD")
 logging.info(f" - input: {_input}")
 logging.info(f" - output: {_output}")
 
-convert.convert_new(_input, _output)
+_stats = False
+if args.stats_json:
+    from svg_to_usd.converter.stats import ConversionStats
+    _stats = ConversionStats(slowest=args.slowest)
+
+if args.profile:
+    import cProfile
+    _profiler = cProfile.Profile()
+    _profiler.runcall(convert.convert_new, _input, _output, stats=_stats)
+    _profiler.dump_stats(args.profile)
+    logging.info(f" - profile: {args.profile}")
+else:
+    convert.convert_new(_input, _output, stats=_stats)
+
+if args.stats_json:
+    _stats.to_json(args.stats_json)
+    logging.info(f" - stats: {args.stats_json}")
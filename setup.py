@@ -6,14 +6,14 @@ setuptools.setup(
     version=Version("0.2.1").number,
     description="Convert SVG vectors to Pixar's Universal Scene Description",
     long_description=open("README.md").read().strip(),
-    packages=setuptools.find_packages(),
+    packages=setuptools.find_packages(exclude=["benchmarks", "benchmarks.*"]),
     author="Ben Skinner",
     author_email="ben.vochsel@gmail.com",
     url="https://github.com/Vochsel/svg_to_usd",
     py_modules=["svg_to_usd"],
     install_requires=[
-        "svgpath2mpl",
         "matplotlib",
+        "numpy",
         #   'usd-core',
         "opentypesvg",
     ],
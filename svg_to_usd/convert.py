@@ -1,42 +1,740 @@
-from pxr import Usd
+from pxr import Usd, Sdf, UsdGeom, UsdShade, Gf, Vt
 import importlib
-from .converter import common, utils
+from .converter import common, utils, shards, stylesheet, culling, payloads, budgets
+from .converter import registry
 from .converter import conversion_context, conversion_options
+from .converter import stats as conversion_stats
+from .converter import progress as conversion_progress
+from .converter.common import ConversionCancelled
 
 # importlib.reload(utils)
+import logging
 import os
+import threading
+import time
 
 
-def convert_new(svg_path, usd_path):
+def convert_new(svg_path, usd_path, stats=False, progress=None):
+    """
+    Convert an SVG document into a new layer saved at ``usd_path``.
+
+    ``progress`` is called as ``progress(processed, total, stage,
+    element_id)`` while the conversion runs, see ``converter.progress``.
+    Returning True cancels the conversion, which raises
+    ``ConversionCancelled`` and leaves no layer behind.
+    """
+    if conversion_options["shard_by"]:
+        return convert_sharded(svg_path, usd_path, stats=stats, progress=progress)
+    if conversion_options["stream_chunk_size"]:
+        return convert_streamed(svg_path, usd_path, stats=stats, progress=progress)
+
+    if progress is not None:
+        progress = conversion_progress.Progress(progress)
+
     stage = Usd.Stage.CreateNew(usd_path)
 
     conversion_context["working_directory"] = os.path.dirname(usd_path)
 
-    convert(svg_path, stage)
+    if stats is True:
+        stats = conversion_stats.ConversionStats()
+
+    try:
+        convert(svg_path, stage, stats=stats, progress=progress)
+        _report_stage(progress, "save")
+    except ConversionCancelled:
+        _discard_layer(stage.GetRootLayer())
+        # The traceback would keep the layer open otherwise.
+        del stage
+        raise
+
+    with (stats or conversion_stats.NULL_STATS).stage("save"):
+        stage.Save()
+    if progress is not None:
+        progress.finish()
+
+    if stats:
+        return stage, stats
+    return stage
+
+
+def convert(svg_path, usd_stage, svg_str=None, stats=False, progress=None):
+    """
+    Convert an SVG document into ``usd_stage``.
+
+    Passing ``stats=True`` (or a ``ConversionStats`` instance to accumulate
+    into) collects timings and counts, and returns ``(usd_stage, stats)``
+    instead of just the stage.
+
+    ``progress`` is called as ``progress(processed, total, stage,
+    element_id)``, see ``converter.progress``. When the conversion is
+    cancelled, by the callback or ``conversion_context["cancel"]``, the edit
+    target layer is restored to what it held before and
+    ``ConversionCancelled`` is raised.
+    """
+    if stats is True:
+        stats = conversion_stats.ConversionStats()
+    collected = stats or conversion_stats.NULL_STATS
+    conversion_context["stats"] = collected
+
+    owns_progress = progress is not None and not isinstance(
+        progress, conversion_progress.Progress
+    )
+    if owns_progress:
+        progress = conversion_progress.Progress(progress)
+    conversion_context["progress"] = progress
+
+    layer = usd_stage.GetEditTarget().GetLayer()
+    backup = None
+    if progress is not None or conversion_context["cancel"] is not None:
+        backup = Sdf.Layer.CreateAnonymous()
+        backup.TransferContent(layer)
+
+    try:
+        _report_stage(progress, "parse")
+        root = _load(svg_path, svg_str, collected)
+        if progress is not None:
+            progress.total = len(common.parent_map) + 1
+
+        _report_stage(progress, "preprocess")
+        with collected.stage("preprocess"):
+            common.preprocess_svg_root(usd_stage, root)
+        _report_stage(progress, "cull")
+        with collected.stage("cull"):
+            common.culled_map = culling.cull(root)
+        _report_stage(progress, "convert")
+        with collected.stage("convert"):
+            common.handle_svg_root(usd_stage, root)
+    except ConversionCancelled:
+        if backup is not None:
+            layer.TransferContent(backup)
+        _remove_files(payloads.written)
+        raise
+    finally:
+        conversion_context["stats"] = None
+        conversion_context["progress"] = None
+
+    if owns_progress:
+        progress.finish()
+
+    if stats:
+        return usd_stage, collected
+    return usd_stage
+
+
+def _report_stage(progress, name):
+    """ Tell the progress callback about stage ``name``, a chance to cancel. """
+    if progress is not None:
+        progress.stage(name)
+        if progress.cancelled:
+            raise ConversionCancelled()
+    common.check_cancelled()
+
+
+def _remove_files(paths):
+    for path in paths:
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def _discard_layer(layer):
+    """ Empty a layer written by a cancelled conversion and delete its file. """
+    layer.Clear()
+    if layer.realPath:
+        _remove_files([layer.realPath])
+
+
+def convert_sharded(svg_path, usd_path, stats=False, progress=None):
+    """
+    Convert an SVG document into a root layer at ``usd_path`` that only
+    stitches together shard layers, each converted and saved by its own
+    worker process. See ``converter.shards`` and the ``shard_by``,
+    ``shard_size`` and ``shard_workers`` conversion options.
+
+    ``progress`` hears about the convert stage once per finished shard.
+    """
+    import concurrent.futures
+    import multiprocessing
+
+    if stats is True:
+        stats = conversion_stats.ConversionStats()
+    collected = stats or conversion_stats.NULL_STATS
+    if progress is not None:
+        progress = conversion_progress.Progress(progress)
+
+    conversion_context["working_directory"] = os.path.dirname(usd_path)
+    conversion_context["stats"] = collected
+    conversion_context["progress"] = progress
+    paths = []
+    try:
+        _report_stage(progress, "parse")
+        root = _load(svg_path, None, collected)
+        if progress is not None:
+            progress.total = len(common.parent_map) + 1
+
+        shard_size = conversion_options["shard_size"]
+        partition = shards.partition(root, conversion_options["shard_by"], shard_size)
+        if conversion_options["shard_by"] == "count":
+            # Top-level elements are never split between shards.
+            for indices in partition:
+                size = sum(shards.subtree_size(root[i]) for i in indices)
+                if size > 4 * shard_size:
+                    logging.warning(
+                        "A shard holds {} elements, shard_size is {}".format(
+                            size, shard_size
+                        )
+                    )
+        # The first path holds the materials, the workers bind them by path.
+        paths = shards.shard_paths(usd_path, len(partition) + 1)
+        os.makedirs(os.path.dirname(paths[0]), exist_ok=True)
+
+        # Parsed, styled, preprocessed and culled once here, the workers
+        # only get the subtrees of their shard.
+        _report_stage(progress, "preprocess")
+        materials = Usd.Stage.CreateNew(paths[0])
+        with collected.stage("preprocess"):
+            common.preprocess_svg_root(materials, root)
+        with collected.stage("save"):
+            materials.Save()
+        _report_stage(progress, "cull")
+        with collected.stage("cull"):
+            common.culled_map = culling.cull(root)
+        _report_stage(progress, "convert")
+    except ConversionCancelled:
+        _discard_shards(paths)
+        raise
+    finally:
+        conversion_context["stats"] = None
+        conversion_context["progress"] = None
+
+    context = {
+        k: v
+        for k, v in conversion_context.items()
+        if k not in ("stats", "write_textures", "cancel", "progress")
+    }
+    jobs = [
+        (
+            shard_path,
+            paths[0],
+            _shard_document(root, indices),
+            dict(conversion_options),
+            context,
+            bool(stats),
+        )
+        for shard_path, indices in zip(paths[1:], partition)
+    ]
+
+    workers = conversion_options["shard_workers"] or os.cpu_count() or 1
+    workers = min(workers, len(jobs)) or 1
+
+    with collected.stage("convert"):
+        with concurrent.futures.ProcessPoolExecutor(
+            workers, mp_context=multiprocessing.get_context("spawn")
+        ) as pool:
+            futures = {
+                pool.submit(_write_shard, job): indices
+                for job, indices in zip(jobs, partition)
+            }
+            try:
+                for future in concurrent.futures.as_completed(futures):
+                    shard_stats = future.result()
+                    if stats:
+                        stats.merge(shard_stats)
+                    if progress is not None:
+                        progress.advance(
+                            count=sum(shards.subtree_size(root[i]) for i in futures[future])
+                        )
+                        if progress.cancelled:
+                            raise ConversionCancelled()
+                    common.check_cancelled()
+            except ConversionCancelled:
+                for future in futures:
+                    future.cancel()
+                concurrent.futures.wait(futures)
+                _discard_shards(paths)
+                raise
+
+    try:
+        _report_stage(progress, "save")
+    except ConversionCancelled:
+        _discard_shards(paths)
+        raise
+    stage = Usd.Stage.CreateNew(usd_path)
+    shards.stitch(stage, paths)
+    with collected.stage("save"):
+        stage.Save()
+    if progress is not None:
+        progress.finish()
+
+    if stats:
+        return stage, stats
+    return stage
+
+
+def convert_streamed(svg_path, usd_path, stats=False, progress=None):
+    """
+    Convert an SVG document into a root layer at ``usd_path`` that stitches
+    together chunk layers of about ``stream_chunk_size`` elements each.
+
+    Every chunk is saved and let go of as soon as its elements are converted,
+    so only the document and one chunk are held in memory. Groups over
+    ``stream_chunk_size`` elements are split across chunks, see
+    ``shards.split``. The first chunk holds the materials of the document,
+    the others author the prototypes they use again. The composed stage is
+    the one ``convert_new`` builds in memory.
+    """
+    if stats is True:
+        stats = conversion_stats.ConversionStats()
+    collected = stats or conversion_stats.NULL_STATS
+    if progress is not None:
+        progress = conversion_progress.Progress(progress)
+
+    conversion_context["working_directory"] = os.path.dirname(usd_path)
+    conversion_context["stats"] = collected
+    conversion_context["progress"] = progress
+    paths = []
+    try:
+        _report_stage(progress, "parse")
+        root = _load(svg_path, None, collected)
+        if progress is not None:
+            progress.total = len(common.parent_map) + 1
+
+        _report_stage(progress, "cull")
+        with collected.stage("cull"):
+            common.culled_map = culling.cull(root)
+
+        chunk_size = conversion_options["stream_chunk_size"]
+        chunks = shards.split(root, chunk_size, common.culled_map)
+        paths = shards.shard_paths(usd_path, len(chunks) + 1, "chunk")
+        os.makedirs(os.path.dirname(paths[0]), exist_ok=True)
+
+        _report_stage(progress, "preprocess")
+        # Kept open, the chunks bind the materials held in common.image_map.
+        materials = _open_chunk(paths[0])
+        with collected.stage("preprocess"):
+            common.preprocess_svg_root(materials, root)
+        with collected.stage("save"):
+            materials.Save()
+
+        _report_stage(progress, "convert")
+        # Split <g> -> its prim path, and the union of its bounds so far.
+        split_groups = {}
+        split_extents = {}
+        for chunk_path, units in zip(paths[1:], chunks):
+            size = sum(shards.subtree_size(svg_element) for svg_element, _ in units)
+            if size > 4 * chunk_size:
+                logging.warning(
+                    "{} holds {} elements, stream_chunk_size is {}".format(
+                        os.path.basename(chunk_path), size, chunk_size
+                    )
+                )
+            _write_chunk(chunk_path, units, collected, split_groups, split_extents)
+
+        # The document and the composed chunks are never in memory together.
+        root = None
+        _forget_document()
+
+        _report_stage(progress, "save")
+        stage = Usd.Stage.CreateNew(usd_path)
+        shards.stitch(stage, paths)
+        _rollup_split_extents(stage, split_extents)
+        with collected.stage("save"):
+            stage.Save()
+    except ConversionCancelled:
+        _discard_shards(paths)
+        _remove_files(payloads.written)
+        raise
+    finally:
+        conversion_context["stats"] = None
+        conversion_context["progress"] = None
+
+    if progress is not None:
+        progress.finish()
+
+    if stats:
+        return stage, stats
+    return stage
+
+
+def _forget_document():
+    """ Drop what the converter keeps of the document it has converted. """
+    common.parent_map = {}
+    common.id_map = {}
+    common.style_map = {}
+    common.culled_map = {}
+    common.converted_subtrees = set()
+
+
+def _open_chunk(chunk_path):
+    layer = Sdf.Layer.Find(chunk_path)
+    if layer:
+        # Still open from an earlier conversion in this process.
+        layer.Clear()
+        return Usd.Stage.Open(layer)
+    return Usd.Stage.CreateNew(chunk_path)
+
+
+def _write_chunk(chunk_path, units, collected, split_groups, split_extents):
+    """ Convert the ``(svg_element, groups)`` units of ``shards.split`` into a
+    layer of their own and save it.
+
+    The first chunk holding part of a split group converts the group, the
+    next ones define a bare Xform at the same path to put their part below,
+    and sublayer composition merges them. ``split_groups`` and
+    ``split_extents`` carry the group paths and bounds from chunk to chunk.
+    """
+    stage = _open_chunk(chunk_path)
+
+    # Nothing outside the chunk refers to the prims of the previous one, but
+    # the children of split groups are baked with the transform of the group.
+    common.prototype_map = {}
+    common.extent_map = {}
+    common.bake_map = {
+        k: v for k, v in common.bake_map.items() if k in split_extents
+    }
+
+    chunk_groups = {}
+    with collected.stage("convert"):
+        for svg_element, groups in units:
+            parent_prim = None
+            for group in groups:
+                if group not in chunk_groups:
+                    chunk_groups[group] = _split_group(stage, group, parent_prim, split_groups)
+                parent_prim = chunk_groups[group]
+            common.handle_svg_root(stage, [svg_element], parent_prim)
+
+        # Innermost first. Only the other children count here, the split
+        # groups below are rolled up once their last chunk is written.
+        for usd_prim in reversed(list(chunk_groups.values())):
+            if usd_prim is None:
+                continue
+            utils.rollup_extents_hint(usd_prim)
+            prim_path = usd_prim.GetPath()
+            split_extents[prim_path] = Gf.Range3d.GetUnion(
+                split_extents.get(prim_path, Gf.Range3d()), common.extent_map[prim_path]
+            )
+            common.extent_map[prim_path] = Gf.Range3d()
+    with collected.stage("save"):
+        stage.Save()
+
+
+def _rollup_split_extents(stage, split_extents):
+    """ Author the ``extentsHint`` of the split groups, every chunk only knows
+    the bounds of its part of them. Innermost first, like
+    ``utils.rollup_extents_hint``.
+    """
+    for prim_path in sorted(split_extents, key=lambda p: -p.pathElementCount):
+        bounds = split_extents[prim_path]
+        if bounds.IsEmpty():
+            continue
+        UsdGeom.ModelAPI.Apply(stage.OverridePrim(prim_path)).SetExtentsHint(
+            Vt.Vec3fArray([Gf.Vec3f(bounds.GetMin()), Gf.Vec3f(bounds.GetMax())])
+        )
+        parent_path = prim_path.GetParentPath()
+        if parent_path in split_extents:
+            transform = UsdGeom.Xformable(
+                stage.GetPrimAtPath(prim_path)
+            ).GetLocalTransformation()
+            split_extents[parent_path] = Gf.Range3d.GetUnion(
+                split_extents[parent_path],
+                Gf.BBox3d(bounds, transform).ComputeAlignedRange(),
+            )
+
 
-    stage.Save()
+def _split_group(stage, group, parent_prim, split_groups):
+    if group in split_groups:
+        prim_path = split_groups[group]
+        return UsdGeom.Xform.Define(stage, prim_path) if prim_path else None
+
+    # Its children are converted chunk by chunk, never as a payload.
+    with payloads.suspended():
+        usd_prim = common.handle_element(stage, group, parent_prim)
+    split_groups[group] = usd_prim.GetPath() if usd_prim else None
+    return usd_prim
+
+
+def _discard_shards(paths):
+    _remove_files(paths)
+    if paths and os.path.isdir(os.path.dirname(paths[0])):
+        if not os.listdir(os.path.dirname(paths[0])):
+            os.rmdir(os.path.dirname(paths[0]))
+
+
+def _shard_document(root, indices):
+    """
+    What a worker needs of the document to convert the top-level elements
+    ``indices`` of ``root``: their subtrees, the elements they ``<use>``, and
+    the state the parent process resolved for them.
+
+    Parents outside of the shard are replaced by empty elements of the same
+    tag, so pickling the result does not pull in the rest of the document.
+    """
+    import xml.etree.ElementTree as ET
+
+    svg_elements = [root[i] for i in indices]
+    shipped = set()
+    pending = list(svg_elements)
+    while pending:
+        for svg_element in pending.pop().iter():
+            if svg_element in shipped:
+                continue
+            shipped.add(svg_element)
+            if registry.local_name(svg_element.tag) != "use":
+                continue
+            href = svg_element.attrib.get(
+                "{http://www.w3.org/1999/xlink}href", svg_element.attrib.get("href", "")
+            )
+            referenced = common.id_map.get(href[1:]) if href.startswith("#") else None
+            if referenced is not None and referenced not in shipped:
+                pending.append(referenced)
+
+    stubs = {}
+    parent_map = {}
+    for svg_element in shipped:
+        parent = common.parent_map.get(svg_element)
+        if parent is None:
+            continue
+        if parent not in shipped:
+            if parent not in stubs:
+                stubs[parent] = ET.Element(parent.tag)
+            parent = stubs[parent]
+        parent_map[svg_element] = parent
+
+    return {
+        "elements": svg_elements,
+        "parent_map": parent_map,
+        "id_map": {k: v for k, v in common.id_map.items() if v in shipped},
+        "style_map": {k: v for k, v in common.style_map.items() if k in shipped},
+        "culled_map": {k: v for k, v in common.culled_map.items() if k in shipped},
+        "gradient_map": common.gradient_map,
+        "pattern_map": common.pattern_map,
+        "image_map": {k: str(v.GetPath()) for k, v in common.image_map.items()},
+    }
+
+
+def _write_shard(job):
+    """ Worker process entry point: convert the top-level elements of a
+    ``_shard_document`` into their own layer, binding the materials saved at
+    ``materials_path``.
+    """
+    shard_path, materials_path, document, options, context, collect_stats = job
+
+    conversion_options.update(options)
+    conversion_context.update(context)
+
+    stats = conversion_stats.ConversionStats() if collect_stats else None
+    collected = stats or conversion_stats.NULL_STATS
+    conversion_context["stats"] = collected
+
+    try:
+        stage = Usd.Stage.CreateNew(shard_path)
+        _reset_document()
+        _set_up_axis()
+        common.parent_map = document["parent_map"]
+        common.id_map = document["id_map"]
+        common.style_map = document["style_map"]
+        common.culled_map = document["culled_map"]
+        common.gradient_map = document["gradient_map"]
+        common.pattern_map = document["pattern_map"]
+
+        materials = Usd.Stage.Open(materials_path)
+        common.image_map = {
+            k: UsdShade.Material(materials.GetPrimAtPath(v))
+            for k, v in document["image_map"].items()
+        }
+
+        with collected.stage("convert"):
+            for svg_element in document["elements"]:
+                if not common.is_definition(svg_element) and svg_element not in common.culled_map:
+                    common.handle_subtree(stage, svg_element)
+        with collected.stage("save"):
+            stage.Save()
+    finally:
+        conversion_context["stats"] = None
+
+    if not stats:
+        return None
+    return stats.to_dict()
+
+
+# The converter keeps its state in module globals, so a process converts one
+# document at a time. convert_async queues on this lock, convert_new_async
+# spreads documents over worker processes.
+_convert_lock = threading.Lock()
+_async_lock = threading.Lock()
+_async_pool = None
+_async_manager = None
+
+
+async def convert_async(svg_path, usd_stage, svg_str=None, stats=False, progress=None):
+    """
+    Coroutine version of ``convert``, running the conversion in the default
+    executor so the event loop stays responsive.
+
+    Conversions in the same process run one at a time. Cancelling the
+    awaiting task stops the conversion before its next element; the
+    coroutine returns once the executor thread has let go of ``usd_stage``.
+    """
+    import asyncio
+
+    loop = asyncio.get_running_loop()
+    cancel = threading.Event()
+
+    def run():
+        with _convert_lock:
+            conversion_context["cancel"] = cancel
+            try:
+                return convert(
+                    svg_path, usd_stage, svg_str=svg_str, stats=stats, progress=progress
+                )
+            finally:
+                conversion_context["cancel"] = None
+
+    return await _await_cancellable(loop.run_in_executor(None, run), cancel)
+
+
+async def convert_new_async(svg_path, usd_path, stats=False, options=None):
+    """
+    Coroutine version of ``convert_new``.
+
+    The document is converted, its textures written and its layer saved by
+    one of ``async_workers`` worker processes, so several documents convert
+    in parallel and the rest wait for a free worker. ``options`` override
+    ``conversion_options`` for this document only. The saved stage is
+    opened in the calling process and returned, with the statistics when
+    ``stats`` is True.
+    """
+    import asyncio
+
+    loop = asyncio.get_running_loop()
+    pool, manager = await loop.run_in_executor(None, _start_async_pool)
+
+    job_options = dict(conversion_options)
+    job_options.update(options or {})
+    job_context = {
+        k: v
+        for k, v in conversion_context.items()
+        if k not in ("stats", "write_textures", "cancel", "progress")
+    }
+    cancel = await loop.run_in_executor(None, manager.Event)
+    job = pool.submit(
+        _convert_new_job, svg_path, usd_path, job_options, job_context, bool(stats), cancel
+    )
+    job_stats = await _await_cancellable(asyncio.wrap_future(job), cancel, job)
+
+    stage = await loop.run_in_executor(None, _open_saved, usd_path)
+    if stats:
+        if stats is True:
+            stats = conversion_stats.ConversionStats()
+        stats.merge(job_stats)
+        return stage, stats
     return stage
 
 
-def convert(svg_path, usd_stage, svg_str=None):
+def _start_async_pool():
+    """ The worker pool of ``convert_new_async``, and a manager process for
+    the events that cancel its jobs. Started on first use, this blocks.
+    """
+    global _async_pool, _async_manager
+    import concurrent.futures
+    import multiprocessing
+
+    with _async_lock:
+        if _async_pool is None:
+            context = multiprocessing.get_context("spawn")
+            workers = conversion_options["async_workers"] or os.cpu_count() or 1
+            _async_manager = context.Manager()
+            _async_pool = concurrent.futures.ProcessPoolExecutor(
+                workers, mp_context=context
+            )
+    return _async_pool, _async_manager
+
+
+async def _await_cancellable(future, cancel, job=None):
+    """ Await ``future``, on cancellation ask the conversion to stop and
+    wait until it has. ``job`` is the concurrent future of a queued process
+    job, which is dropped if it has not started yet.
+    """
+    import asyncio
+
+    try:
+        return await asyncio.shield(future)
+    except asyncio.CancelledError:
+        cancel.set()
+        if job is not None:
+            job.cancel()
+        try:
+            await future
+        except (ConversionCancelled, asyncio.CancelledError):
+            pass
+        raise
+
+
+def _open_saved(usd_path):
+    # The layer may still be open here from an earlier conversion.
+    layer = Sdf.Layer.Find(usd_path)
+    if layer:
+        layer.Reload()
+    return Usd.Stage.Open(usd_path)
+
+
+class _PolledEvent(object):
+    """ Looks at an Event of another process at most every ``interval``
+    seconds, it is too slow to ask for every element.
+    """
+
+    def __init__(self, event, interval=0.05):
+        self.event = event
+        self.interval = interval
+        self.next_poll = 0.0
+        self.cancelled = False
+
+    def is_set(self):
+        now = time.monotonic()
+        if not self.cancelled and now >= self.next_poll:
+            self.next_poll = now + self.interval
+            self.cancelled = self.event.is_set()
+        return self.cancelled
+
+
+def _convert_new_job(svg_path, usd_path, options, context, collect_stats, cancel):
+    """ Worker process entry point of ``convert_new_async``. """
+    conversion_options.update(options)
+    conversion_context.update(context)
+    conversion_context["cancel"] = _PolledEvent(cancel)
+    try:
+        result = convert_new(svg_path, usd_path, stats=collect_stats)
+    finally:
+        conversion_context["cancel"] = None
+
+    if not collect_stats:
+        return None
+    return result[1].to_dict()
+
+
+def _load(svg_path, svg_str, stats):
     import xml.etree.ElementTree as ET
 
     root = ""
-    if svg_str:
-        root = ET.fromstring(svg_str)
-    else:
-        tree = ET.parse(svg_path)
-        root = tree.getroot()
-
-    i = 0
-    for el in root.iter():
-        el.set("tree_id", i)
-        i += 1
-
-    if svg_str:
-        common.parent_map = {c: p for p in root.getiterator() for c in p}
-    else:
-        common.parent_map = {c: p for p in tree.iter() for c in p}
+    with stats.stage("parse"):
+        if svg_str:
+            root = ET.fromstring(svg_str)
+        else:
+            root = ET.parse(svg_path).getroot()
+
+        i = 0
+        common.id_map = {}
+        for el in root.iter():
+            el.set("tree_id", i)
+            if "id" in el.attrib:
+                common.id_map.setdefault(el.attrib["id"], el)
+            i += 1
+
+        common.parent_map = {c: p for p in root.iter() for c in p}
+        _reset_document()
+
+    with stats.stage("stylesheet"):
+        common.style_map = stylesheet.compute_styles(root, common.parent_map)
+    stats.count("nodes", i)
 
     # Setup utils
 
@@ -45,19 +743,34 @@ def convert(svg_path, usd_stage, svg_str=None):
     )
     os.makedirs(conversion_context["texture_directory"], exist_ok=True)
 
-    if conversion_options["up_axis"] == "x":
-        utils.convert_position = utils.convert_position_x
-    elif conversion_options["up_axis"] == "y":
-        utils.convert_position = utils.convert_position_y
-    elif conversion_options["up_axis"] == "z":
-        utils.convert_position = utils.convert_position_z
+    _set_up_axis()
 
     if "width" in root.attrib:
         conversion_context["document_width"] = root.attrib["width"]
     if "height" in root.attrib:
         conversion_context["document_height"] = root.attrib["height"]
 
-    common.preprocess_svg_root(usd_stage, root)
-    common.handle_svg_root(usd_stage, root)
+    return root
 
-    return usd_stage
+
+def _reset_document():
+    """ Clear the state the converter builds up while converting. """
+    common.converted_subtrees = set()
+    common.extent_map = {}
+    common.bake_map = {}
+    common.prototype_map = {}
+    common.gradient_map = {}
+    common.image_map = {}
+    common.pattern_map = {}
+    common.culled_map = {}
+    payloads.written = []
+    budgets.reset()
+
+
+def _set_up_axis():
+    if conversion_options["up_axis"] == "x":
+        utils.convert_position = utils.convert_position_x
+    elif conversion_options["up_axis"] == "y":
+        utils.convert_position = utils.convert_position_y
+    elif conversion_options["up_axis"] == "z":
+        utils.convert_position = utils.convert_position_z
@@ -11,19 +11,51 @@ conversion_options = {
     "convert_group": True,
     "convert_line": True,
     "convert_image": True,
+    "convert_use": True,
     "transform_group": True,
+    "bake_transforms": False, # Bake group and element transforms into the points
     "fallback_font": "",
     "text_type": "schema", # schema(PreliminaryText), geometry(Outline)
+    "text_instancing": False, # Geometry text as PointInstancers of glyph meshes shared per font
 
     "actual_width": 1,
     "actual_height": 1,
     "up_axis": "y",
     "curve_resolution": 32,
+    "curve_tolerance": 0.1, # Largest distance of flattened path curves and arcs from the true curves
+    "simplify_tolerance": 0.0, # 0 disables, drops path, polygon and polyline vertices this close to the simplified outline
+    "extrude_depth": 0.0, # 0 disables, extrudes filled shapes into solids this deep
+    "stroke_to_mesh": False, # Tessellate strokes into outline meshes instead of curves
+    "weld_points": False, # Weld coincident mesh points and drop unused ones. Vertex-fetch order (points renumbered by first use); faces are not reordered
+    "quantize_grid": 0.0, # 0 disables, snaps mesh and curve points to multiples of this
+    "gradient_texture_min_points": 0, # 0 disables, meshes with at least this many points get gradients as a texture
+    "gradient_texture_size": 256,
+    "shard_by": None, # None, group(top-level <g>), count
+    "shard_size": 1000,
+    "shard_workers": 0, # 0 uses every core
+    "stream_chunk_size": 0, # 0 disables, convert_new saves and releases chunk sublayers of about this many elements
+    "payload_min_prims": 0, # 0 disables, groups with at least this many descendants become payloads
+    "payload_min_vertices": 0, # 0 disables, groups with at least this many points become payloads
+    "async_workers": 0, # 0 uses every core, documents convert_new_async converts at once
+    "progress_interval": 0.1, # Seconds between two calls of the progress callback
+    "cull_viewport": False, # Skip elements whose bounds are outside the document viewport
+    "cull_min_area": 0.0, # 0 disables, skips elements whose bounds cover fewer square pixels
+    "cull_invisible": False, # Skip hidden, fully transparent and unpainted elements instead of converting them
+    "element_max_vertices": 0, # 0 disables, paths, polygons and polylines with more flattened vertices fall back
+    "element_max_subpaths": 0, # 0 disables, paths with more subpaths fall back
+    "element_max_seconds": 0.0, # 0 disables, elements still tessellating after this long fall back
+    "document_max_vertices": 0, # 0 disables, elements converted once the document has this many points fall back
+    "document_max_seconds": 0.0, # 0 disables, elements converted this long after parsing fall back
+    "budget_fallback": "curves", # curves(outline BasisCurves), bbox(bounding quad), skip
 
 }
 
 conversion_context = {
     "document_width": 1,
     "document_height": 1,
-    "working_directory": ""
+    "working_directory": "",
+    "stats": None,
+    "write_textures": True,
+    "cancel": None, # Checked between elements, anything with is_set()
+    "progress": None, # progress.Progress of the running conversion
 }
@@ -0,0 +1,223 @@
+""" Complexity budgets for pathological documents.
+
+A broken or hostile document can hold a single path with thousands of
+subpaths, whose holes are bridged in quadratic time. Budgets bound the work
+spent on one element and on the whole document:
+
+- ``element_max_vertices`` and ``element_max_subpaths`` are checked once a
+  path, polygon or polyline is flattened,
+- ``element_max_seconds`` is checked while an element is tessellated, at
+  every subpath and every character,
+- ``document_max_vertices`` and ``document_max_seconds`` are checked before
+  each element, against the points authored and the time spent since the
+  document was parsed.
+
+An element over budget is converted the ``budget_fallback`` way instead:
+``"curves"`` authors its outline as linear ``BasisCurves``, which costs one
+pass over its vertices, ``"bbox"`` a quad covering its bounds and
+``"skip"`` nothing at all. Elements over a vertex budget, and elements
+without an outline such as text, get the quad rather than curves, text
+without cheap bounds is skipped.
+
+Every fallback is appended to ``exceeded`` as a dict with the ``element``
+id, ``tag``, ``budget``, ``value``, ``limit`` and ``fallback``, logged as a
+warning carrying the same dict as its ``budget`` attribute, and counted as
+``budget_<budget>`` in the statistics.
+"""
+import logging
+import time
+
+import numpy as np
+
+from pxr import UsdGeom, Vt
+
+from . import registry, svgpath, utils, culling
+from . import conversion_options
+from . import stats as conversion_stats
+
+# Structured warnings of the running conversion, see the module documentation
+exceeded = []
+
+# Deadline of the element being converted, None without element_max_seconds
+_deadline = None
+_document_start = 0.0
+_document_vertices = 0
+# Document budgets already warned about
+_warned = set()
+
+
+class BudgetExceeded(Exception):
+    """ Raised by a converter when its element goes over a budget. """
+
+    def __init__(self, budget, value, limit):
+        super().__init__("{} {} > {}".format(budget, value, limit))
+        self.budget = budget
+        self.value = value
+        self.limit = limit
+
+
+def reset():
+    """ Start the budgets of a new document. """
+    global exceeded, _deadline, _document_start, _document_vertices, _warned
+    exceeded = []
+    _warned = set()
+    _deadline = None
+    _document_start = time.perf_counter()
+    _document_vertices = 0
+
+
+def check_time():
+    """ Called by long running converters between units of work. """
+    if _deadline is not None and time.perf_counter() > _deadline:
+        limit = conversion_options["element_max_seconds"]
+        seconds = time.perf_counter() - (_deadline - limit)
+        raise BudgetExceeded("seconds", round(seconds, 3), limit)
+
+
+def check_path(svg_path):
+    """ Check the flattened ``svgpath.Path`` of an element. """
+    max_subpaths = conversion_options["element_max_subpaths"]
+    if max_subpaths and len(svg_path.offsets) - 1 > max_subpaths:
+        raise BudgetExceeded("subpaths", len(svg_path.offsets) - 1, max_subpaths)
+    check_points(svg_path.vertices)
+
+
+def check_points(svg_points):
+    """ Check the flattened (N, 2) points of an element. """
+    max_vertices = conversion_options["element_max_vertices"]
+    if max_vertices and len(svg_points) > max_vertices:
+        raise BudgetExceeded("vertices", len(svg_points), max_vertices)
+
+
+def _document_budget():
+    max_vertices = conversion_options["document_max_vertices"]
+    if max_vertices and _document_vertices >= max_vertices:
+        return BudgetExceeded("document_vertices", _document_vertices, max_vertices)
+    max_seconds = conversion_options["document_max_seconds"]
+    if max_seconds:
+        seconds = time.perf_counter() - _document_start
+        if seconds >= max_seconds:
+            return BudgetExceeded("document_seconds", round(seconds, 3), max_seconds)
+    return None
+
+
+def convert(convert_element, usd_stage, prim_path, svg_element):
+    """
+    Run the converter ``convert_element`` on ``svg_element`` within the
+    budgets, and author the fallback if it goes over one.
+    """
+    global _deadline, _document_vertices
+
+    tag = registry.local_name(svg_element.tag)
+    budget = None
+    if tag in culling.shape_bounds or tag == "text":
+        budget = _document_budget()
+
+    if budget is None:
+        max_seconds = conversion_options["element_max_seconds"]
+        if max_seconds:
+            _deadline = time.perf_counter() + max_seconds
+        try:
+            usd_prim = convert_element(usd_stage, prim_path, svg_element)
+        except BudgetExceeded as e:
+            # Drop whatever the converter authored before giving up.
+            usd_stage.RemovePrim(prim_path)
+            budget = e
+        finally:
+            _deadline = None
+
+    if budget is None:
+        if conversion_options["document_max_vertices"] and usd_prim:
+            _document_vertices += conversion_stats.count_geometry(usd_prim.GetPrim())[0]
+        return usd_prim
+    return _fall_back(usd_stage, prim_path, svg_element, tag, budget)
+
+
+def _fall_back(usd_stage, prim_path, svg_element, tag, budget):
+    global _document_vertices
+
+    fallback = conversion_options["budget_fallback"]
+    if fallback == "curves" and (
+        tag not in ("path", "polygon", "polyline") or "vertices" in budget.budget
+    ):
+        fallback = "bbox"
+
+    usd_prim = None
+    if fallback == "curves":
+        usd_prim = _author_curves(usd_stage, prim_path, svg_element, tag)
+    elif fallback == "bbox":
+        usd_prim = _author_box(usd_stage, prim_path, svg_element, tag)
+    if usd_prim is None:
+        fallback = "skip"
+    elif conversion_options["document_max_vertices"]:
+        _document_vertices += len(usd_prim.GetPointsAttr().Get() or [])
+
+    record = {
+        "element": utils.get_id(svg_element),
+        "tag": tag,
+        "budget": budget.budget,
+        "value": budget.value,
+        "limit": budget.limit,
+        "fallback": fallback,
+    }
+    exceeded.append(record)
+    conversion_stats.current().count("budget_" + budget.budget)
+
+    # Once the document is over budget every element is, warn only once.
+    if budget.budget not in _warned:
+        if budget.budget.startswith("document"):
+            _warned.add(budget.budget)
+        logging.warning(
+            "{} {} is over its {} budget ({} > {}), fallback: {}".format(
+                tag, record["element"], budget.budget, budget.value, budget.limit, fallback
+            ),
+            extra={"budget": record},
+        )
+    return usd_prim
+
+
+def _author_curves(usd_stage, prim_path, svg_element, tag):
+    """ The outline of a path, polygon or polyline as linear curves. """
+    element_attributes = utils.parse_attributes(svg_element)
+    if tag == "path":
+        polygons = svgpath.parse(element_attributes.get("d", "")).to_polygons(
+            closed_only=False
+        )
+    else:
+        points = svgpath.parse_points(element_attributes.get("points", ""))
+        if tag == "polygon" and len(points):
+            points = np.concatenate([points, points[:1]])
+        polygons = [points] if len(points) else []
+    if not polygons:
+        return None
+
+    usd_curves = UsdGeom.BasisCurves.Define(usd_stage, prim_path)
+    utils.handle_geom_attrs(svg_element, usd_curves)
+    utils.author_curves(
+        usd_curves,
+        utils.convert_positions(np.concatenate(polygons)),
+        [len(p) for p in polygons],
+    )
+    usd_curves.CreateTypeAttr().Set(UsdGeom.Tokens.linear)
+    return usd_curves
+
+
+def _author_box(usd_stage, prim_path, svg_element, tag):
+    """ A quad covering the bounds of a shape, before its transform. """
+    if tag not in culling.shape_bounds:
+        return None
+    box = culling.shape_bounds[tag](utils.parse_attributes(svg_element))
+    if not culling.is_bounded(box):
+        return None
+
+    min_x, min_y, max_x, max_y = box
+    corners = [(min_x, min_y), (max_x, min_y), (max_x, max_y), (min_x, max_y)]
+    usd_mesh = UsdGeom.Mesh.Define(usd_stage, prim_path)
+    utils.handle_geom_attrs(svg_element, usd_mesh)
+    utils.author_mesh(
+        usd_mesh,
+        utils.convert_positions(corners),
+        Vt.IntArray([0, 1, 2, 3]),
+        [4],
+    )
+    return usd_mesh
@@ -1,45 +1,73 @@
 from pxr import Usd, UsdGeom, Sdf, UsdShade
 
 import logging
-import importlib
+import time
 
-from . import utils
-from .geometry import rect, circle, ellipse, path, line, text, group, polygon, polyline
-
-importlib.reload(text)
-importlib.reload(line)
-from .fills import image
-from . import conversion_options
+from . import utils, extrude, optimize, registry, shards, budgets
+from . import progress as conversion_progress
+from . import fills
+from . import conversion_options, conversion_context
+from . import stats as conversion_stats
 
 # TODO: Handle this better
 parent_map = {}
 
 image_map = {}  # image_id -> usd_material
 pattern_map = {}  # pattern_id -> image_id
+converted_subtrees = set()  # svg elements whose children are already converted
+extent_map = {}  # prim path -> Gf.Range3d local bounds
+bake_map = {}  # prim path -> baked world matrix (numpy, row vectors)
+style_map = {}  # svg element -> (declarations, important) from <style> rules
+id_map = {}  # svg id -> svg element
+prototype_map = {}  # (root layer identifier, svg id or glyph name) -> prototype prim path
+gradient_map = {}  # gradient id -> gradient.Gradient
+culled_map = {}  # svg element -> reason its subtree is not converted, see culling
 
 
 def preprocess_element(usd_stage, svg_element, parent_prim=None):
 
     svg_id = utils.get_id(svg_element)
+    tag = registry.local_name(svg_element.tag)
 
     prim_path = "{}".format(svg_id)
 
-    if "image" in svg_element.tag and conversion_options["convert_image"]:
+    if tag == "image" and conversion_options["convert_image"]:
         prim_path = Sdf.Path("/materials/" + prim_path)
-        usd_material = image.convert(usd_stage, prim_path, svg_element)
+        usd_material = fills.image.convert(usd_stage, prim_path, svg_element)
         image_map[svg_id] = usd_material
 
-    if "pattern" in svg_element.tag and conversion_options["convert_image"]:
+    if tag == "pattern" and conversion_options["convert_image"]:
         if len(svg_element) > 0:
             if "{http://www.w3.org/1999/xlink}href" in svg_element[0].attrib:
                 image_id = svg_element[0].attrib["{http://www.w3.org/1999/xlink}href"]
                 pattern_map[svg_id] = image_id[1:]
 
+    if tag in ("linearGradient", "radialGradient"):
+        fills.gradient.preprocess(svg_element)
+
+
+class ConversionCancelled(Exception):
+    """ Raised between elements once a conversion has been cancelled. """
+
+
+def check_cancelled():
+    cancel = conversion_context["cancel"]
+    if cancel is not None and cancel.is_set():
+        raise ConversionCancelled()
+    progress = conversion_progress.current()
+    if progress is not None and progress.cancelled:
+        raise ConversionCancelled()
+
 
 def handle_element(usd_stage, svg_element, parent_prim=None):
     global parent_map
 
-    if "clipPath" in parent_map[svg_element].tag:
+    progress = conversion_progress.current()
+    if progress is not None:
+        progress.advance(svg_element)
+    check_cancelled()
+
+    if registry.local_name(parent_map[svg_element].tag) == "clipPath":
         return
 
     element_attributes = utils.parse_attributes(svg_element)
@@ -64,10 +92,11 @@ def handle_element(usd_stage, svg_element, parent_prim=None):
     #         _visible = False
 
     svg_id = utils.get_id(svg_element)
+    tag = registry.local_name(svg_element.tag)
 
     prim_path = "{}".format(svg_id)
     # Adding a text prefix because the return value could be a number.
-    if svg_element.tag.rpartition("}")[-1] == "text" and "id" not in svg_element.attrib:
+    if tag == "text" and "id" not in svg_element.attrib:
         prim_path = "text_{}".format(prim_path)
 
     if parent_prim:
@@ -78,45 +107,41 @@ def handle_element(usd_stage, svg_element, parent_prim=None):
     logging.debug("Prim path: {}".format(prim_path))
     usd_mesh = None
 
-    if "rect" in svg_element.tag and conversion_options["convert_rect"]:
-        usd_mesh = rect.convert(usd_stage, prim_path, svg_element)
-    if "ellipse" in svg_element.tag and conversion_options["convert_ellipse"]:
-        usd_mesh = ellipse.convert(usd_stage, prim_path, svg_element)
-    if "circle" in svg_element.tag and conversion_options["convert_circle"]:
-        usd_mesh = circle.convert(usd_stage, prim_path, svg_element)
-    if "path" in svg_element.tag and conversion_options["convert_path"]:
-        usd_mesh = path.convert(usd_stage, prim_path, svg_element)
-    if "polygon" in svg_element.tag and conversion_options["convert_polygon"]:
-        usd_mesh = polygon.convert(usd_stage, prim_path, svg_element)
-    if "polyline" in svg_element.tag and conversion_options["convert_polyline"]:
-        usd_mesh = polyline.convert(usd_stage, prim_path, svg_element)
-    if (
-        svg_element.tag.rpartition("}")[-1] == "line"
-        and conversion_options["convert_line"]
-    ):
-        usd_mesh = line.convert(usd_stage, prim_path, svg_element)
-    if (
-        svg_element.tag.rpartition("}")[-1] == "text"
-        and conversion_options["convert_text"]
-    ):
-        usd_mesh = text.convert(
-            usd_stage,
-            prim_path,
-            svg_element,
-            fallback_font=conversion_options["fallback_font"],
-            type=conversion_options["text_type"],
-        )
-    if (
-        svg_element.tag.rpartition("}")[-1] == "g"
-        and conversion_options["convert_group"]
-    ):
-        usd_mesh = group.convert(usd_stage, prim_path, svg_element)
+    stats = conversion_stats.current()
+    if stats.enabled:
+        start = time.perf_counter()
+
+    convert = registry.lookup(svg_element)
+    if convert is not None:
+        usd_mesh = budgets.convert(convert, usd_stage, prim_path, svg_element)
 
     if not usd_mesh:
         # Something has failed in generation, or unsupported svg element
         logging.debug(f"SVG tag '{svg_element.tag}' unsupported")
+        stats.count("skipped")
         return
 
+    if gradient_map and "fill" in element_attributes:
+        # Needs the points, so runs once the element is converted.
+        with stats.stage("gradients"):
+            fills.gradient.apply(usd_mesh, element_attributes["fill"])
+
+    extrude.apply(usd_mesh, svg_element, element_attributes)
+
+    if conversion_options["bake_transforms"]:
+        with stats.stage("bake"):
+            utils.bake_transforms(usd_mesh)
+
+    optimize.apply(usd_mesh)
+
+    if stats.enabled:
+        stats.record_element(
+            tag,
+            svg_id,
+            time.perf_counter() - start,
+            usd_mesh,
+        )
+
     # TODO: Handle visibility properly
     if "visibility" in element_attributes:
         if element_attributes["visibility"] == "hidden":
@@ -141,7 +166,25 @@ def preprocess_svg_root(stage, root, parent_prim=None):
         preprocess_svg_root(stage, elem, None)
 
 
+def is_definition(svg_element):
+    # Only converted when referenced, see prototypes.get_prototype
+    return registry.local_name(svg_element.tag) in ("defs", "symbol")
+
+
+def handle_subtree(stage, elem, parent_prim=None):
+    usd_prim = handle_element(stage, elem, parent_prim)
+    if elem not in converted_subtrees:
+        handle_svg_root(stage, elem, usd_prim)
+    if usd_prim and usd_prim.GetPrim().IsA(UsdGeom.Xform):
+        utils.rollup_extents_hint(usd_prim)
+    return usd_prim
+
+
 def handle_svg_root(stage, root, parent_prim=None):
     for elem in root:
-        usd_prim = handle_element(stage, elem, parent_prim)
-        handle_svg_root(stage, elem, usd_prim)
+        if is_definition(elem) or elem in culled_map:
+            progress = conversion_progress.current()
+            if progress is not None:
+                progress.advance(elem, shards.subtree_size(elem))
+            continue
+        handle_subtree(stage, elem, parent_prim)
@@ -0,0 +1,327 @@
+""" Culling of elements that would not be seen.
+
+Before anything is tessellated, ``cull`` estimates the bounds of every
+element from its attributes alone: the geometry attributes of the basic
+shapes, the control points of paths, the stroke width and the transforms
+of the element and its ancestors. Elements are then skipped, together with
+their subtree, if
+
+- ``cull_viewport`` is set and their bounds are outside the viewport, the
+  ``viewBox`` or else ``width`` and ``height`` of the document,
+- ``cull_min_area`` is set and their bounds cover fewer square pixels,
+  pixels of the document ``width`` and ``height``,
+- ``cull_invisible`` is set and they are not displayed, fully transparent,
+  hidden or painted neither with a fill nor with a stroke.
+
+Bounds are never smaller than what a renderer would draw, so nothing
+visible is culled. Text, ``<use>`` and elements of custom converters have
+no cheap bounds, they and their ancestor groups are never culled by their
+bounds. Elements referenced by a ``<use>`` are converted as a whole where
+they are instanced, nothing below them is culled.
+"""
+import logging
+import math
+
+from . import registry, svgpath, stroke, utils, common
+from . import conversion_options
+from . import stats as conversion_stats
+
+_EMPTY = (math.inf, math.inf, -math.inf, -math.inf)
+_UNKNOWN = (-math.inf, -math.inf, math.inf, math.inf)
+
+# Presentation attributes inherited by children, that culling looks at.
+_INHERITED = (
+    "fill",
+    "stroke",
+    "stroke-width",
+    "stroke-linejoin",
+    "stroke-linecap",
+    "stroke-miterlimit",
+    "visibility",
+)
+
+# Pixels per unit of the absolute CSS lengths
+_UNITS = {"px": 1.0, "in": 96.0, "cm": 96.0 / 2.54, "mm": 9.6 / 2.54, "pt": 4.0 / 3.0, "pc": 16.0}
+
+
+def enabled():
+    return bool(
+        conversion_options["cull_viewport"]
+        or conversion_options["cull_min_area"]
+        or conversion_options["cull_invisible"]
+    )
+
+
+def _float(attributes, name, default=0.0):
+    try:
+        return float(attributes[name])
+    except (KeyError, ValueError):
+        return default
+
+
+def length(value):
+    """ An absolute SVG length in pixels, None for relative lengths. """
+    value = value.strip()
+    number = value.rstrip("abcdefghijklmnopqrstuvwxyz%")
+    unit = value[len(number) :] or "px"
+    if unit not in _UNITS:
+        return None
+    try:
+        return float(number) * _UNITS[unit]
+    except ValueError:
+        return None
+
+
+def viewport(root):
+    """
+    The viewport of the document in user units and the area of a user unit
+    in square pixels.
+
+    Returns
+    -------
+    (box, pixel_area) : tuple
+        ``box`` is ``(min_x, min_y, max_x, max_y)``, or None if the document
+        does not set its size.
+    """
+    width = length(root.attrib.get("width", ""))
+    height = length(root.attrib.get("height", ""))
+    view_box = [float(v) for v in svgpath._NUMBER_RE.findall(root.attrib.get("viewBox", ""))]
+
+    if len(view_box) != 4 or view_box[2] <= 0.0 or view_box[3] <= 0.0:
+        if width is None or height is None:
+            return None, 1.0
+        return (0.0, 0.0, width, height), 1.0
+
+    min_x, min_y, view_width, view_height = view_box
+    if width is None or height is None:
+        return (min_x, min_y, min_x + view_width, min_y + view_height), 1.0
+
+    scale_x, scale_y = width / view_width, height / view_height
+    aspect = root.attrib.get("preserveAspectRatio", "xMidYMid").split()
+    if aspect[0] == "none":
+        return (min_x, min_y, min_x + view_width, min_y + view_height), scale_x * scale_y
+    if aspect[-1] == "slice":
+        scale = max(scale_x, scale_y)
+        return (min_x, min_y, min_x + view_width, min_y + view_height), scale * scale
+
+    # Letterboxed, the viewport shows more than the viewBox along one axis.
+    # Extending both sides by the difference holds for every alignment.
+    scale = min(scale_x, scale_y)
+    extra_x, extra_y = width / scale - view_width, height / scale - view_height
+    box = (
+        min_x - extra_x,
+        min_y - extra_y,
+        min_x + view_width + extra_x,
+        min_y + view_height + extra_y,
+    )
+    return box, scale * scale
+
+
+def _rect_bounds(attributes):
+    x, y = _float(attributes, "x"), _float(attributes, "y")
+    return (x, y, x + _float(attributes, "width", 1.0), y + _float(attributes, "height", 1.0))
+
+
+def _circle_bounds(attributes):
+    x, y, r = _float(attributes, "cx"), _float(attributes, "cy"), abs(_float(attributes, "r"))
+    return (x - r, y - r, x + r, y + r)
+
+
+def _ellipse_bounds(attributes):
+    x, y = _float(attributes, "cx"), _float(attributes, "cy")
+    rx, ry = abs(_float(attributes, "rx")), abs(_float(attributes, "ry"))
+    return (x - rx, y - ry, x + rx, y + ry)
+
+
+def _line_bounds(attributes):
+    x1, y1 = _float(attributes, "x1"), _float(attributes, "y1")
+    x2, y2 = _float(attributes, "x2"), _float(attributes, "y2")
+    return (min(x1, x2), min(y1, y2), max(x1, x2), max(y1, y2))
+
+
+def _points_bounds(attributes):
+    points = svgpath.parse_points(attributes.get("points", ""))
+    if not len(points):
+        return _EMPTY
+    return tuple(points.min(axis=0).tolist() + points.max(axis=0).tolist())
+
+
+def _path_bounds(attributes):
+    return svgpath.bounds(attributes.get("d", "")) or _EMPTY
+
+
+# Functions of the parsed attributes of a shape returning its local bounds,
+# before stroke and transform
+shape_bounds = {
+    "rect": _rect_bounds,
+    "circle": _circle_bounds,
+    "ellipse": _ellipse_bounds,
+    "line": _line_bounds,
+    "polygon": _points_bounds,
+    "polyline": _points_bounds,
+    "path": _path_bounds,
+}
+
+
+def _is_empty(box):
+    return box[0] > box[2] or box[1] > box[3]
+
+
+def is_bounded(box):
+    """ True for a non-empty box with finite corners. """
+    return not _is_empty(box) and all(math.isfinite(v) for v in box)
+
+
+def _union(a, b):
+    return (min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3]))
+
+
+def _pad(box, padding):
+    return (box[0] - padding, box[1] - padding, box[2] + padding, box[3] + padding)
+
+
+def _transform_box(box, affine):
+    if not is_bounded(box) or affine == utils.IDENTITY_AFFINE:
+        return box
+    a, b, c, d, e, f = affine
+    xs = [a * x + c * y + e for x in (box[0], box[2]) for y in (box[1], box[3])]
+    ys = [b * x + d * y + f for x in (box[0], box[2]) for y in (box[1], box[3])]
+    return (min(xs), min(ys), max(xs), max(ys))
+
+
+def _opacity(attributes):
+    value = attributes.get("opacity", "1").strip()
+    try:
+        if value.endswith("%"):
+            return float(value[:-1]) / 100.0
+        return float(value)
+    except ValueError:
+        return 1.0
+
+
+def _stroke_padding(attributes):
+    """ How far the stroke of a shape reaches past its outline. """
+    style = stroke.stroke_style(attributes)
+    if style is None:
+        return 0.0
+    reach = math.sqrt(2.0) if style["cap"] == "square" else 1.0
+    if style["join"] == "miter":
+        reach = max(reach, style["miter_limit"])
+    return 0.5 * style["width"] * reach
+
+
+def _is_skipped(svg_element):
+    # Not converted in place, or not converted at all.
+    return common.is_definition(svg_element) or (
+        registry.local_name(svg_element.tag) == "clipPath"
+    )
+
+
+def _measure(svg_element, affine, inherited, records):
+    """
+    World bounds of ``svg_element`` and its subtree, recording them with the
+    reason it is invisible, if any, in ``records``.
+    """
+    tag = registry.local_name(svg_element.tag)
+    attributes = utils.parse_attributes(svg_element)
+
+    painting = dict(inherited)
+    for name in _INHERITED:
+        if name in attributes:
+            painting[name] = attributes[name]
+
+    if "transform" in attributes:
+        affine = utils._multiply_affine(affine, utils.parse_transform(attributes["transform"]))
+
+    invisible = attributes.get("display") == "none" or _opacity(attributes) <= 0.0
+
+    if tag == "g" or (registry.entry(tag) is None and tag != "svg"):
+        box = _EMPTY
+        for child in svg_element:
+            if not _is_skipped(child):
+                box = _union(box, _measure(child, affine, painting, records))
+    elif tag in shape_bounds or tag == "text":
+        if painting.get("visibility") in ("hidden", "collapse"):
+            invisible = True
+        if painting.get("fill") == "none" and stroke.stroke_style(painting) is None:
+            invisible = True
+        box = _UNKNOWN
+        if tag in shape_bounds:
+            box = shape_bounds[tag](attributes)
+            if is_bounded(box):
+                box = _transform_box(_pad(box, _stroke_padding(painting)), affine)
+    else:
+        # Nested documents, use references and custom converters
+        box = _UNKNOWN
+
+    records[svg_element] = (box, invisible)
+    if invisible and conversion_options["cull_invisible"]:
+        return _EMPTY
+    return box
+
+
+def _reason(record, view, pixel_area):
+    box, invisible = record
+    if invisible and conversion_options["cull_invisible"]:
+        return "invisible"
+    if not is_bounded(box):
+        return None
+    if conversion_options["cull_viewport"] and view is not None:
+        if box[0] > view[2] or box[2] < view[0] or box[1] > view[3] or box[3] < view[1]:
+            return "viewport"
+    min_area = conversion_options["cull_min_area"]
+    if min_area:
+        if (box[2] - box[0]) * (box[3] - box[1]) * pixel_area < min_area:
+            return "size"
+    return None
+
+
+def cull(root):
+    """
+    Find the elements of the document ``root`` not worth converting, see the
+    module documentation.
+
+    Returns
+    -------
+    culled : dict
+        svg element -> ``"viewport"``, ``"size"`` or ``"invisible"``, for the
+        roots of the culled subtrees.
+    """
+    culled = {}
+    if not enabled():
+        return culled
+
+    view, pixel_area = viewport(root)
+    records = {}
+    for child in root:
+        if not _is_skipped(child):
+            _measure(child, utils.IDENTITY_AFFINE, {}, records)
+
+    referenced = set()
+    for svg_element in root.iter():
+        if registry.local_name(svg_element.tag) == "use":
+            href = svg_element.attrib.get(
+                "{http://www.w3.org/1999/xlink}href", svg_element.attrib.get("href", "")
+            )
+            if href.startswith("#") and href[1:] in common.id_map:
+                referenced.add(common.id_map[href[1:]])
+
+    stats = conversion_stats.current()
+
+    def visit(parent):
+        for svg_element in parent:
+            record = records.get(svg_element)
+            if record is None:
+                continue
+            if registry.entry(registry.local_name(svg_element.tag)) is not None:
+                reason = _reason(record, view, pixel_area)
+                if reason:
+                    culled[svg_element] = reason
+                    stats.count("culled_" + reason)
+                    continue
+            if svg_element not in referenced:
+                visit(svg_element)
+
+    visit(root)
+    logging.debug("Culled {} element subtrees".format(len(culled)))
+    return culled
@@ -0,0 +1,142 @@
+""" Extrusion of filled shapes into closed solids.
+
+With ``extrude_depth`` set, or a ``data-extrude-depth`` attribute on the
+element, the meshes of paths, polygons, rects, circles, ellipses and
+geometry text are extruded away from the viewer, along the opposite of the
+drawing plane normal. The existing faces are the front cap and, reversed,
+the back cap. Side walls are built for every boundary edge of the caps,
+found with index arithmetic over all faces at once: an edge whose reverse
+is also in the mesh, like the bridge edges joining holes to their outer
+contour, is interior and gets no wall.
+
+Normals are authored per face, so every edge is hard.
+"""
+import logging
+
+import numpy as np
+
+from pxr import Usd, UsdGeom, Vt
+
+from . import utils, conversion_options
+from . import stats as conversion_stats
+
+EXTRUDED_TAGS = ("path", "polygon", "rect", "circle", "ellipse", "text")
+
+
+def extrude_depth(svg_element, element_attributes):
+    """ Extrusion depth of an element, 0 when it is not extruded. """
+    if svg_element.tag.rpartition("}")[-1] not in EXTRUDED_TAGS:
+        return 0.0
+    depth = element_attributes.get("data-extrude-depth")
+    if depth is None:
+        return conversion_options["extrude_depth"]
+    try:
+        return float(depth.replace("px", ""))
+    except ValueError:
+        logging.warning("Invalid data-extrude-depth '{}'".format(depth))
+        return conversion_options["extrude_depth"]
+
+
+def apply(usd_prim, svg_element, element_attributes):
+    """ Extrude every mesh authored for ``svg_element``. """
+    depth = extrude_depth(svg_element, element_attributes)
+    if depth <= 0.0:
+        return
+    with conversion_stats.current().stage("extrude"):
+        for prim in Usd.PrimRange(usd_prim.GetPrim()):
+            if prim.IsA(UsdGeom.Mesh):
+                extrude_mesh(UsdGeom.Mesh(prim), depth)
+
+
+def _face_layout(fvc, num_indices):
+    starts = np.cumsum(fvc) - fvc
+    face = np.repeat(np.arange(len(fvc)), fvc)
+    local = np.arange(num_indices) - starts[face]
+    # Position of the next corner of the same face.
+    following = np.arange(1, num_indices + 1)
+    following[starts + fvc - 1] = starts
+    reverse = starts[face] + fvc[face] - 1 - local
+    return face, following, reverse
+
+
+def extrude_mesh(usd_mesh, depth):
+    points = np.asarray(usd_mesh.GetPointsAttr().Get(), dtype=np.float64).reshape(-1, 3)
+    fvi = np.asarray(usd_mesh.GetFaceVertexIndicesAttr().Get(), dtype=np.int64)
+    fvc = np.asarray(usd_mesh.GetFaceVertexCountsAttr().Get(), dtype=np.int64)
+    num_points = len(points)
+    if num_points == 0 or len(fvc) == 0:
+        return
+
+    basis = utils.position_basis()
+    front = -np.cross(basis[0], basis[1])
+    face, following, reverse = _face_layout(fvc, len(fvi))
+
+    # - Front cap: the existing faces, all wound to face the front
+    svg_points = points @ basis.T
+    x, y = svg_points[fvi, 0], svg_points[fvi, 1]
+    area = np.add.reduceat(x * y[following] - x[following] * y, np.cumsum(fvc) - fvc)
+    fvi = np.where((area > 0.0)[face], fvi[reverse], fvi)
+
+    # - Back cap: the same faces reversed, on the offset copy of the points
+    back_fvi = fvi[reverse] + num_points
+
+    # - Walls on boundary edges, interior edges come in both directions
+    edge_a = fvi
+    edge_b = fvi[following]
+    boundary = (edge_a != edge_b) & ~np.isin(
+        edge_a * num_points + edge_b, edge_b * num_points + edge_a
+    )
+    edge_a, edge_b = edge_a[boundary], edge_b[boundary]
+    wall_fvi = np.stack(
+        [edge_b, edge_a, edge_a + num_points, edge_b + num_points], axis=1
+    ).ravel()
+
+    # - Hard normals, one per face
+    direction = points[edge_b] - points[edge_a]
+    wall_normals = np.cross(direction, front)
+    lengths = np.linalg.norm(wall_normals, axis=1)
+    wall_normals /= np.where(lengths > 0.0, lengths, 1.0)[:, None]
+    normals = np.concatenate(
+        [np.tile(front, (len(fvc), 1)), np.tile(-front, (len(fvc), 1)), wall_normals]
+    )
+
+    face_map = np.concatenate([np.arange(len(fvc)), np.arange(len(fvc)), face[boundary]])
+    new_fvc = np.concatenate([fvc, fvc, np.full(len(edge_a), 4)])
+    new_fvi = np.concatenate([fvi, back_fvi, wall_fvi])
+    new_points = np.concatenate([points, points - depth * front])
+
+    _extend_primvars(usd_mesh, num_points, face_map)
+
+    utils.author_mesh(
+        usd_mesh,
+        new_points,
+        Vt.IntArray.FromNumpy(new_fvi.astype(np.int32)),
+        Vt.IntArray.FromNumpy(new_fvc.astype(np.int32)),
+    )
+    usd_mesh.CreateNormalsAttr().Set(Vt.Vec3fArray.FromNumpy(normals.astype(np.float32)))
+    usd_mesh.SetNormalsInterpolation(UsdGeom.Tokens.uniform)
+
+
+def _extend_primvars(usd_mesh, num_points, face_map):
+    """ Carry per point and per face primvars over to the extruded mesh. """
+    num_faces = len(usd_mesh.GetFaceVertexCountsAttr().Get())
+    for primvar in UsdGeom.PrimvarsAPI(usd_mesh).GetPrimvars():
+        interpolation = primvar.GetInterpolation()
+        if interpolation == UsdGeom.Tokens.constant or primvar.IsIndexed():
+            continue
+        values = primvar.Get()
+        if values is None:
+            continue
+        if interpolation in (UsdGeom.Tokens.vertex, UsdGeom.Tokens.varying):
+            if len(values) == num_points:
+                primvar.Set(utils.take(values, np.tile(np.arange(num_points), 2)))
+        elif interpolation == UsdGeom.Tokens.uniform:
+            if len(values) == num_faces:
+                primvar.Set(utils.take(values, face_map))
+        else:
+            logging.warning(
+                "Dropping {} primvar {} on extruded mesh".format(
+                    interpolation, primvar.GetName()
+                )
+            )
+            usd_mesh.GetPrim().RemoveProperty(primvar.GetName())
@@ -0,0 +1,10 @@
+""" Fills referenced by elements, imported on first use. """
+import importlib
+
+MODULES = ("gradient", "image")
+
+
+def __getattr__(name):
+    if name in MODULES:
+        return importlib.import_module("." + name, __name__)
+    raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
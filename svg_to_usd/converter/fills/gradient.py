@@ -0,0 +1,303 @@
+""" Linear and radial gradient fills.
+
+Gradients are parsed once during preprocessing into ``common.gradient_map``.
+A mesh filled with one gets a vertex interpolated ``displayColor`` (and
+``displayOpacity`` when a stop is translucent), evaluated for all of its
+points at once. Meshes with at least ``gradient_texture_min_points`` points
+get the gradient baked into a texture over their bounds instead, with ``st``
+coordinates, so the vertex count does not limit its resolution.
+"""
+import logging
+import re
+
+import numpy as np
+
+from pxr import Sdf, UsdGeom, UsdShade, Vt
+
+from .. import common, utils, conversion_context, conversion_options
+from . import image
+
+XLINK_HREF = "{http://www.w3.org/1999/xlink}href"
+
+_URL_RE = re.compile(r"url\(\s*['\"]?#([^'\")]+)['\"]?\s*\)")
+
+# Attributes a gradient inherits from the gradient it references.
+_INHERITED = (
+    "gradientUnits",
+    "gradientTransform",
+    "spreadMethod",
+    "x1",
+    "y1",
+    "x2",
+    "y2",
+    "cx",
+    "cy",
+    "r",
+    "fx",
+    "fy",
+)
+
+
+class Gradient(object):
+    """ A parsed ``<linearGradient>`` or ``<radialGradient>``. """
+
+    def __init__(self, kind, attributes, offsets, colors, opacities):
+        self.kind = kind
+        self.offsets = offsets
+        self.colors = colors
+        self.opacities = opacities
+        self.user_space = attributes.get("gradientUnits") == "userSpaceOnUse"
+        self.spread = attributes.get("spreadMethod", "pad")
+
+        # Maps user (or bounding box) space to gradient space.
+        a, b, c, d, e, f = utils.parse_transform(attributes.get("gradientTransform", ""))
+        matrix = np.array([[a, c, e], [b, d, f], [0.0, 0.0, 1.0]])
+        try:
+            self.inverse = np.linalg.inv(matrix)
+        except np.linalg.LinAlgError:
+            self.inverse = np.identity(3)
+
+        if kind == "linear":
+            self.start = np.array(
+                [_length(attributes, "x1", 0.0, 0), _length(attributes, "y1", 0.0, 1)]
+            )
+            self.end = np.array(
+                [_length(attributes, "x2", 1.0, 0), _length(attributes, "y2", 0.0, 1)]
+            )
+        else:
+            self.center = np.array(
+                [_length(attributes, "cx", 0.5, 0), _length(attributes, "cy", 0.5, 1)]
+            )
+            self.radius = _length(attributes, "r", 0.5, 0)
+            self.focus = np.array(
+                [
+                    _length(attributes, "fx", self.center[0], 0),
+                    _length(attributes, "fy", self.center[1], 1),
+                ]
+            )
+
+    @property
+    def translucent(self):
+        return bool(np.any(self.opacities < 1.0))
+
+    def parameter(self, svg_points):
+        """ Gradient parameter ``t`` of every (N, 2) point, before spreading. """
+        points = svg_points @ self.inverse[:2, :2].T + self.inverse[:2, 2]
+
+        if self.kind == "linear":
+            direction = self.end - self.start
+            length_sq = direction @ direction
+            if length_sq == 0.0:
+                return np.ones(len(points))
+            return (points - self.start) @ direction / length_sq
+
+        if self.radius <= 0.0:
+            return np.ones(len(points))
+        # Solve |p - f - t (c - f)| = t r for the circle through each point.
+        e = points - self.focus
+        g = self.center - self.focus
+        a = g @ g - self.radius * self.radius
+        eg = e @ g
+        ee = np.einsum("ij,ij->i", e, e)
+        if abs(a) < 1e-12:
+            with np.errstate(divide="ignore", invalid="ignore"):
+                t = ee / (2.0 * eg)
+            return np.nan_to_num(t, nan=0.0, posinf=1.0, neginf=0.0)
+        return (eg - np.sqrt(np.maximum(eg * eg - a * ee, 0.0))) / a
+
+    def evaluate(self, svg_points):
+        """ Colors (N, 3) and opacities (N,) of the gradient at (N, 2) points
+        given in its own units.
+        """
+        t = self.parameter(svg_points)
+        if self.spread == "repeat":
+            t = np.mod(t, 1.0)
+        elif self.spread == "reflect":
+            t = 1.0 - np.abs(np.mod(t, 2.0) - 1.0)
+        else:
+            t = np.clip(t, 0.0, 1.0)
+
+        colors = np.empty((len(t), 3))
+        for channel in range(3):
+            colors[:, channel] = np.interp(t, self.offsets, self.colors[:, channel])
+        opacities = np.interp(t, self.offsets, self.opacities)
+        return colors, opacities
+
+
+def _length(attributes, key, default, axis):
+    value = attributes.get(key)
+    if value is None:
+        return default
+    value = value.strip()
+    try:
+        if value.endswith("%"):
+            fraction = float(value[:-1]) / 100.0
+            if attributes.get("gradientUnits") != "userSpaceOnUse":
+                return fraction
+            size = ("document_width", "document_height")[axis]
+            return fraction * float(str(conversion_context[size]).rstrip("px"))
+        return float(value.rstrip("px"))
+    except ValueError:
+        return default
+
+
+def _resolve(svg_element):
+    """ Attributes and stops of a gradient, following ``href`` templates. """
+    attributes = {}
+    stops = None
+    seen = set()
+    while svg_element is not None and svg_element not in seen:
+        seen.add(svg_element)
+        for key in _INHERITED:
+            if key not in attributes and key in svg_element.attrib:
+                attributes[key] = svg_element.attrib[key]
+        if stops is None:
+            own = [c for c in svg_element if c.tag.rpartition("}")[-1] == "stop"]
+            if own:
+                stops = own
+        href = svg_element.attrib.get(XLINK_HREF, svg_element.attrib.get("href", ""))
+        svg_element = common.id_map.get(href[1:]) if href.startswith("#") else None
+    return attributes, stops or []
+
+
+def parse(svg_element):
+    """ Parse a gradient element, returns None if it has no stops. """
+    attributes, stops = _resolve(svg_element)
+    if not stops:
+        return None
+
+    offsets, colors, opacities = [], [], []
+    for stop in stops:
+        stop_attributes = utils.parse_attributes(stop)
+        offset = stop_attributes.get("offset", "0").strip()
+        try:
+            offset = float(offset[:-1]) / 100.0 if offset.endswith("%") else float(offset)
+        except ValueError:
+            offset = 0.0
+        # Offsets are clamped and never decrease.
+        offset = min(max(offset, offsets[-1] if offsets else 0.0), 1.0)
+        offsets.append(offset)
+        colors.append(list(utils.convert_color(stop_attributes.get("stop-color", "black"))))
+        try:
+            opacities.append(float(stop_attributes.get("stop-opacity", 1.0)))
+        except ValueError:
+            opacities.append(1.0)
+
+    kind = "linear" if svg_element.tag.rpartition("}")[-1] == "linearGradient" else "radial"
+    return Gradient(
+        kind, attributes, np.array(offsets), np.array(colors), np.array(opacities)
+    )
+
+
+def preprocess(svg_element):
+    if "id" not in svg_element.attrib:
+        return
+    gradient = parse(svg_element)
+    if gradient:
+        common.gradient_map[svg_element.attrib["id"]] = gradient
+
+
+def lookup(svg_fill):
+    """ The gradient a fill value references, if any. """
+    if not svg_fill or "url(" not in svg_fill:
+        return None
+    match = _URL_RE.search(svg_fill)
+    if not match:
+        return None
+    return common.gradient_map.get(match.group(1))
+
+
+def _bounds(svg_points):
+    bounds_min = svg_points.min(axis=0)
+    size = svg_points.max(axis=0) - bounds_min
+    return bounds_min, np.where(size > 0.0, size, 1.0)
+
+
+def _gradient_units(gradient, svg_points, bounds_min, size):
+    if gradient.user_space:
+        return svg_points
+    return (svg_points - bounds_min) / size
+
+
+def apply(usd_mesh, svg_fill):
+    """
+    Author the gradient referenced by ``svg_fill`` on ``usd_mesh``.
+
+    Returns True if a gradient was applied.
+    """
+    if usd_mesh.GetPrim().IsA(UsdGeom.Xform):
+        # A stroked shape, the gradient goes on its fill, see stroke.split_fill
+        usd_fill = usd_mesh.GetPrim().GetChild("fill")
+        if not usd_fill:
+            return False
+        usd_mesh = UsdGeom.Mesh(usd_fill)
+    gradient = lookup(svg_fill)
+    if gradient is None or not usd_mesh.GetPrim().IsA(UsdGeom.PointBased):
+        return False
+
+    usd_points = UsdGeom.PointBased(usd_mesh).GetPointsAttr().Get()
+    if not usd_points:
+        return False
+
+    # Points are in the plane of the up axis, back to SVG user space.
+    points = np.asarray(usd_points, dtype=np.float64).reshape(-1, 3)
+    svg_points = points @ utils.position_basis().T
+    bounds_min, size = _bounds(svg_points)
+
+    min_points = conversion_options["gradient_texture_min_points"]
+    if min_points > 0 and len(points) >= min_points and usd_mesh.GetPrim().IsA(UsdGeom.Mesh):
+        _apply_texture(usd_mesh, gradient, svg_points, bounds_min, size)
+        return True
+
+    colors, opacities = gradient.evaluate(
+        _gradient_units(gradient, svg_points, bounds_min, size)
+    )
+    usd_mesh.CreateDisplayColorPrimvar(UsdGeom.Tokens.vertex).Set(
+        Vt.Vec3fArray.FromNumpy(colors.astype(np.float32))
+    )
+    if gradient.translucent:
+        usd_mesh.CreateDisplayOpacityPrimvar(UsdGeom.Tokens.vertex).Set(
+            Vt.FloatArray.FromNumpy(opacities.astype(np.float32))
+        )
+    return True
+
+
+def _apply_texture(usd_mesh, gradient, svg_points, bounds_min, size):
+    resolution = conversion_options["gradient_texture_size"]
+
+    # Texel centers over the mesh bounds. The first image row is the top of
+    # the texture (t = 1), which st maps to the smallest SVG y.
+    u = (np.arange(resolution) + 0.5) / resolution
+    grid_x, grid_y = np.meshgrid(u, u)
+    texels = np.stack([grid_x.ravel(), grid_y.ravel()], axis=1) * size + bounds_min
+    colors, opacities = gradient.evaluate(
+        _gradient_units(gradient, texels, bounds_min, size)
+    )
+    pixels = np.concatenate([colors, opacities[:, None]], axis=1)
+    pixels = np.clip(pixels, 0.0, 1.0).reshape(resolution, resolution, 4)
+
+    prim_path = usd_mesh.GetPath()
+    name = "gradient_" + str(prim_path).strip("/").replace("/", "__")
+    img_path = conversion_context["texture_directory"] + "/" + name + ".png"
+    import matplotlib.image
+
+    matplotlib.image.imsave(img_path, pixels)
+
+    usd_stage = usd_mesh.GetPrim().GetStage()
+    usd_material = image.create_material(
+        usd_stage, Sdf.Path("/materials/" + name), img_path
+    )
+    UsdShade.MaterialBindingAPI.Apply(usd_mesh.GetPrim()).Bind(usd_material)
+
+    st = (svg_points - bounds_min) / size
+    st[:, 1] = 1.0 - st[:, 1]
+    UsdGeom.PrimvarsAPI(usd_mesh).CreatePrimvar(
+        "st", Sdf.ValueTypeNames.TexCoord2fArray, UsdGeom.Tokens.vertex
+    ).Set(Vt.Vec2fArray.FromNumpy(st.astype(np.float32)))
+
+    # Average color for viewers that do not read materials.
+    usd_mesh.CreateDisplayColorPrimvar(UsdGeom.Tokens.constant).Set(
+        Vt.Vec3fArray.FromNumpy(colors.mean(axis=0, keepdims=True).astype(np.float32))
+    )
+
+    logging.debug("Baked gradient texture {}".format(img_path))
@@ -22,9 +22,14 @@ def convert(usd_stage, prim_path, svg_image):
     
 
     # or, more concisely using with statement
-    with open(img_path, "wb") as fh:
-        fh.write(base64.b64decode(img_data))
+    if conversion_context["write_textures"]:
+        with open(img_path, "wb") as fh:
+            fh.write(base64.b64decode(img_data))
 
+    return create_material(usd_stage, prim_path, img_path)
+
+
+def create_material(usd_stage, prim_path, img_path):
     material = UsdShade.Material.Define(usd_stage, prim_path)
 
     preview_surface = UsdShade.Shader.Define(
@@ -0,0 +1,25 @@
+""" Element converters, one module per SVG tag.
+
+Modules are imported on first use, ``geometry.text`` pulls in fontTools and
+the matplotlib font manager and most documents never need it.
+"""
+import importlib
+
+MODULES = (
+    "circle",
+    "ellipse",
+    "group",
+    "line",
+    "path",
+    "polygon",
+    "polyline",
+    "rect",
+    "text",
+    "use",
+)
+
+
+def __getattr__(name):
+    if name in MODULES:
+        return importlib.import_module("." + name, __name__)
+    raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
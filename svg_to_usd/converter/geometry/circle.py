@@ -2,7 +2,7 @@ from pxr import Usd, UsdGeom, Tf, Sdf, Gf
 import math
 import logging
 
-from .. import utils, conversion_options
+from .. import utils, stroke, conversion_options
 
 # TODO: Remove
 PI = 3.141592
@@ -37,12 +37,10 @@ def convert(usd_stage, prim_path, svg_ellipse):
         usd_fvi.append(i)
         usd_uvs.append((math.sin(iter), math.cos(iter)))
 
-    usd_mesh.CreatePointsAttr().Set(usd_points)
-    usd_mesh.CreateFaceVertexIndicesAttr().Set(usd_fvi)
-    usd_mesh.CreateFaceVertexCountsAttr().Set(usd_fvc)
+    utils.author_mesh(usd_mesh, usd_points, usd_fvi, usd_fvc)
 
-    usd_mesh.CreatePrimvar(
+    UsdGeom.PrimvarsAPI(usd_mesh).CreatePrimvar(
         "st", Sdf.ValueTypeNames.TexCoord2fArray, UsdGeom.Tokens.varying
     ).Set(usd_uvs)
 
-    return usd_mesh
+    return stroke.author_outline(usd_stage, usd_mesh, element_attributes)
@@ -1,7 +1,7 @@
 from pxr import UsdGeom
 import math
 import logging
-from .. import utils, conversion_options
+from .. import utils, stroke, conversion_options
 
 # TODO: Remove
 PI = 3.141592
@@ -34,8 +34,6 @@ def convert(usd_stage, prim_path, svg_ellipse):
         )
         usd_fvi.append(i)
 
-    usd_mesh.CreatePointsAttr().Set(usd_points)
-    usd_mesh.CreateFaceVertexIndicesAttr().Set(usd_fvi)
-    usd_mesh.CreateFaceVertexCountsAttr().Set(usd_fvc)
+    utils.author_mesh(usd_mesh, usd_points, usd_fvi, usd_fvc)
 
-    return usd_mesh
+    return stroke.author_outline(usd_stage, usd_mesh, element_attributes)
@@ -1,7 +1,7 @@
 from pxr import UsdGeom
 import logging
 
-from .. import utils
+from .. import common, utils, payloads
 from .. import conversion_options
 
 
@@ -13,4 +13,12 @@ def convert(usd_stage, prim_path, svg_element):
     if conversion_options['transform_group']:
         utils.handle_xform_attrs(svg_element, usd_mesh)
 
+    if payloads.enabled():
+        if conversion_options["bake_transforms"]:
+            # Children converted into the payload need this group baked first.
+            utils.bake_transforms(usd_mesh)
+
+        if payloads.convert_subtree(usd_stage, usd_mesh, svg_element):
+            common.converted_subtrees.add(svg_element)
+
     return usd_mesh
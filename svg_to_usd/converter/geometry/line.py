@@ -1,15 +1,12 @@
 from pxr import Usd, UsdGeom, Tf, Sdf, Gf
 import logging
-from .. import utils
+from .. import utils, stroke
+from .. import conversion_options
 
 
 def convert(usd_stage, prim_path, svg_element):
     logging.debug("Creating line")
 
-    usd_mesh = UsdGeom.BasisCurves.Define(usd_stage, prim_path)
-
-    utils.handle_geom_attrs(svg_element, usd_mesh)
-
     element_attributes = utils.parse_attributes(svg_element)
 
     _x1 = float(element_attributes["x1"]) if "x1" in element_attributes else 0.0
@@ -17,6 +14,18 @@ def convert(usd_stage, prim_path, svg_element):
     _x2 = float(element_attributes["x2"]) if "x2" in element_attributes else 0.0
     _y2 = float(element_attributes["y2"]) if "y2" in element_attributes else 0.0
 
+    if conversion_options["stroke_to_mesh"]:
+        style = stroke.stroke_style(element_attributes, required=False)
+        if style:
+            usd_mesh = UsdGeom.Mesh.Define(usd_stage, prim_path)
+            utils.handle_geom_attrs(svg_element, usd_mesh)
+            polylines = [([(_x1, _y1), (_x2, _y2)], False)]
+            return stroke.author_ribbon(usd_mesh, polylines, style)
+
+    usd_mesh = UsdGeom.BasisCurves.Define(usd_stage, prim_path)
+
+    utils.handle_geom_attrs(svg_element, usd_mesh)
+
     _stroke_width = 1
 
     if "stroke-width" in element_attributes:
@@ -28,10 +37,9 @@ def convert(usd_stage, prim_path, svg_element):
     usd_fvc = [2]
     usd_widths = [_stroke_width]
 
-    usd_mesh.CreatePointsAttr().Set(usd_points)
-    usd_mesh.CreateCurveVertexCountsAttr().Set(usd_fvc)
     usd_mesh.CreateWidthsAttr().Set(usd_widths)
     usd_mesh.SetWidthsInterpolation(UsdGeom.Tokens.constant)
+    utils.author_curves(usd_mesh, usd_points, usd_fvc)
 
     usd_mesh.CreateTypeAttr().Set(UsdGeom.Tokens.linear)
 
@@ -1,8 +1,7 @@
 from pxr import UsdGeom
 import logging
-from .. import utils
-
-from svgpath2mpl import parse_path
+from .. import utils, stroke, svgpath, simplify, budgets
+from .. import conversion_options
 
 
 def convert(usd_stage, prim_path, svg_path):
@@ -16,10 +15,15 @@ def convert(usd_stage, prim_path, svg_path):
         return None
 
     svg_d = element_attributes["d"]
-    _path = parse_path(svg_d)
-    _is_closed = _path.codes[-1] == _path.CLOSEPOLY
+    _path = simplify.path(svgpath.parse(svg_d))
+    budgets.check_path(_path)
+    _is_closed = _path.is_closed
 
-    if _is_closed:
+    style = None
+    if not _is_closed and conversion_options["stroke_to_mesh"]:
+        style = stroke.stroke_style(element_attributes, required=False)
+
+    if _is_closed or style:
         usd_mesh = UsdGeom.Mesh.Define(usd_stage, prim_path)
     else:
         usd_mesh = UsdGeom.BasisCurves.Define(usd_stage, prim_path)
@@ -36,13 +40,18 @@ def convert(usd_stage, prim_path, svg_path):
             _path, usd_points, usd_fvi, usd_fvc
         )
 
-        usd_mesh.CreatePointsAttr().Set(usd_points)
-        usd_mesh.CreateFaceVertexIndicesAttr().Set(usd_fvi)
-        usd_mesh.CreateFaceVertexCountsAttr().Set(usd_fvc)
+        utils.author_mesh(usd_mesh, usd_points, usd_fvi, usd_fvc)
+        usd_mesh = stroke.author_outline(
+            usd_stage,
+            usd_mesh,
+            element_attributes,
+            _path.to_polylines(),
+        )
+    elif style:
+        stroke.author_ribbon(usd_mesh, _path.to_polylines(), style)
     else:
         usd_points, usd_fvc = utils.path_to_curve(_path, usd_points, usd_fvc)
-        usd_mesh.CreatePointsAttr().Set(usd_points)
-        usd_mesh.CreateCurveVertexCountsAttr().Set(usd_fvc)
+        utils.author_curves(usd_mesh, usd_points, usd_fvc)
 
         usd_mesh.CreateTypeAttr().Set(UsdGeom.Tokens.linear)
 
@@ -1,8 +1,9 @@
-from pxr import UsdGeom
+from pxr import UsdGeom, Vt
 import logging
-from .. import utils
 
-from svgpath2mpl import parse_path
+import numpy as np
+
+from .. import utils, stroke, svgpath, simplify, budgets
 
 
 def convert(usd_stage, prim_path, svg_path):
@@ -12,23 +13,20 @@ def convert(usd_stage, prim_path, svg_path):
 
     if "points" not in element_attributes:
         # No path...
-        logging.warning("SVG Path processed with no d attribute")
+        logging.warning("SVG Polygon processed with no points attribute")
         return None
 
-    _svg_points = element_attributes["points"]
-    _svg_points = _svg_points.split(" ")
-    _svg_points = [i.split(",") for i in _svg_points]
+    _svg_points = simplify.points(svgpath.parse_points(element_attributes["points"]))
+    budgets.check_points(_svg_points)
 
     usd_mesh = UsdGeom.Mesh.Define(usd_stage, prim_path)
 
     utils.handle_geom_attrs(svg_path, usd_mesh)
 
-    usd_points = [utils.convert_position(float(p[0]), float(p[1])) for p in _svg_points]
-    usd_fvi = [i for i in range(len(_svg_points))]
+    usd_points = utils.convert_positions(_svg_points)
+    usd_fvi = Vt.IntArray.FromNumpy(np.arange(len(_svg_points), dtype=np.int32))
     usd_fvc = [len(_svg_points)]
 
-    usd_mesh.CreatePointsAttr().Set(usd_points)
-    usd_mesh.CreateFaceVertexIndicesAttr().Set(usd_fvi)
-    usd_mesh.CreateFaceVertexCountsAttr().Set(usd_fvc)
+    utils.author_mesh(usd_mesh, usd_points, usd_fvi, usd_fvc)
 
-    return usd_mesh
+    return stroke.author_outline(usd_stage, usd_mesh, element_attributes)
@@ -1,24 +1,24 @@
-from pxr import UsdGeom
+from pxr import UsdGeom, Vt
 import logging
-from .. import utils
 
-from svgpath2mpl import parse_path
+import numpy as np
+
+from .. import utils, stroke, svgpath, simplify, budgets
+from .. import conversion_options
 
 
 def convert(usd_stage, prim_path, svg_path):
-    logging.debug("Creating polygon")
+    logging.debug("Creating polyline")
 
     element_attributes = utils.parse_attributes(svg_path)
 
     if "points" not in element_attributes:
         # No path...
-        logging.warning("SVG Path processed with no d attribute")
+        logging.warning("SVG Polyline processed with no points attribute")
         return None
 
-    _svg_points = element_attributes["points"]
-    _svg_points = _svg_points.split(" ")
-    _svg_points = [i.split(",") for i in _svg_points]
-    # _is_closed = _path.codes[-1] == _path.CLOSEPOLY
+    _svg_points = simplify.points(svgpath.parse_points(element_attributes["points"]))
+    budgets.check_points(_svg_points)
     _is_closed = True
 
     # TODO: This may no longer work with the introduction of the parse_attributes function.
@@ -28,28 +28,34 @@ def convert(usd_stage, prim_path, svg_path):
         else:
             _is_closed = True
 
-    if _is_closed:
+    style = None
+    if not _is_closed and conversion_options["stroke_to_mesh"]:
+        style = stroke.stroke_style(element_attributes, required=False)
+
+    if _is_closed or style:
         usd_mesh = UsdGeom.Mesh.Define(usd_stage, prim_path)
     else:
         usd_mesh = UsdGeom.BasisCurves.Define(usd_stage, prim_path)
 
     utils.handle_geom_attrs(svg_path, usd_mesh)
 
-    usd_points = [utils.convert_position(float(p[0]), float(p[1])) for p in _svg_points]
+    usd_points = utils.convert_positions(_svg_points)
 
     if _is_closed:
 
-        usd_fvi = [i for i in range(len(_svg_points))] + [0]
+        usd_fvi = np.append(np.arange(len(_svg_points), dtype=np.int32), 0)
         usd_fvc = [len(_svg_points) + 1]
 
-        usd_mesh.CreatePointsAttr().Set(usd_points)
-        usd_mesh.CreateFaceVertexIndicesAttr().Set(usd_fvi)
-        usd_mesh.CreateFaceVertexCountsAttr().Set(usd_fvc)
+        utils.author_mesh(usd_mesh, usd_points, Vt.IntArray.FromNumpy(usd_fvi), usd_fvc)
+        # The stroke of a polyline stays open, even when it is filled.
+        usd_mesh = stroke.author_outline(
+            usd_stage, usd_mesh, element_attributes, [(_svg_points, False)]
+        )
+    elif style:
+        stroke.author_ribbon(usd_mesh, [(_svg_points, False)], style)
     else:
-        usd_fvi = [i for i in range(len(_svg_points))]
         usd_fvc = [len(_svg_points)]
-        usd_mesh.CreatePointsAttr().Set(usd_points)
-        usd_mesh.CreateCurveVertexCountsAttr().Set(usd_fvc)
+        utils.author_curves(usd_mesh, usd_points, usd_fvc)
 
         usd_mesh.CreateTypeAttr().Set(UsdGeom.Tokens.linear)
 
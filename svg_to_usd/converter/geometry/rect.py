@@ -1,6 +1,6 @@
 from pxr import Usd, UsdGeom, Tf, Sdf, Gf
 import logging
-from .. import utils
+from .. import utils, stroke
 
 
 def convert(usd_stage, prim_path, svg_rect):
@@ -41,11 +41,9 @@ def convert(usd_stage, prim_path, svg_rect):
     usd_fvc = [4]
     usd_uvs = [(0, 0), (1, 0), (1, 1), (0, 1)]
 
-    usd_mesh.CreatePointsAttr().Set(usd_points)
-    usd_mesh.CreateFaceVertexIndicesAttr().Set(usd_fvi)
-    usd_mesh.CreateFaceVertexCountsAttr().Set(usd_fvc)
-    usd_mesh.CreatePrimvar(
+    utils.author_mesh(usd_mesh, usd_points, usd_fvi, usd_fvc)
+    UsdGeom.PrimvarsAPI(usd_mesh).CreatePrimvar(
         "st", Sdf.ValueTypeNames.TexCoord2fArray, UsdGeom.Tokens.vertex
     ).Set(usd_uvs)
 
-    return usd_mesh
+    return stroke.author_outline(usd_stage, usd_mesh, element_attributes)
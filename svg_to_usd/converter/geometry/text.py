@@ -1,14 +1,20 @@
-from pxr import Usd, UsdGeom, Tf, Sdf, Gf
+from pxr import Usd, UsdGeom, Tf, Sdf, Gf, Vt
 import logging
-from .. import utils
+import os
+
+import numpy as np
+
+from .. import common, utils, prototypes, svgpath, budgets, conversion_options
 from .. import font
+from .. import stats as conversion_stats
 from pprint import pprint
 
 from fontTools import ttLib
 from fontTools.pens.basePen import BasePen
 from fontTools.pens.transformPen import TransformPen
 
-from svgpath2mpl import parse_path
+_fonts = {}  # (font path, family, styles) -> (cmap, units per em, glyph set, face)
+_glyph_meshes = {}  # (face, glyph name, units per em, position function, tolerance) -> mesh
 
 
 class SVGPen(BasePen):
@@ -110,17 +116,30 @@ def get_font_properties(element):
     }
 
 
-def create_usd_text_mesh(word, glyphSet, cmap, usd_mesh, units_per_em, font_size):
-    svg_d = ""
+def _glyph_outline(glyph, glyphSet):
+    """ SVG path data of a glyph in font units, y down. """
+    pen = SVGPen(glyphSet)
+    tpen = TransformPen(pen, (1.0, 0.0, 0.0, -1.0, 0.0, 0.0))
+    glyph.draw(tpen)
+    return pen.d
+
+
+def create_usd_text_mesh(
+    word, glyphSet, cmap, usd_mesh, units_per_em, font_size, face=""
+):
     usd_points = []
     usd_fvi = []
     usd_fvc = []
+    num_points = 0
     _charXOffset = 0
+    scale = 1.0 / (units_per_em) * font_size
 
     for c in word:
+        budgets.check_time()
 
         try:
-            glyph = glyphSet[cmap[ord(c)]]
+            glyph_name = cmap[ord(c)]
+            glyph = glyphSet[glyph_name]
         except:
             glyph = glyphSet[".notdef"]
             continue
@@ -129,39 +148,255 @@ def create_usd_text_mesh(word, glyphSet, cmap, usd_mesh, units_per_em, font_size
             _charXOffset += glyph.width
             continue
 
-        pen = SVGPen(glyphSet)
-        tpen = TransformPen(pen, (1.0, 0.0, 0.0, -1.0, 0.0, 0.0))
-
-        glyph.draw(tpen)
-        svg_path = parse_path(pen.d)
-
-        d = pen.d
+        mesh = glyph_mesh(face, glyph_name, glyphSet, units_per_em)
 
         # Skip glyphs with no contours
-        if not len(d):
+        if mesh is None:
             continue
 
-        svg_d = d
+        glyph_points, glyph_fvi, glyph_fvc = mesh
+        usd_points.append(
+            glyph_points * font_size + utils.convert_positions([_charXOffset * scale, 0.0])
+        )
+        usd_fvi.append(glyph_fvi + num_points)
+        usd_fvc.append(glyph_fvc)
+        num_points += len(glyph_points)
+
+        _charXOffset += glyph.width
+
+    if not usd_points:
+        utils.author_mesh(usd_mesh, [], [], [])
+        return usd_mesh
+
+    utils.author_mesh(
+        usd_mesh,
+        np.concatenate(usd_points),
+        Vt.IntArray.FromNumpy(np.concatenate(usd_fvi)),
+        Vt.IntArray.FromNumpy(np.concatenate(usd_fvc)),
+    )
+
+    return usd_mesh
+
+
+def load_font(font_path, family, styles):
+    """
+    Parse a font file once per process.
+
+    Returns
+    -------
+    font : tuple
+        ``(cmap, units_per_em, glyph_set, face)`` where ``face`` names the
+        font face for ``glyph_mesh`` and ``glyph_prototype``.
+    """
+    key = (font_path, family, tuple(styles))
+    if key in _fonts:
+        return _fonts[key]
+
+    ftfont = None
+    if font_path.endswith("ttc"):
+        fonts = ttLib.TTCollection(font_path)
+        for fnt in fonts:
+            name = fnt["name"]
+            if name.getBestFamilyName() == family and (
+                name.getBestSubFamilyName().lower() in styles
+            ):
+                ftfont = fnt
+    else:
+        ftfont = ttLib.TTFont(font_path)
+    cmap = ftfont["cmap"].getBestCmap()
+    units_per_em = ftfont["head"].unitsPerEm
+    face = font_key(ftfont, font_path)
+
+    gSet = ftfont.getGlyphSet()
+    ftfont.close()
+
+    _fonts[key] = (cmap, units_per_em, gSet, face)
+    return _fonts[key]
+
+
+def font_key(ftfont, font_path):
+    """ Name identifying a font face, shared by the prototypes of its glyphs. """
+    try:
+        name = ftfont["name"]
+        return "{}_{}".format(name.getBestFamilyName(), name.getBestSubFamilyName())
+    except KeyError:
+        return os.path.splitext(os.path.basename(font_path))[0]
 
-        svg_path = parse_path(svg_d)
 
+def glyph_mesh(face, glyph_name, glyphSet, units_per_em):
+    """
+    Tessellation of a glyph one em high, as ``(points, fvi, fvc)`` arrays,
+    or None for glyphs without contours.
+
+    Cached for the lifetime of the process, glyphs repeat within and across
+    documents.
+    """
+    key = (
+        face,
+        glyph_name,
+        units_per_em,
+        utils.convert_position,
+        conversion_options["curve_tolerance"],
+    )
+    if key in _glyph_meshes:
+        return _glyph_meshes[key]
+
+    mesh = None
+    svg_d = _glyph_outline(glyphSet[glyph_name], glyphSet)
+    if svg_d:
         usd_points, usd_fvi, usd_fvc = utils.path_to_mesh(
-            svg_path,
+            svgpath.parse(svg_d), [], [], [], 0, 0, 1.0 / units_per_em
+        )
+        if usd_fvc:
+            mesh = (
+                np.asarray(usd_points, dtype=np.float64).reshape(-1, 3),
+                np.asarray(usd_fvi, dtype=np.int32),
+                np.asarray(usd_fvc, dtype=np.int32),
+            )
+    _glyph_meshes[key] = mesh
+    return mesh
+
+
+def glyph_prototype(usd_stage, glyph_name, glyphSet, units_per_em, face):
+    """
+    Path of the prototype mesh of a glyph, authoring it the first time it
+    is requested for ``usd_stage``.
+
+    Prototypes are one em high, instances scale them to their font size.
+    Returns None for glyphs without contours.
+    """
+    name = Tf.MakeValidIdentifier("glyph_{}_{}".format(face, glyph_name))
+    key = (usd_stage.GetRootLayer().identifier, name)
+    if key in common.prototype_map:
+        return common.prototype_map[key]
+
+    prototype_path = None
+    mesh = glyph_mesh(face, glyph_name, glyphSet, units_per_em)
+    if mesh is not None:
+        usd_points, usd_fvi, usd_fvc = mesh
+        usd_mesh = UsdGeom.Mesh.Define(
+            usd_stage, prototypes.scope(usd_stage).GetPath().AppendChild(name)
+        )
+        utils.author_mesh(
+            usd_mesh,
             usd_points,
-            usd_fvi,
-            usd_fvc,
-            _charXOffset,
-            0,
-            1.0 / (units_per_em) * font_size,
+            Vt.IntArray.FromNumpy(usd_fvi),
+            Vt.IntArray.FromNumpy(usd_fvc),
         )
+        usd_mesh.CreateNormalsAttr().Set([utils.default_normal()])
+        usd_mesh.SetNormalsInterpolation(UsdGeom.Tokens.uniform)
+        usd_mesh.CreateSubdivisionSchemeAttr().Set(UsdGeom.Tokens.none)
+        prototype_path = usd_mesh.GetPath()
+        conversion_stats.current().count("glyphs")
+
+    common.prototype_map[key] = prototype_path
+    return prototype_path
+
+
+def create_usd_text_instancer(
+    word, glyphSet, cmap, usd_instancer, units_per_em, font_size, face, svg_fill
+):
+    """ Author ``word`` as a PointInstancer of its glyph prototypes, one
+    instance per character with contours.
+    """
+    usd_stage = usd_instancer.GetPrim().GetStage()
+    prototype_paths = []
+    prototype_indices = {}
+    proto_indices = []
+    x_offsets = []
+    _charXOffset = 0
+
+    for c in word:
+        budgets.check_time()
+        try:
+            glyph_name = cmap[ord(c)]
+            glyph = glyphSet[glyph_name]
+        except:
+            continue
+
+        if c != " ":
+            prototype_path = glyph_prototype(
+                usd_stage, glyph_name, glyphSet, units_per_em, face
+            )
+            if prototype_path is not None:
+                if prototype_path not in prototype_indices:
+                    prototype_indices[prototype_path] = len(prototype_paths)
+                    prototype_paths.append(prototype_path)
+                proto_indices.append(prototype_indices[prototype_path])
+                x_offsets.append(_charXOffset)
 
         _charXOffset += glyph.width
 
-    usd_mesh.CreatePointsAttr().Set(usd_points)
-    usd_mesh.CreateFaceVertexIndicesAttr().Set(usd_fvi)
-    usd_mesh.CreateFaceVertexCountsAttr().Set(usd_fvc)
+    # The prototypes of the instancer are instanceable references to the
+    # shared glyphs, kept below it so payloads can target them.
+    usd_glyphs = UsdGeom.Scope.Define(
+        usd_stage, usd_instancer.GetPath().AppendChild("glyphs")
+    )
+    usd_instancer.CreatePrototypesRel().SetTargets(
+        [
+            prototypes.add_instance(usd_stage, usd_glyphs, path).GetPath()
+            for path in prototype_paths
+        ]
+    )
+    count = len(proto_indices)
+    if not count:
+        usd_instancer.CreateProtoIndicesAttr().Set(Vt.IntArray())
+        usd_instancer.CreatePositionsAttr().Set(Vt.Vec3fArray())
+        return usd_instancer
+
+    scale = 1.0 / units_per_em * font_size
+    svg_positions = np.zeros((count, 2))
+    svg_positions[:, 0] = np.asarray(x_offsets, dtype=np.float64) * scale
+    positions = utils.convert_positions(svg_positions)
+    proto_indices = np.asarray(proto_indices, dtype=np.int32)
+
+    usd_instancer.CreateProtoIndicesAttr().Set(Vt.IntArray.FromNumpy(proto_indices))
+    usd_instancer.CreatePositionsAttr().Set(utils.to_vec3f_array(positions))
+    usd_instancer.CreateScalesAttr().Set(
+        Vt.Vec3fArray.FromNumpy(np.full((count, 3), font_size, dtype=np.float32))
+    )
+
+    if svg_fill and svg_fill != "none" and "url(" not in svg_fill:
+        # Instancer primvars apply per instance.
+        color = np.asarray(utils.convert_color(svg_fill), dtype=np.float32)
+        UsdGeom.PrimvarsAPI(usd_instancer).CreatePrimvar(
+            "displayColor", Sdf.ValueTypeNames.Color3fArray, UsdGeom.Tokens.vertex
+        ).Set(Vt.Vec3fArray.FromNumpy(np.tile(color, (count, 1))))
+
+    # Bounds of the scaled prototypes at every position.
+    prototype_bounds = np.array(
+        [
+            [
+                common.extent_map[path].GetMin(),
+                common.extent_map[path].GetMax(),
+            ]
+            for path in prototype_paths
+        ]
+    )
+    bounds = prototype_bounds[proto_indices] * font_size + positions[:, None, :]
+    utils.set_extent(
+        usd_instancer,
+        Gf.Range3d(
+            Gf.Vec3d(*bounds[:, 0].min(axis=0)), Gf.Vec3d(*bounds[:, 1].max(axis=0))
+        ),
+    )
+    return usd_instancer
 
-    return usd_mesh
+
+def _define_text_prim(usd_stage, prim_path):
+    if conversion_options["text_instancing"]:
+        return UsdGeom.PointInstancer.Define(usd_stage, prim_path)
+    return UsdGeom.Mesh.Define(usd_stage, prim_path)
+
+
+def _author_text(word, glyphSet, cmap, usd_prim, units_per_em, font_size, face, svg_fill):
+    if usd_prim.GetPrim().IsA(UsdGeom.PointInstancer):
+        return create_usd_text_instancer(
+            word, glyphSet, cmap, usd_prim, units_per_em, font_size, face, svg_fill
+        )
+    return create_usd_text_mesh(
+        word, glyphSet, cmap, usd_prim, units_per_em, font_size, face
+    )
 
 
 def convert(usd_stage, prim_path, svg_text, fallback_font, type):
@@ -250,11 +485,6 @@ def convert_as_schema(usd_stage, prim_path, svg_text, fallback_font):
 
 def convert_as_geo(usd_stage, prim_path, svg_text, fallback_font):
 
-    # Might be a better place to put this. Needed for setting extents later.
-    bboxCache = UsdGeom.BBoxCache(
-        Usd.TimeCode.Default(), includedPurposes=[UsdGeom.Tokens.default_]
-    )
-
     logging.debug("Creating text")
     text_root = None
 
@@ -298,34 +528,16 @@ def convert_as_geo(usd_stage, prim_path, svg_text, fallback_font):
 
     # TODO Don't forget to add logic to handle url paths
     if "/" in font_props["family"] or "\\" in font_props["family"]:
-        print("font_path", font_props["family"])
+        logging.debug("Font path: {}".format(font_props["family"]))
         font_path = font_props["family"]
     else:
-        # print("Font:", svg_font)
         font_path = svg_font.findfont()
 
     try:
-        ftfont = None
-        if font_path.endswith("ttc"):
-            fonts = ttLib.TTCollection(font_path)
-            for fnt in fonts:
-                name = fnt["name"]
-                family = name.getBestFamilyName()
-                style = name.getBestSubFamilyName()
-                if family == svg_font.name and style.lower() in ft_styles:
-                    ftfont = fnt
-        else:
-            ftfont = ttLib.TTFont(font_path)
-        cmap = ftfont["cmap"]
-        t = cmap.getBestCmap()
-        units_per_em = ftfont["head"].unitsPerEm
-
-        gSet = ftfont.getGlyphSet()
-        ftfont.close()
-
+        t, units_per_em, gSet, face = load_font(font_path, svg_font.name, ft_styles)
     except ttLib.TTLibError:
         logging.error(f"ERROR: {fallback_font} cannot be processed.")
-        return 1
+        return None
 
     # Check if the text element has any children. Most likely <tspan> elements.
     if len(list(svg_text)) > 1:
@@ -353,7 +565,7 @@ def convert_as_geo(usd_stage, prim_path, svg_text, fallback_font):
             if not svg_word:
                 continue
 
-            usd_mesh = UsdGeom.Mesh.Define(
+            usd_mesh = _define_text_prim(
                 usd_stage,
                 text_root.GetPath().AppendChild(
                     Tf.MakeValidIdentifier(
@@ -371,15 +583,20 @@ def convert_as_geo(usd_stage, prim_path, svg_text, fallback_font):
                 Gf.Matrix4d(1.0).SetTranslate(Gf.Vec3d(align, 0, 0))
             )
 
-            create_usd_text_mesh(
-                svg_word, gSet, t, usd_mesh, units_per_em, svg_font.size
+            _author_text(
+                svg_word,
+                gSet,
+                t,
+                usd_mesh,
+                units_per_em,
+                svg_font.size,
+                face,
+                tspan_attributes["fill"],
             )
 
-            utils.set_extent(usd_mesh.GetPrim(), bboxCache)
-
     # Do this if the text element doesn't have any children elements.
     else:
-        text_root = UsdGeom.Mesh.Define(usd_stage, prim_path)
+        text_root = _define_text_prim(usd_stage, prim_path)
 
         utils.handle_geom_attrs(svg_text, text_root)
 
@@ -406,8 +623,8 @@ def convert_as_geo(usd_stage, prim_path, svg_text, fallback_font):
             Gf.Matrix4d(1.0).SetTranslate(Gf.Vec3d(align, 0, 0))
         )
 
-        create_usd_text_mesh(svg_word, gSet, t, text_root, units_per_em, svg_font.size)
-
-        utils.set_extent(text_root.GetPrim(), bboxCache)
+        _author_text(
+            svg_word, gSet, t, text_root, units_per_em, svg_font.size, face, svg_fill
+        )
 
     return text_root
@@ -0,0 +1,106 @@
+from pxr import UsdGeom, Gf
+import logging
+
+from .. import common, utils, prototypes, svgpath, culling
+
+
+def convert(usd_stage, prim_path, svg_use):
+    logging.debug("Creating use")
+
+    element_attributes = utils.parse_attributes(svg_use)
+
+    href = element_attributes.get(
+        "{http://www.w3.org/1999/xlink}href", element_attributes.get("href", "")
+    )
+    if not href.startswith("#"):
+        logging.warning("Unsupported <use> reference '{}'".format(href))
+        return None
+
+    svg_element = common.id_map.get(href[1:])
+    if svg_element is None:
+        logging.warning("<use> references missing element '{}'".format(href))
+        return None
+
+    prototype_path = prototypes.get_prototype(usd_stage, svg_element)
+    if prototype_path is None:
+        return None
+
+    usd_xform = UsdGeom.Xform.Define(usd_stage, prim_path)
+    utils.handle_xform_attrs(svg_use, usd_xform)
+
+    try:
+        svg_x = float(element_attributes["x"])
+    except:
+        svg_x = 0.0
+    try:
+        svg_y = float(element_attributes["y"])
+    except:
+        svg_y = 0.0
+
+    if svg_x or svg_y:
+        # x and y apply before the use transform.
+        usd_xform.AddTranslateOp(opSuffix="xy").Set(
+            utils.convert_position(svg_x, svg_y, Gf.Vec3d)
+        )
+
+    view_affine = _symbol_view(element_attributes, svg_element)
+    if view_affine is not None:
+        # The symbol viewBox maps into the use viewport, inside x and y.
+        usd_xform.AddTransformOp(opSuffix="viewBox").Set(
+            Gf.Matrix4d(utils.affine_to_matrix(view_affine).tolist())
+        )
+
+    prototypes.add_instance(usd_stage, usd_xform, prototype_path)
+
+    return usd_xform
+
+
+def _symbol_view(element_attributes, svg_element):
+    """
+    The affine mapping the ``viewBox`` of a referenced ``<symbol>`` to the
+    ``width`` and ``height`` of the ``<use>``, following its
+    ``preserveAspectRatio``. None for other elements and symbols without a
+    viewBox.
+
+    The viewport size falls back to the ``width`` and ``height`` of the
+    symbol, then to the viewBox itself. Relative lengths are not resolved.
+    """
+    if svg_element.tag.rpartition("}")[-1] != "symbol":
+        return None
+    symbol_attributes = utils.parse_attributes(svg_element)
+    view_box = [
+        float(v) for v in svgpath._NUMBER_RE.findall(symbol_attributes.get("viewBox", ""))
+    ]
+    if len(view_box) != 4 or view_box[2] <= 0.0 or view_box[3] <= 0.0:
+        return None
+    min_x, min_y, view_width, view_height = view_box
+
+    sizes = []
+    for name, fallback in (("width", view_width), ("height", view_height)):
+        size = culling.length(element_attributes.get(name, ""))
+        if size is None:
+            size = culling.length(symbol_attributes.get(name, ""))
+        sizes.append(fallback if size is None or size <= 0.0 else size)
+    width, height = sizes
+
+    scale_x, scale_y = width / view_width, height / view_height
+    aspect = symbol_attributes.get("preserveAspectRatio", "xMidYMid").split() or ["xMidYMid"]
+    align = aspect[0]
+    if align != "none":
+        if aspect[-1] == "slice":
+            scale_x = scale_y = max(scale_x, scale_y)
+        else:
+            scale_x = scale_y = min(scale_x, scale_y)
+
+    translate_x, translate_y = -min_x * scale_x, -min_y * scale_y
+    if "xMid" in align:
+        translate_x += (width - view_width * scale_x) / 2.0
+    elif "xMax" in align:
+        translate_x += width - view_width * scale_x
+    if "YMid" in align:
+        translate_y += (height - view_height * scale_y) / 2.0
+    elif "YMax" in align:
+        translate_y += height - view_height * scale_y
+
+    return (scale_x, 0.0, 0.0, scale_y, translate_x, translate_y)
+
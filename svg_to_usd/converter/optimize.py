@@ -0,0 +1,147 @@
+""" Point welding, compaction and quantization of converted meshes.
+
+Runs on every converted element once its prims are complete, after
+gradients, extrusion and baked transforms:
+
+- ``quantize_grid`` snaps the points of meshes and curves to multiples of
+  the grid, in the units the points are authored in.
+- ``weld_points`` merges mesh points with the same position and the same
+  per point primvar values, such as the shared corners of stroke meshes,
+  glyph contours and touching subpaths, drops points no face uses, and
+  renumbers the rest by their first use in ``faceVertexIndices``. That is
+  vertex-fetch order, consumers read the points front to back. Per point
+  primvars and normals are carried along.
+
+Faces are not reordered, so nothing is done for the post-transform vertex
+cache, and per face and face varying data is untouched.
+Welding compares exact coordinates, with ``quantize_grid`` set points
+within half a grid cell of each other end up equal and are welded too.
+"""
+import logging
+
+import numpy as np
+
+from pxr import Usd, UsdGeom, Vt
+
+from . import utils, conversion_options
+from . import stats as conversion_stats
+
+_PER_POINT = (UsdGeom.Tokens.vertex, UsdGeom.Tokens.varying)
+
+
+def apply(usd_prim):
+    """ Optimize the meshes and curves of a converted element. """
+    weld = conversion_options["weld_points"]
+    grid = conversion_options["quantize_grid"]
+    if not (weld or grid) or not usd_prim:
+        return
+
+    stats = conversion_stats.current()
+    with stats.stage("optimize"):
+        for prim in Usd.PrimRange(usd_prim.GetPrim()):
+            if prim.IsA(UsdGeom.Mesh):
+                _optimize_mesh(UsdGeom.Mesh(prim), weld, grid, stats)
+            elif grid and prim.IsA(UsdGeom.Curves):
+                _quantize_curves(UsdGeom.Curves(prim), grid)
+
+
+def quantize(points, grid):
+    """ Snap (N, 3) ``points`` to multiples of ``grid``. """
+    return np.round(points / grid) * grid
+
+
+def _quantize_curves(usd_curves, grid):
+    points = usd_curves.GetPointsAttr().Get()
+    if not points:
+        return
+    points = quantize(np.asarray(points, dtype=np.float64), grid)
+    usd_curves.GetPointsAttr().Set(utils.to_vec3f_array(points))
+    widths = usd_curves.GetWidthsAttr().Get()
+    padding = max(widths) * 0.5 if widths else 0.0
+    utils.set_extent(usd_curves, utils.compute_extent(points, padding))
+
+
+def _per_point_data(usd_mesh, num_points):
+    """
+    The per point primvars and normals of ``usd_mesh`` as ``(attribute,
+    values, indexed)``, or None if one of them cannot be welded.
+    """
+    data = []
+    for primvar in UsdGeom.PrimvarsAPI(usd_mesh).GetPrimvars():
+        if primvar.GetInterpolation() not in _PER_POINT:
+            continue
+        if primvar.IsIndexed():
+            data.append((primvar, primvar.GetIndices(), True))
+        else:
+            data.append((primvar, primvar.Get(), False))
+    if usd_mesh.GetNormalsInterpolation() in _PER_POINT:
+        normals = usd_mesh.GetNormalsAttr()
+        if normals.HasAuthoredValue():
+            data.append((normals, normals.Get(), False))
+
+    for attribute, values, _ in data:
+        if values is None or len(values) != num_points:
+            logging.warning(
+                "Not welding {}, {} does not match its points".format(
+                    usd_mesh.GetPath(), attribute.GetName()
+                )
+            )
+            return None
+    return data
+
+
+def _weld_key(points, data):
+    """ One opaque row per point, equal for points that may be welded. """
+    columns = [points]
+    for _, values, _ in data:
+        try:
+            values = np.asarray(values, dtype=np.float64).reshape(len(points), -1)
+        except (TypeError, ValueError):
+            return None
+        columns.append(values)
+    # Adding 0 turns -0 into 0, which would compare different as bytes.
+    rows = np.ascontiguousarray(np.hstack(columns) + 0.0)
+    return rows.view(np.dtype((np.void, rows.dtype.itemsize * rows.shape[1]))).ravel()
+
+
+def _optimize_mesh(usd_mesh, weld, grid, stats):
+    points = usd_mesh.GetPointsAttr().Get()
+    fvi = usd_mesh.GetFaceVertexIndicesAttr().Get()
+    if not points or not fvi:
+        return
+    points = np.asarray(points, dtype=np.float64)
+    if grid:
+        points = quantize(points, grid)
+
+    if not weld:
+        usd_mesh.GetPointsAttr().Set(utils.to_vec3f_array(points))
+        utils.set_extent(usd_mesh, utils.compute_extent(points))
+        return
+
+    data = _per_point_data(usd_mesh, len(points))
+    key = None if data is None else _weld_key(points, data)
+    if key is None:
+        return
+
+    # Welded point of every point, then welded points in order of first use.
+    _, first, welded = np.unique(key, return_index=True, return_inverse=True)
+    fvi = welded.ravel()[np.asarray(fvi)]
+    used, first_use = np.unique(fvi, return_index=True)
+    order = used[np.argsort(first_use)]
+    remap = np.empty(len(first), dtype=np.int32)
+    remap[order] = np.arange(len(order), dtype=np.int32)
+    source = first[order]
+    stats.count("weld_points_in", len(points))
+    stats.count("weld_points_out", len(source))
+    if not grid and len(source) == len(points) and (source == np.arange(len(source))).all():
+        # Nothing to weld, drop or reorder
+        return
+
+    usd_mesh.GetPointsAttr().Set(utils.to_vec3f_array(points[source]))
+    usd_mesh.GetFaceVertexIndicesAttr().Set(Vt.IntArray.FromNumpy(remap[fvi]))
+    for attribute, values, indexed in data:
+        if indexed:
+            attribute.SetIndices(utils.take(values, source))
+        else:
+            attribute.Set(utils.take(values, source))
+    utils.set_extent(usd_mesh, utils.compute_extent(points[source]))
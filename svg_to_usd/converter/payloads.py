@@ -0,0 +1,342 @@
+""" Payload authoring for heavy groups.
+
+Groups whose subtree exceeds ``payload_min_prims`` elements or
+``payload_min_vertices`` points are converted into their own layer and
+brought back with a payload arc, so applications can open the result with
+``Usd.Stage.LoadNone`` and load only the groups they need. The bounds of each
+payloaded group are rolled up into ``extentsHint`` on the group by
+``common.handle_svg_root``, like for every other group, and are available
+without loading the payload.
+
+Bindings may not leave the payload root, so the materials a payload binds
+are copied below ``<group>/materials`` in its layer. A heavy group whose
+child groups are heavy on their own stays inline and those become the
+payloads instead.
+"""
+import contextlib
+import logging
+import os
+
+from pxr import Usd, UsdGeom, Sdf
+
+from . import common, prototypes, shards, svgpath, registry, stats as conversion_stats
+from . import conversion_options
+
+# Set while a subtree is being converted into a payload layer, payloads are
+# not nested.
+_active = False
+
+# Payload layer files created by the running conversion, removed again if it
+# is cancelled.
+written = []
+
+# Outline points per flattened point: a quad per segment plus a round join.
+_STROKE_MARGIN = 16
+
+
+def enabled():
+    return not _active and (
+        conversion_options["payload_min_prims"] > 0
+        or conversion_options["payload_min_vertices"] > 0
+    )
+
+
+@contextlib.contextmanager
+def suspended():
+    """ Convert everything inside the block inline, without payloads. """
+    global _active
+
+    previous = _active
+    _active = True
+    try:
+        yield
+    finally:
+        _active = previous
+
+
+def payload_path(usd_stage, prim_path):
+    """ File path of the payload layer for ``prim_path``, in a
+    ``<layer name>_payloads`` directory next to the stage root layer.
+    """
+    root_layer = usd_stage.GetRootLayer()
+    layer_path = root_layer.realPath
+    if layer_path:
+        directory, filename = os.path.split(layer_path)
+        name, ext = os.path.splitext(filename)
+    else:
+        from . import conversion_context
+
+        directory, name, ext = conversion_context["working_directory"], "stage", ".usd"
+    filename = str(prim_path).strip("/").replace("/", "__") + ext
+    return os.path.join(directory, "{}_payloads".format(name), filename)
+
+
+def _count_vertices(prim):
+    return conversion_stats.count_geometry(prim)[0]
+
+
+def _estimate_vertices(svg_element):
+    """
+    Points of the shapes below ``svg_element`` once flattened, before
+    strokes and extrusion add theirs. None if the subtree holds text, whose
+    glyphs cannot be counted without tessellating them.
+    """
+    total = 0
+    for child in svg_element:
+        if common.is_definition(child) or child in common.culled_map:
+            continue
+        tag = registry.local_name(child.tag)
+        if tag == "text":
+            return None
+        if tag == "path":
+            total += len(svgpath.parse(child.attrib.get("d", "")).vertices)
+        elif tag in ("polygon", "polyline"):
+            total += len(svgpath.parse_points(child.attrib.get("points", "")))
+        elif tag in ("circle", "ellipse"):
+            total += conversion_options["curve_resolution"]
+        elif tag in ("rect", "image", "line"):
+            total += 4
+        children = _estimate_vertices(child)
+        if children is None:
+            return None
+        total += children
+    return total
+
+
+def _could_be_heavy(svg_element, min_vertices):
+    """ False if ``svg_element`` stays under ``min_vertices`` even when every
+    flattened point grows into a full stroke outline and an extruded copy.
+    """
+    estimate = _estimate_vertices(svg_element)
+    if estimate is None:
+        return True
+    if conversion_options["stroke_to_mesh"]:
+        estimate *= _STROKE_MARGIN
+    # Extrusion, also set per element, doubles the points.
+    return estimate * 2 >= min_vertices
+
+
+def _has_heavy_group(svg_element, min_prims):
+    """ True if a child ``<g>`` of ``svg_element`` is over ``min_prims`` on
+    its own, then it becomes the payload rather than its parent.
+    """
+    return min_prims > 0 and any(
+        child.tag.rpartition("}")[-1] == "g"
+        and shards.subtree_size(child) - 1 >= min_prims
+        for child in svg_element
+    )
+
+
+def _heavy_children(usd_prim, min_vertices):
+    """ The converted groups below ``usd_prim`` over ``min_vertices`` on their
+    own.
+    """
+    if min_vertices <= 0:
+        return []
+    return [
+        child
+        for child in usd_prim.GetChildren()
+        if child.IsA(UsdGeom.Xform) and _count_vertices(child) >= min_vertices
+    ]
+
+
+def _define_parents(layer, prim_path):
+    """ Author ``def`` specs for the missing ancestors of ``prim_path``. """
+    parent = Sdf.CreatePrimInLayer(layer, prim_path.GetParentPath())
+    while parent and parent.path != Sdf.Path.absoluteRootPath:
+        if parent.specifier == Sdf.SpecifierOver and not parent.properties:
+            parent.specifier = Sdf.SpecifierDef
+        parent = parent.nameParent
+
+
+def _bindings(layer, root_path):
+    """ The material binding relationship specs of ``layer`` below
+    ``root_path``.
+    """
+    bindings = []
+
+    def visit(path):
+        if path.IsPropertyPath() and path.name.startswith("material:binding"):
+            spec = layer.GetRelationshipAtPath(path)
+            if spec:
+                bindings.append(spec)
+
+    layer.Traverse(root_path, visit)
+    return bindings
+
+
+def _material_layers(src_layer, usd_stage):
+    """ The layers materials may be authored in, the converted subtree first. """
+    layers = [src_layer] + list(usd_stage.GetLayerStack(includeSessionLayers=False))
+    for usd_material in common.image_map.values():
+        if usd_material:
+            layers.append(usd_material.GetPrim().GetStage().GetRootLayer())
+    return layers
+
+
+def _find_spec(layers, prim_path):
+    for layer in layers:
+        if layer.GetPrimAtPath(prim_path):
+            return layer
+    return None
+
+
+def _copy_inline(src_layer, usd_stage, prim_path):
+    """ Copy the converted subtree at ``prim_path`` into ``usd_stage``, with
+    the materials it binds that the stage lacks.
+    """
+    dst_layer = usd_stage.GetEditTarget().GetLayer()
+    Sdf.CopySpec(src_layer, prim_path, dst_layer, prim_path)
+    for binding in _bindings(src_layer, prim_path):
+        for target in binding.targetPathList.explicitItems:
+            if dst_layer.GetPrimAtPath(target) or not src_layer.GetPrimAtPath(target):
+                continue
+            _define_parents(dst_layer, target)
+            Sdf.CopySpec(src_layer, target, dst_layer, target)
+
+
+def _localize_materials(layer, root_path, material_layers):
+    """
+    Bindings may not target prims outside the root of a payload, USD drops
+    them. Copy the materials bound below ``root_path`` to
+    ``<root_path>/materials`` and bind those instead.
+    """
+    scope_path = root_path.AppendChild("materials")
+    copied = {}
+    for binding in _bindings(layer, root_path):
+        targets = []
+        for target in binding.targetPathList.explicitItems:
+            if target.HasPrefix(root_path):
+                targets.append(target)
+                continue
+            if target not in copied:
+                source = _find_spec(material_layers, target)
+                if source is None:
+                    logging.warning("Material {} not found for {}".format(target, root_path))
+                    targets.append(target)
+                    continue
+                local_path = scope_path.AppendChild(target.name)
+                _define_parents(layer, local_path)
+                layer.GetPrimAtPath(scope_path).typeName = "Scope"
+                Sdf.CopySpec(source, target, layer, local_path)
+                copied[target] = local_path
+            targets.append(copied[target])
+        binding.targetPathList.explicitItems = targets
+
+
+def _write_payload(src_stage, usd_stage, prim_path):
+    """ Save the converted subtree at ``prim_path`` as a payload layer and
+    reference it from ``prim_path`` in ``usd_stage``.
+    """
+    src_layer = src_stage.GetRootLayer()
+    file_path = payload_path(usd_stage, prim_path)
+    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+
+    layer = Sdf.Layer.Find(file_path)
+    if layer:
+        # Still open from an earlier conversion in this process.
+        layer.Clear()
+    else:
+        layer = Sdf.Layer.CreateNew(file_path)
+    written.append(file_path)
+
+    _define_parents(layer, prim_path)
+    Sdf.CopySpec(src_layer, prim_path, layer, prim_path)
+    if src_layer.GetPrimAtPath(prototypes.SCOPE_PATH):
+        Sdf.CopySpec(src_layer, prototypes.SCOPE_PATH, layer, prototypes.SCOPE_PATH)
+    _localize_materials(layer, prim_path, _material_layers(src_layer, usd_stage))
+    if prim_path.IsRootPrimPath():
+        layer.defaultPrim = prim_path.name
+    layer.Save()
+
+    logging.debug("Authoring {} as payload".format(prim_path))
+
+    root_dir = os.path.dirname(
+        os.path.abspath(usd_stage.GetRootLayer().realPath or file_path)
+    )
+    asset_path = "./" + os.path.relpath(file_path, root_dir).replace(os.sep, "/")
+    usd_stage.GetPrimAtPath(prim_path).GetPayloads().AddPayload(asset_path, prim_path)
+
+
+def _place(src_stage, usd_stage, prim_path, min_vertices):
+    """
+    Author the heavy converted subtree at ``prim_path`` as a payload. If
+    groups below it are heavy on their own, ``prim_path`` stays inline and
+    those groups are placed the same way instead, the rest of its children
+    are copied inline.
+    """
+    src_prim = src_stage.GetPrimAtPath(prim_path)
+    heavy = _heavy_children(src_prim, min_vertices)
+    if not heavy:
+        _write_payload(src_stage, usd_stage, prim_path)
+        return
+
+    # The children kept inline may instance prototypes.
+    prototypes.copy_prototypes(src_stage, usd_stage)
+    src_layer = src_stage.GetRootLayer()
+    dst_layer = usd_stage.GetEditTarget().GetLayer()
+    for child in src_prim.GetChildren():
+        child_path = child.GetPath()
+        _copy_inline(src_layer, usd_stage, child_path)
+        if child in heavy:
+            dst_spec = dst_layer.GetPrimAtPath(child_path)
+            for name in list(dst_spec.nameChildren.keys()):
+                del dst_spec.nameChildren[name]
+            _place(src_stage, usd_stage, child_path, min_vertices)
+
+
+def convert_subtree(usd_stage, usd_xform, svg_element):
+    """
+    Convert the children of ``svg_element`` below ``usd_xform``, either as a
+    payload or, when the subtree turns out to be under both thresholds,
+    directly into ``usd_stage``.
+
+    Groups whose flattened points cannot reach ``payload_min_vertices`` are
+    rejected up front. The others are converted into an in-memory stage
+    first, nothing is written for groups that turn out to be light. A heavy group whose own
+    child groups are heavy stays inline and payloads those instead, so a
+    wrapper ``<g>`` does not turn the whole document into one payload.
+
+    Returns True when the children have been converted, in which case they
+    must not be converted again.
+    """
+    global _active
+
+    min_prims = conversion_options["payload_min_prims"]
+    min_vertices = conversion_options["payload_min_vertices"]
+
+    num_prims = shards.subtree_size(svg_element) - 1
+    if num_prims == 0:
+        return False
+    heavy_prims = min_prims > 0 and num_prims >= min_prims
+    if not heavy_prims and (
+        min_vertices <= 0 or not _could_be_heavy(svg_element, min_vertices)
+    ):
+        # Cheap rejection, before converting anything.
+        return False
+    if _has_heavy_group(svg_element, min_prims):
+        # Converted inline, the child groups decide for themselves.
+        return False
+
+    prim_path = usd_xform.GetPath()
+    src_stage = Usd.Stage.CreateInMemory()
+    src_xform = UsdGeom.Xform.Define(src_stage, prim_path)
+
+    _active = True
+    try:
+        common.handle_svg_root(src_stage, svg_element, src_xform)
+    finally:
+        _active = False
+
+    num_vertices = _count_vertices(src_xform.GetPrim())
+    heavy = heavy_prims or (min_vertices > 0 and num_vertices >= min_vertices)
+
+    if not heavy:
+        # Under both thresholds, keep the already converted children inline.
+        prototypes.copy_prototypes(src_stage, usd_stage)
+        for child in src_xform.GetPrim().GetChildren():
+            _copy_inline(src_stage.GetRootLayer(), usd_stage, child.GetPath())
+        return True
+
+    _place(src_stage, usd_stage, prim_path, min_vertices)
+    return True
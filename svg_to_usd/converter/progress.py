@@ -0,0 +1,58 @@
+""" Progress reporting for long conversions.
+
+``convert`` and ``convert_new`` take a ``progress`` callback, called as
+``progress(processed, total, stage, element_id)``. ``total`` is the node
+count of the document, known once it is parsed, and ``processed`` counts
+the elements converted or skipped so far. ``stage`` is one of ``"parse"``,
+``"preprocess"``, ``"cull"``, ``"convert"`` and ``"save"``, and
+``element_id`` the id of the element being converted, or None.
+
+The callback runs on every stage change, at most every
+``progress_interval`` seconds in between, and once at the end with
+``processed == total``. Returning True cancels the conversion: it stops
+before the next element with ``ConversionCancelled``, and nothing it has
+written is kept.
+"""
+import time
+
+from . import conversion_context, conversion_options, utils
+
+
+class Progress(object):
+    """ Throttles the progress callback of the running conversion. """
+
+    def __init__(self, callback, interval=None):
+        self.callback = callback
+        self.interval = (
+            conversion_options["progress_interval"] if interval is None else interval
+        )
+        self.total = 0
+        self.processed = 0
+        self.stage_name = None
+        self.cancelled = False
+        self._next_report = 0.0
+
+    def stage(self, name):
+        self.stage_name = name
+        self.report()
+
+    def advance(self, svg_element=None, count=1):
+        self.processed += count
+        if time.monotonic() >= self._next_report:
+            self.report(svg_element)
+
+    def finish(self):
+        self.processed = self.total
+        self.report()
+
+    def report(self, svg_element=None):
+        self._next_report = time.monotonic() + self.interval
+        element_id = None if svg_element is None else utils.get_id(svg_element)
+        processed = min(self.processed, self.total)
+        if self.callback(processed, self.total, self.stage_name, element_id) is True:
+            self.cancelled = True
+
+
+def current():
+    """ The ``Progress`` of the running conversion, or None. """
+    return conversion_context.get("progress")
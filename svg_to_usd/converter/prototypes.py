@@ -0,0 +1,113 @@
+""" Prototypes for ``<use>`` references.
+
+Every element referenced by a ``<use>`` is converted once, below the
+``/prototypes`` class prim, and each ``<use>`` becomes an instanceable
+internal reference to it. Class prims are abstract, so the prototypes
+themselves are not rendered and only cost one copy of their geometry no
+matter how many times they are used.
+"""
+import logging
+
+from pxr import Sdf, UsdGeom
+
+from . import common, payloads, utils
+from . import stats as conversion_stats
+
+SCOPE_PATH = Sdf.Path("/prototypes")
+
+# Elements whose prototype is being converted, to break reference cycles.
+_in_progress = set()
+
+
+def scope(usd_stage):
+    """ The ``/prototypes`` class prim of ``usd_stage``, created on demand. """
+    usd_prim = usd_stage.GetPrimAtPath(SCOPE_PATH)
+    if not usd_prim:
+        usd_prim = usd_stage.CreateClassPrim(SCOPE_PATH)
+    return usd_prim
+
+
+def get_prototype(usd_stage, svg_element):
+    """
+    Path of the prototype prim for ``svg_element``, converting it the first
+    time it is requested for ``usd_stage``.
+
+    Returns None if the element cannot be converted or references itself.
+    Prototypes are never payloads, they must stay next to their instances.
+    """
+    svg_id = utils.get_id(svg_element)
+    key = (usd_stage.GetRootLayer().identifier, svg_id)
+    if key in common.prototype_map:
+        return common.prototype_map[key]
+
+    if svg_element in _in_progress:
+        logging.warning("Skipping cyclic <use> reference to '{}'".format(svg_id))
+        return None
+    if svg_element not in common.parent_map:
+        logging.warning("Skipping <use> reference to the document root")
+        return None
+
+    _in_progress.add(svg_element)
+    try:
+        with payloads.suspended():
+            usd_prim = _convert(usd_stage, svg_element, svg_id)
+    finally:
+        _in_progress.discard(svg_element)
+
+    if not usd_prim:
+        return None
+
+    conversion_stats.current().count("prototypes")
+    prototype_path = usd_prim.GetPath()
+    common.prototype_map[key] = prototype_path
+    return prototype_path
+
+
+def _convert(usd_stage, svg_element, svg_id):
+    parent_prim = scope(usd_stage)
+    if svg_element.tag.rpartition("}")[-1] != "symbol":
+        return common.handle_subtree(usd_stage, svg_element, parent_prim)
+
+    # The viewBox depends on the size of each <use>, see geometry.use.
+    usd_prim = UsdGeom.Xform.Define(usd_stage, parent_prim.GetPath().AppendChild(svg_id))
+    common.handle_svg_root(usd_stage, svg_element, usd_prim)
+    utils.rollup_extents_hint(usd_prim)
+    return usd_prim
+
+
+def add_instance(usd_stage, usd_xform, prototype_path):
+    """ Author an instanceable reference to ``prototype_path`` below
+    ``usd_xform``. The transform of the ``<use>`` stays on ``usd_xform``, so it
+    does not clash with the transform of the prototype root.
+    """
+    instance_path = usd_xform.GetPath().AppendChild(prototype_path.name)
+    usd_instance = usd_stage.DefinePrim(instance_path)
+    usd_instance.GetReferences().AddInternalReference(prototype_path)
+    usd_instance.SetInstanceable(True)
+
+    extent = common.extent_map.get(prototype_path)
+    if extent is not None:
+        common.extent_map[instance_path] = extent
+    return usd_instance
+
+
+def copy_prototypes(src_stage, dst_stage):
+    """ Copy the prototypes of ``src_stage`` that ``dst_stage`` lacks, for
+    subtrees converted in a separate stage and copied back.
+    """
+    src_scope = src_stage.GetPrimAtPath(SCOPE_PATH)
+    if not src_scope:
+        return
+
+    src_layer = src_stage.GetRootLayer()
+    dst_layer = dst_stage.GetEditTarget().GetLayer()
+    src_key = src_layer.identifier
+    dst_key = dst_stage.GetRootLayer().identifier
+    scope(dst_stage)
+    for (layer_id, svg_id), prototype_path in list(common.prototype_map.items()):
+        if layer_id != src_key or prototype_path is None:
+            continue
+        if (dst_key, svg_id) in common.prototype_map:
+            continue
+        Sdf.CopySpec(src_layer, prototype_path, dst_layer, prototype_path)
+        common.prototype_map[(dst_key, svg_id)] = prototype_path
@@ -0,0 +1,129 @@
+""" Element converters by SVG tag.
+
+Maps the local name of a tag, without its namespace, to the function that
+converts elements of that tag, so ``handle_element`` finds its converter
+with a single dictionary lookup. Converters take
+``(usd_stage, prim_path, svg_element)`` and return the authored prim, or
+None when nothing was authored.
+
+Every entry has the conversion option that enables it, ``convert_rect``
+for ``rect`` and so on. The built in converters stay unimported until an
+element of their tag is converted.
+
+Other packages can add converters for more tags or replace the built in
+ones::
+
+    from svg_to_usd.converter import registry
+
+    def convert_rect(usd_stage, prim_path, svg_element):
+        ...
+
+    previous = registry.register("rect", convert_rect)
+
+Registrations live in the process that made them. Sharded, async and
+server conversions run in worker processes, which only see converters
+registered by modules they import.
+"""
+from . import conversion_options, geometry
+
+
+class Entry(object):
+    """ A registered converter and the option that enables it. """
+
+    def __init__(self, tag, convert, option):
+        self.tag = tag
+        self.option = option
+        self._convert = convert
+
+    @property
+    def enabled(self):
+        return bool(conversion_options.get(self.option, True))
+
+    @property
+    def convert(self):
+        if isinstance(self._convert, str):
+            # Built in converter, named by its module in geometry
+            self._convert = getattr(geometry, self._convert).convert
+        return self._convert
+
+
+_entries = {}  # local tag name -> Entry
+
+
+def local_name(tag):
+    """ Tag name without its namespace. """
+    return tag.rpartition("}")[-1]
+
+
+def register(tag, convert, option=None):
+    """
+    Convert elements with the local name ``tag`` with ``convert``.
+
+    Parameters
+    ----------
+    tag : str
+        Local tag name, such as ``"rect"``.
+    convert : callable
+        ``convert(usd_stage, prim_path, svg_element)``.
+    option : str, optional
+        Conversion option that enables the converter, ``"convert_<tag>"``
+        by default. Options that do not exist yet are added, enabled.
+
+    Returns
+    -------
+    The converter previously registered for ``tag``, or None.
+    """
+    previous = _entries.get(tag)
+    option = option or "convert_" + tag
+    conversion_options.setdefault(option, True)
+    _entries[tag] = Entry(tag, convert, option)
+    return previous.convert if previous else None
+
+
+def unregister(tag):
+    """ Stop converting elements of ``tag``. """
+    _entries.pop(tag, None)
+
+
+def entry(tag):
+    """ The ``Entry`` of a local tag name, or None. """
+    return _entries.get(tag)
+
+
+def lookup(svg_element):
+    """ The converter for ``svg_element``, or None if its tag has none or
+    its option disables it.
+    """
+    found = _entries.get(local_name(svg_element.tag))
+    if found is None or not found.enabled:
+        return None
+    return found.convert
+
+
+def tags():
+    return sorted(_entries)
+
+
+def _convert_text(usd_stage, prim_path, svg_element):
+    return geometry.text.convert(
+        usd_stage,
+        prim_path,
+        svg_element,
+        fallback_font=conversion_options["fallback_font"],
+        type=conversion_options["text_type"],
+    )
+
+
+for _tag, _convert, _option in (
+    ("rect", "rect", None),
+    ("circle", "circle", None),
+    ("ellipse", "ellipse", None),
+    ("line", "line", None),
+    ("path", "path", None),
+    ("polygon", "polygon", None),
+    ("polyline", "polyline", None),
+    ("text", _convert_text, None),
+    ("g", "group", "convert_group"),
+    ("use", "use", None),
+):
+    register(_tag, _convert, _option)
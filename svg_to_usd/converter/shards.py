@@ -0,0 +1,134 @@
+""" Partitioning of a document into shard layers.
+
+Large documents can be written as several sublayer files ("shards"), each
+holding the prims of a contiguous run of top-level SVG elements. Shards are
+converted and saved by separate worker processes and stitched together by a
+small root layer. Every shard is a complete layer that can also be opened on
+its own.
+"""
+import os
+
+
+def subtree_size(svg_element):
+    return sum(1 for _ in svg_element.iter())
+
+
+def partition(root, shard_by="group", shard_size=1000):
+    """
+    Split the top-level children of ``root`` into shards.
+
+    Parameters
+    ----------
+    root : xml_element
+        The svg root element.
+    shard_by : str
+        ``"group"`` gives every top-level ``<g>`` its own shard and batches
+        the remaining top-level elements up to ``shard_size`` elements per
+        shard. ``"count"`` packs consecutive top-level elements until a shard
+        holds at least ``shard_size`` elements.
+    shard_size : int
+        Element count per shard, counting whole subtrees.
+
+    Returns
+    -------
+    shards : list
+        Lists of top-level child indices, in document order.
+    """
+    shards = []
+    current = []
+    current_size = 0
+
+    def flush():
+        if current:
+            shards.append(list(current))
+            del current[:]
+
+    for index, svg_element in enumerate(root):
+        size = subtree_size(svg_element)
+
+        if shard_by == "group" and svg_element.tag.rpartition("}")[-1] == "g":
+            flush()
+            current_size = 0
+            shards.append([index])
+            continue
+
+        current.append(index)
+        current_size += size
+        if current_size >= shard_size:
+            flush()
+            current_size = 0
+
+    flush()
+    return shards
+
+
+def split(root, size, whole=()):
+    """
+    Split the document into chunks of about ``size`` elements for streamed
+    output. Like ``partition`` with ``"count"``, but a ``<g>`` over ``size``
+    elements is split too, its children are packed instead, recursively.
+    Documents wrapped in a single group, like every Inkscape layer, still
+    come out in small chunks. Elements in ``whole`` are never split.
+
+    Returns
+    -------
+    chunks : list
+        Lists of ``(svg_element, groups)`` pairs, in document order.
+        ``groups`` are the split ``<g>`` ancestors of ``svg_element``,
+        outermost first.
+    """
+    chunks = []
+    current = []
+    current_size = 0
+
+    def visit(parent, groups):
+        nonlocal current, current_size
+        for svg_element in parent:
+            element_size = subtree_size(svg_element)
+            if (
+                element_size > size
+                and len(svg_element)
+                and svg_element.tag.rpartition("}")[-1] == "g"
+                and svg_element not in whole
+            ):
+                visit(svg_element, groups + (svg_element,))
+                continue
+
+            current.append((svg_element, groups))
+            current_size += element_size
+            if current_size >= size:
+                chunks.append(current)
+                current = []
+                current_size = 0
+
+    visit(root, ())
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def shard_paths(usd_path, count, kind="shard"):
+    """ File paths for ``count`` shards of ``usd_path``, next to it in a
+    ``<name>_<kind>s`` directory.
+    """
+    directory, filename = os.path.split(usd_path)
+    name, ext = os.path.splitext(filename)
+    shard_dir = os.path.join(directory, "{}_{}s".format(name, kind))
+    return [
+        os.path.join(shard_dir, "{}_{:04d}{}".format(kind, i, ext)) for i in range(count)
+    ]
+
+
+def stitch(usd_stage, paths):
+    """ Add ``paths`` as sublayers of the stage root layer, using paths
+    relative to the root layer.
+    """
+    root_layer = usd_stage.GetRootLayer()
+    root_dir = os.path.dirname(os.path.abspath(root_layer.realPath))
+    # Shards hold disjoint prims, so strength order does not matter. Root prim
+    # order is composed from the weakest layer up though, so the first shard
+    # goes last to keep the document order.
+    root_layer.subLayerPaths = [
+        "./" + os.path.relpath(os.path.abspath(p), root_dir).replace(os.sep, "/")
+        for p in reversed(paths)
+    ]
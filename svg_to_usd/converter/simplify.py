@@ -0,0 +1,177 @@
+""" Vertex reduction of flattened paths, polygons and polylines.
+
+With the ``simplify_tolerance`` option, vertices that lie within that
+distance (in user units of the element) of the simplified outline are
+dropped before tessellation: collinear runs, jitter below the tolerance
+and repeated points. Every subpath keeps its first and last vertex, so
+closed subpaths keep their closing edge, and subpaths that would collapse
+below three vertices are left alone.
+
+The Douglas-Peucker splits run for all subpaths of an element at once, one
+NumPy pass per level of recursion. Long polylines are split into runs of
+a few thousand vertices first, which bounds the depth of the recursion.
+"""
+import numpy as np
+
+from . import conversion_options, svgpath
+from . import stats as conversion_stats
+
+# Most vertices between two vertices that are always kept
+_CHUNK = 4096
+# Largest input simplified without NumPy
+_SMALL = 256
+
+
+def douglas_peucker(vertices, offsets, tolerance):
+    """
+    Douglas-Peucker simplification of polylines stored back to back.
+
+    Parameters
+    ----------
+    vertices : numpy.ndarray
+        (N, 2) vertices of every polyline.
+    offsets : numpy.ndarray
+        Polyline ``i`` spans ``vertices[offsets[i]:offsets[i + 1]]``.
+    tolerance : float
+        Largest distance of a dropped vertex from the simplified polyline.
+
+    Returns
+    -------
+    keep : numpy.ndarray
+        Boolean mask of the vertices to keep.
+    """
+    starts, ends = offsets[:-1], offsets[1:]
+    starts, ends = starts[ends > starts], ends[ends > starts]
+    keep = np.zeros(len(vertices), dtype=bool)
+    keep[starts] = True
+    keep[ends - 1] = True
+
+    # Anchor long polylines every _CHUNK vertices, noisy input otherwise
+    # splits one vertex at a time for thousands of passes.
+    local = np.arange(len(vertices)) - np.repeat(starts, ends - starts)
+    keep |= local % _CHUNK == 0
+    kept = np.flatnonzero(keep)
+    within = ~np.isin(kept[1:], starts)
+    first, last = kept[:-1][within], kept[1:][within]
+    if len(vertices) <= _SMALL:
+        _split_each(vertices, first, last, tolerance, keep)
+    else:
+        _split_batched(vertices, first, last, tolerance, keep)
+
+    # Keep polygons that would degenerate as they are.
+    counts = np.add.reduceat(keep, starts)
+    collapsed = (counts < 3) & (ends - starts >= 3)
+    if collapsed.any():
+        sizes = (ends - starts)[collapsed]
+        shift = starts[collapsed] - (np.cumsum(sizes) - sizes)
+        keep[np.arange(sizes.sum()) + np.repeat(shift, sizes)] = True
+    return keep
+
+
+def _split_batched(vertices, first, last, tolerance, keep):
+    """ Keep the farthest vertex of every range ``first[i]..last[i]``
+    farther than ``tolerance`` and split the range there, all ranges at a
+    time.
+    """
+    while True:
+        # Ranges between two kept vertices, with vertices left to decide
+        inside = last - first > 1
+        first, last = first[inside], last[inside]
+        if not len(first):
+            break
+
+        sizes = last - first - 1
+        range_starts = np.cumsum(sizes) - sizes
+        owner = np.repeat(np.arange(len(first)), sizes)
+        index = np.arange(sizes.sum()) + np.repeat(first + 1 - range_starts, sizes)
+
+        a = vertices[first][owner]
+        ab = vertices[last][owner] - a
+        ap = vertices[index] - a
+        length = np.einsum("ij,ij->i", ab, ab)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            t = np.where(length > 0.0, np.einsum("ij,ij->i", ap, ab) / length, 0.0)
+        offset = ap - ab * np.clip(t, 0.0, 1.0)[:, None]
+        distance = np.einsum("ij,ij->i", offset, offset)
+
+        largest = np.maximum.reduceat(distance, range_starts)
+        hits = np.flatnonzero(distance == largest[owner])
+        first_hit = np.flatnonzero(np.diff(owner[hits], prepend=-1))
+        farthest = index[hits[first_hit]]
+
+        split = largest > tolerance * tolerance
+        farthest = farthest[split]
+        keep[farthest] = True
+        first, last = (
+            np.concatenate([first[split], farthest]),
+            np.concatenate([farthest, last[split]]),
+        )
+
+
+def _split_each(vertices, first, last, tolerance, keep):
+    """ ``_split_batched`` one range at a time, NumPy calls cost more than
+    they save on a few dozen vertices.
+    """
+    points = vertices.tolist()
+    tolerance = tolerance * tolerance
+    ranges = list(zip(first.tolist(), last.tolist()))
+    while ranges:
+        first, last = ranges.pop()
+        if last - first < 2:
+            continue
+        ax, ay = points[first]
+        bx, by = points[last]
+        abx, aby = bx - ax, by - ay
+        length = abx * abx + aby * aby
+        largest, farthest = -1.0, first
+        for i in range(first + 1, last):
+            apx, apy = points[i][0] - ax, points[i][1] - ay
+            t = (apx * abx + apy * aby) / length if length > 0.0 else 0.0
+            if t < 0.0:
+                t = 0.0
+            elif t > 1.0:
+                t = 1.0
+            x, y = apx - abx * t, apy - aby * t
+            distance = x * x + y * y
+            if distance > largest:
+                largest, farthest = distance, i
+        if largest > tolerance:
+            keep[farthest] = True
+            ranges.append((first, farthest))
+            ranges.append((farthest, last))
+
+
+def polylines(vertices, offsets, tolerance=None):
+    """
+    Simplify polylines stored back to back, see ``douglas_peucker``.
+
+    Returns the kept vertices and their offsets. ``tolerance`` defaults to
+    the ``simplify_tolerance`` conversion option, with 0 nothing is dropped.
+    """
+    if tolerance is None:
+        tolerance = conversion_options["simplify_tolerance"]
+    if not tolerance or len(vertices) < 3:
+        return vertices, offsets
+
+    stats = conversion_stats.current()
+    with stats.stage("simplify"):
+        keep = douglas_peucker(vertices, offsets, tolerance)
+        kept = np.concatenate([[0], np.cumsum(keep)])
+        vertices, offsets = vertices[keep], kept[offsets]
+    stats.count("simplify_vertices_in", len(keep))
+    stats.count("simplify_vertices_out", len(vertices))
+    return vertices, offsets
+
+
+def path(svg_path, tolerance=None):
+    """ A simplified copy of an ``svgpath.Path``. """
+    vertices, offsets = polylines(svg_path.vertices, svg_path.offsets, tolerance)
+    if vertices is svg_path.vertices:
+        return svg_path
+    return svgpath.Path(vertices, offsets, svg_path.closed)
+
+
+def points(svg_points, tolerance=None):
+    """ Simplify the (N, 2) points of a single polygon or polyline. """
+    offsets = np.array([0, len(svg_points)])
+    return polylines(svg_points, offsets, tolerance)[0]
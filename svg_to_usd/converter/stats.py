@@ -0,0 +1,209 @@
+""" Conversion statistics.
+
+A ``ConversionStats`` instance collects per-stage timings, per-tag element,
+vertex and face counts and the slowest elements of a conversion. It is made
+available to the converters through ``conversion_context["stats"]``. When no
+statistics are requested the shared ``NULL_STATS`` object is used instead,
+whose methods do nothing, so instrumented code costs a method call at most.
+"""
+import heapq
+import json
+import time
+
+from pxr import Usd, UsdGeom
+
+from . import conversion_context
+
+
+class _StageTimer(object):
+    __slots__ = ("stats", "name", "start")
+
+    def __init__(self, stats, name):
+        self.stats = stats
+        self.name = name
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stats.add_time(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class _NullTimer(object):
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class NullStats(object):
+    """ Disabled statistics. Every method is a no-op. """
+
+    enabled = False
+
+    def stage(self, name):
+        return _NULL_TIMER
+
+    def add_time(self, name, seconds):
+        pass
+
+    def count(self, name, value=1):
+        pass
+
+    def record_element(self, tag, element_id, seconds, usd_prim):
+        pass
+
+
+NULL_STATS = NullStats()
+
+
+class ConversionStats(object):
+    """ Timings and counts collected during a conversion.
+
+    Parameters
+    ----------
+    slowest : int
+        Number of slowest elements to keep.
+    """
+
+    enabled = True
+
+    def __init__(self, slowest=10):
+        self.slowest_count = slowest
+        self.stages = {}
+        self.tags = {}
+        self.counters = {}
+        self._slowest = []
+        self._sequence = 0
+
+    def stage(self, name):
+        """ Context manager adding the time spent inside it to stage ``name``. """
+        return _StageTimer(self, name)
+
+    def add_time(self, name, seconds):
+        stage = self.stages.get(name)
+        if stage is None:
+            stage = self.stages[name] = {"seconds": 0.0, "calls": 0}
+        stage["seconds"] += seconds
+        stage["calls"] += 1
+
+    def count(self, name, value=1):
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def record_element(self, tag, element_id, seconds, usd_prim):
+        """ Account for one converted element and the prims it authored. """
+        entry = self.tags.get(tag)
+        if entry is None:
+            entry = self.tags[tag] = {
+                "elements": 0,
+                "vertices": 0,
+                "faces": 0,
+                "seconds": 0.0,
+            }
+        entry["elements"] += 1
+        entry["seconds"] += seconds
+
+        if usd_prim:
+            vertices, faces = count_geometry(usd_prim.GetPrim())
+            entry["vertices"] += vertices
+            entry["faces"] += faces
+
+        # The sequence number keeps heap entries with equal times orderable.
+        self._sequence += 1
+        item = (seconds, self._sequence, element_id, tag)
+        if len(self._slowest) < self.slowest_count:
+            heapq.heappush(self._slowest, item)
+        elif self._slowest and seconds > self._slowest[0][0]:
+            heapq.heapreplace(self._slowest, item)
+
+    def merge(self, other):
+        """ Add the statistics of ``other`` (a ``ConversionStats`` or the
+        dict returned by ``to_dict``) to this instance.
+        """
+        if isinstance(other, ConversionStats):
+            other = other.to_dict()
+        if not other:
+            return
+
+        for name, stage in other["stages"].items():
+            mine = self.stages.setdefault(name, {"seconds": 0.0, "calls": 0})
+            mine["seconds"] += stage["seconds"]
+            mine["calls"] += stage["calls"]
+        for tag, entry in other["tags"].items():
+            mine = self.tags.setdefault(
+                tag, {"elements": 0, "vertices": 0, "faces": 0, "seconds": 0.0}
+            )
+            for key in mine:
+                mine[key] += entry[key]
+        for name, value in other["counters"].items():
+            self.count(name, value)
+        for item in other["slowest"]:
+            self._sequence += 1
+            heapq.heappush(
+                self._slowest, (item["seconds"], self._sequence, item["id"], item["tag"])
+            )
+        while len(self._slowest) > self.slowest_count:
+            heapq.heappop(self._slowest)
+
+    @property
+    def slowest(self):
+        return [
+            {"id": element_id, "tag": tag, "seconds": seconds}
+            for seconds, _, element_id, tag in sorted(self._slowest, reverse=True)
+        ]
+
+    def to_dict(self):
+        return {
+            "stages": self.stages,
+            "tags": self.tags,
+            "slowest": self.slowest,
+            "counters": self.counters,
+            "totals": {
+                "elements": sum(t["elements"] for t in self.tags.values()),
+                "vertices": sum(t["vertices"] for t in self.tags.values()),
+                "faces": sum(t["faces"] for t in self.tags.values()),
+            },
+        }
+
+    def to_json(self, path=None, indent=2):
+        text = json.dumps(self.to_dict(), indent=indent, sort_keys=True)
+        if path:
+            with open(path, "w") as fh:
+                fh.write(text + "\n")
+        return text
+
+
+def count_geometry(prim):
+    """ Return ``(vertices, faces)`` authored on ``prim`` and its descendants.
+    Curves count one face per curve.
+    """
+    vertices = 0
+    faces = 0
+    for descendant in Usd.PrimRange(prim):
+        if descendant.IsA(UsdGeom.PointBased):
+            points = UsdGeom.PointBased(descendant).GetPointsAttr().Get()
+            if points:
+                vertices += len(points)
+        if descendant.IsA(UsdGeom.Mesh):
+            counts = UsdGeom.Mesh(descendant).GetFaceVertexCountsAttr().Get()
+        elif descendant.IsA(UsdGeom.Curves):
+            counts = UsdGeom.Curves(descendant).GetCurveVertexCountsAttr().Get()
+        else:
+            counts = None
+        if counts:
+            faces += len(counts)
+    return vertices, faces
+
+
+def current():
+    """ The statistics object of the running conversion. """
+    return conversion_context.get("stats") or NULL_STATS
@@ -0,0 +1,440 @@
+""" Stroke outlines as meshes.
+
+With the ``stroke_to_mesh`` option, strokes are tessellated into ribbon
+meshes instead of being authored as ``BasisCurves`` with widths, for
+consumers that cannot render wide curves. Each segment of a polyline becomes
+a quad, and joins (miter, round, bevel) and caps (butt, round, square) are
+computed for every vertex of every polyline of an element in one batch of
+NumPy operations. ``stroke-dasharray`` splits the polylines into dashes
+first.
+
+Every face owns its vertices and the pieces overlap at the joins, which is
+invisible for opaque strokes.
+
+Gprims cannot nest, so a shape with both a fill and a stroke becomes an
+Xform carrying its transform, with ``fill`` and ``outline`` meshes below it.
+"""
+import numpy as np
+
+from pxr import Sdf, UsdGeom, Vt
+
+from . import common, utils, conversion_options
+from . import stats as conversion_stats
+
+_EPSILON = 1e-9
+
+
+def _float(value, default):
+    try:
+        return float(str(value).replace("px", ""))
+    except (TypeError, ValueError):
+        return default
+
+
+def _parse_dasharray(value):
+    if not value or value.strip() == "none":
+        return None
+    try:
+        dashes = [float(v.replace("px", "")) for v in value.replace(",", " ").split()]
+    except ValueError:
+        return None
+    if not dashes or any(d < 0 for d in dashes) or sum(dashes) <= 0:
+        return None
+    if len(dashes) % 2:
+        dashes = dashes * 2
+    return dashes
+
+
+def stroke_style(element_attributes, required=True):
+    """
+    The stroke properties of an element.
+
+    Returns None if ``required`` and the element has no visible stroke.
+    Otherwise ``"stroke"`` may be None, for elements drawn as lines anyway.
+    """
+    stroke = element_attributes.get("stroke")
+    if not stroke or stroke == "none":
+        if required:
+            return None
+        stroke = None
+
+    width = _float(element_attributes.get("stroke-width"), 1.0)
+    if width <= 0.0:
+        return None
+
+    return {
+        "stroke": stroke,
+        "width": width,
+        "join": element_attributes.get("stroke-linejoin", "miter"),
+        "cap": element_attributes.get("stroke-linecap", "butt"),
+        "miter_limit": max(_float(element_attributes.get("stroke-miterlimit"), 4.0), 1.0),
+        "dasharray": _parse_dasharray(element_attributes.get("stroke-dasharray")),
+        "dashoffset": _float(element_attributes.get("stroke-dashoffset"), 0.0),
+    }
+
+
+def _clean(points, closed):
+    """ Drop repeated points, and the closing point of closed polylines. """
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    if len(points) > 1:
+        keep = np.ones(len(points), dtype=bool)
+        keep[1:] = np.any(np.abs(np.diff(points, axis=0)) > _EPSILON, axis=1)
+        points = points[keep]
+    if closed and len(points) > 2 and np.all(np.abs(points[0] - points[-1]) <= _EPSILON):
+        points = points[:-1]
+    return points
+
+
+def _dash(points, closed, dasharray, dashoffset):
+    """ Split a polyline into open dashes along its arc length.
+
+    Returns the dashes concatenated, as (points, counts).
+    """
+    if closed:
+        points = np.vstack([points, points[:1]])
+    lengths = np.linalg.norm(np.diff(points, axis=0), axis=1)
+    distance = np.concatenate([[0.0], np.cumsum(lengths)])
+    total = distance[-1]
+
+    pattern = np.asarray(dasharray)
+    period = pattern.sum()
+    bounds = np.concatenate([[0.0], np.cumsum(pattern)])
+    offset = dashoffset % period
+    repeats = int(np.ceil((total + offset) / period)) + 1
+
+    starts = (np.arange(repeats)[:, None] * period + bounds[0:-1:2] - offset).ravel()
+    ends = starts + np.tile(pattern[0::2], repeats)
+    starts = np.clip(starts, 0.0, total)
+    ends = np.clip(ends, 0.0, total)
+    keep = ends - starts > _EPSILON
+    starts, ends = starts[keep], ends[keep]
+
+    # Each dash is its interpolated end points around the vertices between.
+    first = np.searchsorted(distance, starts, side="right")
+    last = np.searchsorted(distance, ends, side="left")
+    counts = last - first + 2
+    dash = np.repeat(np.arange(len(counts)), counts)
+    local = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+
+    verts = points[np.clip(first[dash] + local - 1, 0, len(points) - 1)]
+    for local_index, at in ((local == 0, starts), (local == counts[dash] - 1, ends)):
+        along = at[dash[local_index]]
+        verts[local_index, 0] = np.interp(along, distance, points[:, 0])
+        verts[local_index, 1] = np.interp(along, distance, points[:, 1])
+    return verts, counts
+
+
+def _fans(centers, start_angles, sweeps, radius, step):
+    """ One polygon per center: the center followed by an arc of ``radius``
+    from ``start_angles`` over ``sweeps``, with at most ``step`` radians
+    between arc points.
+    """
+    segments = np.maximum(1, np.ceil(np.abs(sweeps) / step - _EPSILON)).astype(int)
+    counts = segments + 2
+    fan = np.repeat(np.arange(len(centers)), counts)
+    local = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+
+    angles = start_angles[fan] + sweeps[fan] * (local - 1) / segments[fan]
+    verts = centers[fan] + radius * np.stack([np.cos(angles), np.sin(angles)], axis=1)
+    is_center = local == 0
+    verts[is_center] = centers[fan[is_center]]
+    return verts, counts
+
+
+def _dots(points, style, step):
+    """ Zero length strokes, only visible with round or square caps. """
+    half = style["width"] * 0.5
+    if style["cap"] == "round":
+        return [_fans(points, np.zeros(len(points)), np.full(len(points), 2 * np.pi), half, step)]
+    if style["cap"] == "square":
+        corners = np.array([[-1, -1], [1, -1], [1, 1], [-1, 1]]) * half
+        faces = points[:, None, :] + corners
+        return [(faces.reshape(-1, 2), np.full(len(points), 4))]
+    return []
+
+
+def _stroke(verts, counts, closed, style, step):
+    """
+    Faces of many polylines at once, as (vertices, counts) parts.
+
+    ``verts`` holds the points of every polyline one after the other,
+    ``counts`` their point counts (at least 2) and ``closed`` their closed
+    flags (only for at least 3 points).
+    """
+    half = style["width"] * 0.5
+    cap = style["cap"]
+    parts = []
+
+    starts = np.cumsum(counts) - counts
+    last_points = starts + counts - 1
+    poly = np.repeat(np.arange(len(counts)), counts)
+
+    # - Segments, from every point but the last of open polylines
+    segment_starts = np.ones(len(verts), dtype=bool)
+    segment_starts[last_points[~closed]] = False
+    a_index = np.flatnonzero(segment_starts)
+    segment_poly = poly[a_index]
+    b_index = np.where(
+        a_index == last_points[segment_poly], starts[segment_poly], a_index + 1
+    )
+    a = verts[a_index]
+    b = verts[b_index]
+
+    direction = b - a
+    tangents = direction / np.linalg.norm(direction, axis=1)[:, None]
+    normals = np.stack([-tangents[:, 1], tangents[:, 0]], axis=1)
+
+    segment_counts = counts - 1 + closed
+    first_segments = np.cumsum(segment_counts) - segment_counts
+    last_segments = first_segments + segment_counts - 1
+    open_first = first_segments[~closed]
+    open_last = last_segments[~closed]
+
+    if cap == "square":
+        a[open_first] -= half * tangents[open_first]
+        b[open_last] += half * tangents[open_last]
+
+    offsets = half * normals
+    quads = np.stack([a + offsets, a - offsets, b - offsets, b + offsets], axis=1)
+    parts.append((quads.reshape(-1, 2), np.full(len(quads), 4)))
+
+    # - Joins, between the incoming (0) and outgoing (1) segment of a vertex
+    previous = np.arange(len(a)) - 1
+    previous[first_segments] = last_segments
+    has_join = np.ones(len(a), dtype=bool)
+    has_join[open_first] = False
+    s1 = np.flatnonzero(has_join)
+    s0 = previous[s1]
+    t0, n0, t1, n1 = tangents[s0], normals[s0], tangents[s1], normals[s1]
+    centers = a[s1]
+
+    cross = t0[:, 0] * t1[:, 1] - t0[:, 1] * t1[:, 0]
+    dot = np.einsum("ij,ij->i", t0, t1)
+    turning = (np.abs(cross) > _EPSILON) | (dot < 0.0)
+    if np.any(turning):
+        centers, cross, dot = centers[turning], cross[turning], dot[turning]
+        n0, n1 = n0[turning], n1[turning]
+
+        # The outer side of the turn, where the segment quads leave a gap.
+        side = np.where(cross > 0.0, -half, half)[:, None]
+        outer0 = side * n0
+        outer1 = side * n1
+
+        join = style["join"]
+        if join == "round":
+            start = np.arctan2(outer0[:, 1], outer0[:, 0])
+            sweep = np.arctan2(
+                outer0[:, 0] * outer1[:, 1] - outer0[:, 1] * outer1[:, 0],
+                np.einsum("ij,ij->i", outer0, outer1),
+            )
+            parts.append(_fans(centers, start, sweep, half, step))
+        else:
+            miter = np.zeros(len(centers), dtype=bool)
+            if join in ("miter", "miter-clip", "arcs"):
+                # Miter length over stroke width is 1 / sin(theta / 2).
+                with np.errstate(divide="ignore", invalid="ignore"):
+                    ratio = np.sqrt(2.0 / np.maximum(1.0 + dot, 0.0))
+                miter = (1.0 + dot > _EPSILON) & (ratio <= style["miter_limit"])
+
+            if np.any(miter):
+                tips = centers[miter] + (outer0[miter] + outer1[miter]) / (
+                    1.0 + dot[miter]
+                )[:, None]
+                faces = np.stack(
+                    [
+                        centers[miter],
+                        centers[miter] + outer0[miter],
+                        tips,
+                        centers[miter] + outer1[miter],
+                    ],
+                    axis=1,
+                )
+                parts.append((faces.reshape(-1, 2), np.full(len(faces), 4)))
+
+            bevel = ~miter
+            if np.any(bevel):
+                faces = np.stack(
+                    [
+                        centers[bevel],
+                        centers[bevel] + outer0[bevel],
+                        centers[bevel] + outer1[bevel],
+                    ],
+                    axis=1,
+                )
+                parts.append((faces.reshape(-1, 2), np.full(len(faces), 3)))
+
+    # - Caps
+    if cap == "round" and len(open_first):
+        ends = np.concatenate([a[open_first], b[open_last]])
+        start_normals = np.concatenate([normals[open_first], -normals[open_last]])
+        start = np.arctan2(start_normals[:, 1], start_normals[:, 0])
+        parts.append(_fans(ends, start, np.full(len(ends), np.pi), half, step))
+
+    return parts
+
+
+def _orient(verts, counts):
+    """ Face vertex indices, every face wound like the fill meshes
+    (clockwise with SVG's y axis pointing up).
+    """
+    starts = np.cumsum(counts) - counts
+    face = np.repeat(np.arange(len(counts)), counts)
+    local = np.arange(len(verts)) - starts[face]
+
+    following = np.arange(1, len(verts) + 1)
+    following[starts + counts - 1] = starts
+    x, y = verts[:, 0], verts[:, 1]
+    area = np.add.reduceat(x * y[following] - x[following] * y, starts)
+
+    flip = (area > 0.0)[face]
+    return np.where(flip, starts[face] + counts[face] - 1 - local, np.arange(len(verts)))
+
+
+def outline(polylines, style):
+    """
+    Tessellate the stroke of ``polylines``.
+
+    Parameters
+    ----------
+    polylines : list
+        ``(points, closed)`` pairs, points being (N, 2) SVG coordinates.
+    style : dict
+        As returned by ``stroke_style``.
+
+    Returns
+    -------
+    points, face_vertex_indices, face_vertex_counts : numpy.ndarray
+        The outline in SVG coordinates.
+    """
+    step = 2.0 * np.pi / max(conversion_options["curve_resolution"], 3)
+
+    # Gather every polyline, or dash, into one batch.
+    lines, counts, closed_flags, dots = [], [], [], []
+    for points, closed in polylines:
+        points = _clean(points, closed)
+        if len(points) == 1:
+            dots.append(points)
+            continue
+        if len(points) < 2:
+            continue
+        closed = closed and len(points) > 2
+        if style["dasharray"]:
+            dash_points, dash_counts = _dash(
+                points, closed, style["dasharray"], style["dashoffset"]
+            )
+            lines.append(dash_points)
+            counts.append(dash_counts)
+            closed_flags.append(np.zeros(len(dash_counts), dtype=bool))
+        else:
+            lines.append(points)
+            counts.append([len(points)])
+            closed_flags.append([closed])
+
+    parts = []
+    if lines:
+        parts += _stroke(
+            np.concatenate(lines),
+            np.concatenate(counts).astype(int),
+            np.concatenate(closed_flags).astype(bool),
+            style,
+            step,
+        )
+    if dots:
+        parts += _dots(np.concatenate(dots), style, step)
+
+    if not parts:
+        return np.zeros((0, 2)), np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.int32)
+    verts = np.concatenate([p[0] for p in parts])
+    face_counts = np.concatenate([p[1] for p in parts])
+    return verts, _orient(verts, face_counts).astype(np.int32), face_counts.astype(np.int32)
+
+
+def author_ribbon(usd_mesh, polylines, style):
+    """ Author the outline of ``polylines`` as the geometry of ``usd_mesh``. """
+    with conversion_stats.current().stage("stroke"):
+        svg_points, usd_fvi, usd_fvc = outline(polylines, style)
+        utils.author_mesh(
+            usd_mesh,
+            utils.convert_positions(svg_points),
+            Vt.IntArray.FromNumpy(usd_fvi),
+            Vt.IntArray.FromNumpy(usd_fvc),
+        )
+
+    usd_mesh.CreateNormalsAttr().Set([utils.default_normal()] * len(usd_fvc))
+    usd_mesh.SetNormalsInterpolation(UsdGeom.Tokens.uniform)
+    usd_mesh.CreateSubdivisionSchemeAttr().Set(UsdGeom.Tokens.none)
+
+    if style["stroke"] and "url(" not in style["stroke"]:
+        usd_mesh.CreateDisplayColorPrimvar(UsdGeom.Tokens.constant).Set(
+            [utils.convert_color(style["stroke"])]
+        )
+    return usd_mesh
+
+
+def _face_rings(usd_mesh):
+    points = np.asarray(usd_mesh.GetPointsAttr().Get(), dtype=np.float64).reshape(-1, 3)
+    svg_points = points @ utils.position_basis().T
+    indices = np.asarray(usd_mesh.GetFaceVertexIndicesAttr().Get())
+    counts = np.asarray(usd_mesh.GetFaceVertexCountsAttr().Get())
+    return [(svg_points[face], True) for face in np.split(indices, np.cumsum(counts)[:-1])]
+
+
+def author_outline(usd_stage, usd_mesh, element_attributes, polylines=None):
+    """
+    Add the stroke of a filled element as an ``outline`` mesh next to its
+    fill, see ``split_fill``.
+
+    Without a fill the element itself becomes the outline. ``polylines``
+    defaults to the face loops of ``usd_mesh``. Does nothing unless
+    ``stroke_to_mesh`` is enabled and the element has a stroke.
+
+    Returns the prim of the element, ``usd_mesh`` or the Xform that now
+    holds the fill and the outline.
+    """
+    if not conversion_options["stroke_to_mesh"]:
+        return usd_mesh
+    style = stroke_style(element_attributes)
+    if style is None:
+        return usd_mesh
+    if polylines is None:
+        polylines = _face_rings(usd_mesh)
+
+    if element_attributes.get("fill") == "none":
+        # Texture coordinates of the fill do not match the outline points.
+        usd_mesh.GetPrim().RemoveProperty("primvars:st")
+        return author_ribbon(usd_mesh, polylines, style)
+
+    usd_xform = split_fill(usd_stage, usd_mesh)
+    usd_outline = UsdGeom.Mesh.Define(usd_stage, usd_xform.GetPath().AppendChild("outline"))
+    author_ribbon(usd_outline, polylines, style)
+    return usd_xform
+
+
+def split_fill(usd_stage, usd_mesh):
+    """
+    Turn the mesh prim ``usd_mesh`` into an Xform keeping its transform and
+    ``id``, and move everything else, including material bindings, to a
+    ``fill`` mesh below it.
+    """
+    edit_target = usd_stage.GetEditTarget()
+    layer = edit_target.GetLayer()
+    prim_path = usd_mesh.GetPath()
+    fill_path = prim_path.AppendChild("fill")
+
+    with Sdf.ChangeBlock():
+        spec = layer.GetPrimAtPath(edit_target.MapToSpecPath(prim_path))
+        fill_spec = Sdf.PrimSpec(spec, "fill", Sdf.SpecifierDef, spec.typeName)
+        for prop in list(spec.properties):
+            if prop.name == "id" or prop.name.startswith("xformOp"):
+                continue
+            Sdf.CopySpec(layer, prop.path, layer, fill_spec.path.AppendProperty(prop.name))
+            spec.RemoveProperty(prop)
+        if spec.HasInfo("apiSchemas"):
+            fill_spec.SetInfo("apiSchemas", spec.GetInfo("apiSchemas"))
+            spec.ClearInfo("apiSchemas")
+        spec.typeName = "Xform"
+
+    extent = common.extent_map.pop(prim_path, None)
+    if extent is not None:
+        common.extent_map[fill_path] = extent
+    return UsdGeom.Xform(usd_stage.GetPrimAtPath(prim_path))
@@ -0,0 +1,225 @@
+""" CSS support for ``<style>`` elements.
+
+All ``<style>`` blocks of a document are parsed once into rules that are
+indexed by the id, class or tag of their rightmost compound selector.
+``compute_styles`` then resolves the cascaded declarations of every element
+in a single pass over the tree, only testing the rules that can possibly
+match it. ``utils.parse_attributes`` layers the result between presentation
+attributes and the inline ``style`` attribute.
+
+Supported selectors are type, ``.class``, ``#id`` and ``*`` compounds joined
+by descendant (space) or child (``>``) combinators, in comma separated
+lists. Rules using anything else (attribute selectors, pseudo classes,
+sibling combinators) are ignored.
+"""
+import logging
+import re
+
+_COMMENT_RE = re.compile(r"/\*.*?\*/", re.DOTALL)
+_RULE_RE = re.compile(r"([^{}]+)\{([^{}]*)\}")
+_AT_RULE_RE = re.compile(r"@[^{};]*(;|\{(?:[^{}]*\{[^{}]*\})*[^{}]*\})")
+_COMPOUND_RE = re.compile(r"^(\*|[A-Za-z][\w-]*)?((?:[.#][\w-]+)*)$")
+_PART_RE = re.compile(r"([.#])([\w-]+)")
+_COMBINATOR_RE = re.compile(r"\s*>\s*|\s+")
+
+
+class Rule(object):
+    """ One selector of a CSS rule with its declarations. """
+
+    __slots__ = ("compounds", "combinators", "specificity", "order", "declarations", "important")
+
+    def __init__(self, compounds, combinators, order, declarations, important):
+        self.compounds = compounds
+        self.combinators = combinators
+        self.order = order
+        self.declarations = declarations
+        self.important = important
+
+        ids = classes = tags = 0
+        for tag, id_, class_list in compounds:
+            ids += id_ is not None
+            classes += len(class_list)
+            tags += tag is not None
+        self.specificity = (ids, classes, tags)
+
+
+class Stylesheet(object):
+    def __init__(self):
+        self.by_id = {}
+        self.by_class = {}
+        self.by_tag = {}
+        self.universal = []
+        self._order = 0
+
+    def __bool__(self):
+        return bool(self.by_id or self.by_class or self.by_tag or self.universal)
+
+    def add_css(self, css):
+        css = _COMMENT_RE.sub("", css)
+        css = _AT_RULE_RE.sub("", css)
+        for selectors, body in _RULE_RE.findall(css):
+            declarations, important = parse_declarations(body)
+            if not declarations and not important:
+                continue
+            for selector in selectors.split(","):
+                rule = _parse_selector(
+                    selector.strip(), self._order, declarations, important
+                )
+                self._order += 1
+                if rule:
+                    self._index(rule)
+
+    def _index(self, rule):
+        tag, id_, classes = rule.compounds[-1]
+        if id_ is not None:
+            self.by_id.setdefault(id_, []).append(rule)
+        elif classes:
+            self.by_class.setdefault(classes[0], []).append(rule)
+        elif tag is not None:
+            self.by_tag.setdefault(tag, []).append(rule)
+        else:
+            self.universal.append(rule)
+
+    def candidates(self, tag, id_, classes):
+        rules = list(self.universal)
+        if id_ is not None:
+            rules += self.by_id.get(id_, ())
+        for class_name in classes:
+            rules += self.by_class.get(class_name, ())
+        rules += self.by_tag.get(tag, ())
+        return rules
+
+
+def parse_declarations(body):
+    """ Split a declaration block into ``(declarations, important)`` dicts. """
+    declarations = {}
+    important = {}
+    for declaration in body.split(";"):
+        key, sep, value = declaration.partition(":")
+        if not sep:
+            continue
+        key = key.strip().lower()
+        value = value.strip()
+        if not key or not value:
+            continue
+        if value.lower().endswith("!important"):
+            important[key] = value[: -len("!important")].strip()
+        else:
+            declarations[key] = value
+    return declarations, important
+
+
+def _parse_compound(text):
+    match = _COMPOUND_RE.match(text)
+    if not match:
+        return None
+    tag = match.group(1)
+    if tag == "*":
+        tag = None
+    id_ = None
+    classes = []
+    for kind, name in _PART_RE.findall(match.group(2)):
+        if kind == "#":
+            id_ = name
+        else:
+            classes.append(name)
+    return (tag, id_, tuple(classes))
+
+
+def _parse_selector(selector, order, declarations, important):
+    if not selector:
+        return None
+    parts = _COMBINATOR_RE.split(selector)
+    combinators = [c.strip() or " " for c in _COMBINATOR_RE.findall(selector)]
+    compounds = []
+    for part in parts:
+        compound = _parse_compound(part)
+        if compound is None:
+            logging.debug("Unsupported CSS selector '{}'".format(selector))
+            return None
+        compounds.append(compound)
+    return Rule(compounds, combinators, order, declarations, important)
+
+
+def _local_name(tag):
+    return tag.rpartition("}")[-1]
+
+
+def _compound_matches(compound, element):
+    tag, id_, classes = compound
+    if tag is not None and _local_name(element.tag) != tag:
+        return False
+    if id_ is not None and element.attrib.get("id") != id_:
+        return False
+    if classes:
+        element_classes = element.attrib.get("class", "").split()
+        for class_name in classes:
+            if class_name not in element_classes:
+                return False
+    return True
+
+
+def _matches(rule, element, parent_map):
+    if not _compound_matches(rule.compounds[-1], element):
+        return False
+    current = element
+    for index in range(len(rule.compounds) - 2, -1, -1):
+        compound = rule.compounds[index]
+        if rule.combinators[index] == ">":
+            current = parent_map.get(current)
+            if current is None or not _compound_matches(compound, current):
+                return False
+        else:
+            current = parent_map.get(current)
+            while current is not None and not _compound_matches(compound, current):
+                current = parent_map.get(current)
+            if current is None:
+                return False
+    return True
+
+
+def collect(root):
+    """ Parse every ``<style>`` element below ``root`` into one stylesheet. """
+    sheet = Stylesheet()
+    for element in root.iter():
+        if _local_name(element.tag) == "style":
+            sheet.add_css("".join(element.itertext()))
+    return sheet
+
+
+def compute_styles(root, parent_map):
+    """
+    Resolve the stylesheet declarations for every element of the document.
+
+    Returns
+    -------
+    styles : dict
+        element -> (declarations, important declarations), only for
+        elements matched by at least one rule.
+    """
+    sheet = collect(root)
+    styles = {}
+    if not sheet:
+        return styles
+
+    for element in root.iter():
+        classes = element.attrib.get("class", "").split()
+        rules = sheet.candidates(
+            _local_name(element.tag), element.attrib.get("id"), classes
+        )
+        if not rules:
+            continue
+
+        matched = [r for r in rules if _matches(r, element, parent_map)]
+        if not matched:
+            continue
+        matched = sorted(set(matched), key=lambda r: (r.specificity, r.order))
+
+        style = {}
+        important = {}
+        for rule in matched:
+            style.update(rule.declarations)
+            important.update(rule.important)
+        styles[element] = (style, important)
+
+    return styles
@@ -0,0 +1,516 @@
+""" SVG path data parser and flattener.
+
+``parse`` turns a ``d`` attribute into a ``Path``: every subpath flattened
+into one (N, 2) vertex array, with the subpath boundaries and whether each
+subpath was closed with ``Z``. All commands are supported, absolute and
+relative, including the ``H``/``V``, ``S``/``T`` shorthands and elliptical
+arcs. The commands are resolved to absolute segments in one pass, then
+all curves of a kind are flattened at once with NumPy. Curves and arcs get
+as many segments as it takes to stay within ``curve_tolerance`` of the true
+curve.
+
+``Path.to_polygons`` returns the same polygons as matplotlib's, which the
+tessellation code was written against, and ``contains_points`` and
+``contains_polygons`` replace the matplotlib containment tests.
+
+``parse_points`` reads the ``points`` of polygons and polylines, and
+``bounds`` gives a cheap bounding box of path data without flattening it.
+"""
+import logging
+import re
+import warnings
+
+import numpy as np
+
+from . import conversion_options
+
+_NUMBER = r"[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?"
+_NUMBER_RE = re.compile(_NUMBER)
+_TOKEN_RE = re.compile(r"[MmZzLlHhVvCcSsQqTtAa]|" + _NUMBER)
+
+_COMMANDS = "MmZzLlHhVvCcSsQqTtAa"
+
+# Number of arguments of every command.
+_ARGUMENTS = {"m": 2, "z": 0, "l": 2, "h": 1, "v": 1, "c": 6, "s": 4, "q": 4, "t": 2, "a": 7}
+
+# Path data of absolute commands whose arguments are all x, y pairs.
+_PAIRS_ONLY_RE = re.compile(r"[^MLCQZz0-9\s,.eE+-]")
+_PAIR_COMMANDS = str.maketrans("MLCQZz", "      ")
+
+# Upper bound for the segments of a single curve or arc.
+MAX_SEGMENTS = 1024
+
+
+class Path(object):
+    """ A flattened path.
+
+    ``vertices`` is an (N, 2) array of every subpath back to back, subpath
+    ``i`` spans ``vertices[offsets[i]:offsets[i + 1]]`` and ``closed[i]``
+    tells if it ended with ``Z``. The closing segment of closed subpaths is
+    implicit, their first vertex is not repeated.
+    """
+
+    def __init__(self, vertices, offsets, closed):
+        self.vertices = vertices
+        self.offsets = offsets
+        self.closed = closed
+
+    @property
+    def is_closed(self):
+        """ True if the last subpath is closed, how a path is told to be a
+        shape rather than a line.
+        """
+        return bool(len(self.closed) and self.closed[-1])
+
+    def packed_polygons(self, closed_only=True):
+        """
+        The polygons of ``to_polygons`` back to back in one (N, 2) array,
+        and the index of the first vertex of each.
+        """
+        starts, ends = self.offsets[:-1], self.offsets[1:]
+        keep = ends - starts >= (3 if closed_only else 1)
+        starts, ends = starts[keep], ends[keep]
+        if not len(starts):
+            return np.zeros((0, 2)), np.zeros(0, dtype=np.int64)
+
+        # Close the subpaths whose last vertex is not their first already
+        vertices = self.vertices
+        unclosed = (vertices[starts] != vertices[ends - 1]).any(axis=1)
+        if not closed_only:
+            unclosed &= self.closed[keep]
+        sizes = ends - starts + unclosed
+        new_ends = np.cumsum(sizes)
+        new_starts = new_ends - sizes
+        index = np.arange(new_ends[-1]) + (starts - new_starts).repeat(sizes)
+        index[new_ends[unclosed] - 1] = starts[unclosed]
+        return vertices[index], new_starts
+
+    def to_polygons(self, closed_only=True):
+        """
+        Subpaths as lists of vertex arrays, like
+        ``matplotlib.path.Path.to_polygons``.
+
+        With ``closed_only`` every subpath is closed, by repeating its first
+        vertex at the end, and subpaths of less than three vertices are
+        dropped. Otherwise open subpaths are returned as they are.
+        """
+        vertices, starts = self.packed_polygons(closed_only)
+        return split_polygons(vertices, starts)
+
+    def to_polylines(self):
+        """
+        Subpaths as ``(vertices, closed)`` pairs for ``stroke.outline``, with
+        the ``Z`` of each subpath, so open subpaths get no closing segment.
+        """
+        keep = self.offsets[1:] - self.offsets[:-1] >= 1
+        return list(zip(self.to_polygons(closed_only=False), self.closed[keep].tolist()))
+
+
+def parse_points(points_attr):
+    """
+    Parse the ``points`` attribute of a polygon or polyline into an (N, 2)
+    array.
+
+    Coordinates may be separated by any mix of whitespace and commas, the
+    common case is read by NumPy in a single pass. Compact forms such as
+    ``"10-5"`` go through the path number scanner instead. A trailing odd
+    coordinate is dropped, as SVG renderers do.
+    """
+    if not points_attr.strip():
+        return np.zeros((0, 2))
+    with warnings.catch_warnings():
+        # Data NumPy cannot read to the end is a warning, not an error.
+        warnings.simplefilter("error", DeprecationWarning)
+        try:
+            values = np.fromstring(points_attr.replace(",", " "), sep=" ")
+        except (DeprecationWarning, ValueError):
+            values = np.array(_NUMBER_RE.findall(points_attr), dtype=np.float64)
+    if len(values) % 2:
+        logging.warning("Ignoring odd coordinate in points '{}'".format(points_attr[:32]))
+        values = values[:-1]
+    return values.reshape(-1, 2)
+
+
+def split_polygons(vertices, starts):
+    """ Inverse of ``Path.packed_polygons``, views into ``vertices``. """
+    bounds = starts.tolist() + [len(vertices)]
+    return [vertices[start:end] for start, end in zip(bounds[:-1], bounds[1:])]
+
+
+def contains_points(polygon, points, chunk=4096):
+    """
+    Even-odd point in polygon test of (M, 2) ``points`` against the (N, 2)
+    ``polygon``, whose closing edge is implied. Returns an (M,) bool array.
+    """
+    polygon = np.asarray(polygon, dtype=np.float64).reshape(-1, 2)
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    inside = np.zeros(len(points), dtype=bool)
+    if len(polygon) < 3:
+        return inside
+
+    x0, y0 = polygon[:, 0], polygon[:, 1]
+    x1, y1 = np.roll(x0, -1), np.roll(y0, -1)
+    dy = y1 - y0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        slope = np.where(dy != 0.0, (x1 - x0) / dy, 0.0)
+
+    for start in range(0, len(points), chunk):
+        px = points[start : start + chunk, 0:1]
+        py = points[start : start + chunk, 1:2]
+        # Edges crossing the horizontal ray to the right of each point.
+        straddles = (y0 > py) != (y1 > py)
+        crossings = straddles & (px < x0 + (py - y0) * slope)
+        inside[start : start + chunk] = np.count_nonzero(crossings, axis=1) % 2 == 1
+    return inside
+
+
+def contains_polygons(outer, polygons):
+    """
+    Whether every vertex of each of ``polygons`` is inside ``outer``, as
+    ``matplotlib.path.Path.contains_path`` tests it, with a single
+    ``contains_points`` call for all of them.
+    """
+    if not len(polygons):
+        return np.zeros(0, dtype=bool)
+    sizes = np.array([len(p) for p in polygons])
+    inside = contains_points(outer, np.concatenate(polygons))
+    starts = np.cumsum(sizes) - sizes
+    return np.logical_and.reduceat(inside, starts) & (sizes > 0)
+
+
+def _segments(deviation, factor, tolerance):
+    """ Segments per curve from the largest second difference of its control
+    points (Wang's formula).
+    """
+    n = np.ceil(np.sqrt(factor * deviation / tolerance))
+    return np.clip(n, 1, MAX_SEGMENTS).astype(np.int64)
+
+
+def _parameters(n):
+    """ Curve index and parameter of every flattened point but the start. """
+    index = np.repeat(np.arange(len(n)), n)
+    starts = np.cumsum(n) - n
+    t = (np.arange(len(index)) - starts[index] + 1) / n[index]
+    return index, t[:, None]
+
+
+def flatten_cubics(curves, tolerance):
+    """ Flatten (N, 4, 2) cubic Beziers, returns the points after each start
+    point and the number of points of each curve.
+    """
+    p0, p1, p2, p3 = curves[:, 0], curves[:, 1], curves[:, 2], curves[:, 3]
+    deviation = np.sqrt(
+        np.maximum(
+            ((p0 - 2.0 * p1 + p2) ** 2).sum(axis=1), ((p1 - 2.0 * p2 + p3) ** 2).sum(axis=1)
+        )
+    )
+    n = _segments(deviation, 0.75, tolerance)
+    index, t = _parameters(n)
+    s = 1.0 - t
+    points = (
+        s * s * s * p0[index]
+        + 3.0 * s * s * t * p1[index]
+        + 3.0 * s * t * t * p2[index]
+        + t * t * t * p3[index]
+    )
+    return points, n
+
+
+def flatten_quadratics(curves, tolerance):
+    """ Flatten (N, 3, 2) quadratic Beziers, like ``flatten_cubics``. """
+    p0, p1, p2 = curves[:, 0], curves[:, 1], curves[:, 2]
+    deviation = np.sqrt(((p0 - 2.0 * p1 + p2) ** 2).sum(axis=1))
+    n = _segments(deviation, 0.25, tolerance)
+    index, t = _parameters(n)
+    s = 1.0 - t
+    points = s * s * p0[index] + 2.0 * s * t * p1[index] + t * t * p2[index]
+    return points, n
+
+
+def flatten_arcs(arcs, tolerance):
+    """
+    Flatten (N, 9) elliptical arcs given as start x, y, rx, ry, x axis
+    rotation, large arc flag, sweep flag, end x, y, like ``flatten_cubics``.
+
+    The centers come from the endpoint to center conversion of the SVG
+    implementation notes. Degenerate arcs are straight lines.
+    """
+    start, end = arcs[:, 0:2], arcs[:, 7:9]
+    rx, ry = np.abs(arcs[:, 2]), np.abs(arcs[:, 3])
+    large_arc, sweep = arcs[:, 5] != 0.0, arcs[:, 6] != 0.0
+    straight = (rx == 0.0) | (ry == 0.0) | np.all(start == end, axis=1)
+    rx, ry = np.where(straight, 1.0, rx), np.where(straight, 1.0, ry)
+
+    phi = np.radians(arcs[:, 4] % 360.0)
+    cos_phi, sin_phi = np.cos(phi), np.sin(phi)
+    dx, dy = ((start - end) / 2.0).T
+    x1 = cos_phi * dx + sin_phi * dy
+    y1 = -sin_phi * dx + cos_phi * dy
+
+    # Scale radii up that are too small to reach the end point.
+    scale = np.sqrt(np.maximum((x1 / rx) ** 2 + (y1 / ry) ** 2, 1.0))
+    rx, ry = rx * scale, ry * scale
+
+    numerator = (rx * ry) ** 2 - (rx * y1) ** 2 - (ry * x1) ** 2
+    denominator = (rx * y1) ** 2 + (ry * x1) ** 2
+    with np.errstate(divide="ignore", invalid="ignore"):
+        factor = np.where(denominator > 0.0, numerator / denominator, 0.0)
+    factor = np.sqrt(np.maximum(factor, 0.0))
+    factor = np.where(large_arc == sweep, -factor, factor)
+    cx1 = factor * rx * y1 / ry
+    cy1 = -factor * ry * x1 / rx
+    cx = cos_phi * cx1 - sin_phi * cy1 + (start[:, 0] + end[:, 0]) / 2.0
+    cy = sin_phi * cx1 + cos_phi * cy1 + (start[:, 1] + end[:, 1]) / 2.0
+
+    theta = np.arctan2((y1 - cy1) / ry, (x1 - cx1) / rx)
+    delta = np.arctan2((-y1 - cy1) / ry, (-x1 - cx1) / rx) - theta
+    delta = np.where(sweep & (delta < 0.0), delta + 2.0 * np.pi, delta)
+    delta = np.where(~sweep & (delta > 0.0), delta - 2.0 * np.pi, delta)
+
+    step = 2.0 * np.arccos(np.clip(1.0 - tolerance / np.maximum(rx, ry), -1.0, 1.0))
+    n = np.clip(np.ceil(np.abs(delta) / step), 1, MAX_SEGMENTS).astype(np.int64)
+    n[straight] = 1
+
+    index, t = _parameters(n)
+    angles = theta[index] + delta[index] * t[:, 0]
+    x = rx[index] * np.cos(angles)
+    y = ry[index] * np.sin(angles)
+    points = np.stack(
+        [
+            cos_phi[index] * x - sin_phi[index] * y + cx[index],
+            sin_phi[index] * x + cos_phi[index] * y + cy[index],
+        ],
+        axis=1,
+    )
+    # Land exactly on the end points.
+    points[np.cumsum(n) - 1] = end
+    return points, n
+
+
+def _arc_arguments(tokens):
+    """ Arc flags may be written without separators ("a5 5 0 011 2"), split
+    them off the numbers they got merged into.
+    """
+    values = []
+    for token in tokens:
+        while len(values) % 7 in (3, 4) and len(token) > 1 and token[0] in "01":
+            values.append(float(token[0]))
+            token = token[1:]
+        values.append(float(token))
+    return values
+
+
+# Segment kinds
+_POINT, _CUBIC, _QUADRATIC, _ARC = range(4)
+
+
+def parse(svg_d, tolerance=None):
+    """
+    Parse and flatten SVG path data into a ``Path``.
+
+    Parameters
+    ----------
+    svg_d : str
+        The ``d`` attribute.
+    tolerance : float, optional
+        Largest distance of the flattened curves and arcs from the true
+        curves, defaults to the ``curve_tolerance`` conversion option.
+    """
+    if tolerance is None:
+        tolerance = conversion_options["curve_tolerance"]
+    tolerance = max(tolerance, 1e-6)
+    return _flatten(*_read(svg_d), tolerance)
+
+
+def bounds(svg_d, tolerance=None):
+    """
+    Bounding box ``(min_x, min_y, max_x, max_y)`` of SVG path data, or None
+    if it has no points.
+
+    Curves are bounded by their control points, which is cheap and never
+    smaller than the curve. Only arcs are flattened, and padded by the
+    tolerance.
+    """
+    if tolerance is None:
+        tolerance = conversion_options["curve_tolerance"]
+    tolerance = max(tolerance, 1e-6)
+
+    if not _PAIRS_ONLY_RE.search(svg_d):
+        # Every other number is an x, no need to resolve the commands.
+        coordinates = parse_points(svg_d.translate(_PAIR_COMMANDS))
+        if not len(coordinates):
+            return None
+        return tuple(coordinates.min(axis=0).tolist() + coordinates.max(axis=0).tolist())
+
+    kinds, points, cubics, quadratics, arcs, _, _ = _read(svg_d)
+    if not kinds:
+        return None
+    coordinates = np.asarray(points + cubics + quadratics, dtype=np.float64).reshape(-1, 2)
+    if arcs:
+        arc_points, _ = flatten_arcs(np.asarray(arcs, dtype=np.float64).reshape(-1, 9), tolerance)
+        coordinates = np.concatenate(
+            [coordinates, arc_points - tolerance, arc_points + tolerance]
+        )
+    return tuple(coordinates.min(axis=0).tolist() + coordinates.max(axis=0).tolist())
+
+
+def _read(svg_d):
+    """ Resolve the commands of path data into absolute segments. """
+    kinds = []  # kind of every segment
+    points = []  # x, y of every point segment
+    cubics = []  # x, y of the 4 control points of every cubic
+    quadratics = []  # x, y of the 3 control points of every quadratic
+    arcs = []  # start, arguments with absolute end of every arc
+    subpaths = []  # first segment of every subpath
+    closed = []
+
+    x = y = start_x = start_y = 0.0
+    control_x = control_y = 0.0  # last control point, for S and T
+    last = None
+    open_subpath = False
+
+    tokens = _TOKEN_RE.findall(svg_d)
+    num_tokens = len(tokens)
+    i = 0
+    while i < num_tokens:
+        command = tokens[i]
+        kind = command.lower()
+        if kind not in _ARGUMENTS:
+            logging.warning("Path data does not start with a command: '{}'".format(svg_d[:32]))
+            break
+        j = i + 1
+        while j < num_tokens and tokens[j][-1] not in _COMMANDS:
+            j += 1
+        arguments = tokens[i + 1 : j]
+        i = j
+        relative = command != command.upper()
+
+        if kind == "z":
+            if open_subpath:
+                closed[-1] = True
+                open_subpath = False
+            x, y = start_x, start_y
+            last = kind
+            continue
+
+        if kind == "a":
+            values = _arc_arguments(arguments)
+        else:
+            values = [float(v) for v in arguments]
+        size = _ARGUMENTS[kind]
+        if len(values) % size:
+            logging.warning("Ignoring incomplete '{}' arguments in path data".format(command))
+            del values[len(values) - len(values) % size :]
+        if not values:
+            continue
+
+        if kind == "m":
+            x, y = (x + values[0], y + values[1]) if relative else (values[0], values[1])
+            start_x, start_y = x, y
+            subpaths.append(len(kinds))
+            closed.append(False)
+            open_subpath = True
+            kinds.append(_POINT)
+            points += (x, y)
+            last = kind
+            # Extra pairs are implicit line tos.
+            values = values[2:]
+            kind = "l"
+        elif not open_subpath:
+            # Drawing after a close starts a new subpath at the same point.
+            subpaths.append(len(kinds))
+            closed.append(False)
+            open_subpath = True
+            kinds.append(_POINT)
+            points += (x, y)
+
+        for k in range(0, len(values), size):
+            if kind == "l":
+                x, y = (x + values[k], y + values[k + 1]) if relative else values[k : k + 2]
+                kinds.append(_POINT)
+                points += (x, y)
+            elif kind == "h":
+                x = x + values[k] if relative else values[k]
+                kinds.append(_POINT)
+                points += (x, y)
+            elif kind == "v":
+                y = y + values[k] if relative else values[k]
+                kinds.append(_POINT)
+                points += (x, y)
+            elif kind == "c" or kind == "s":
+                x0, y0 = (x, y) if relative else (0.0, 0.0)
+                if kind == "c":
+                    x1, y1 = x0 + values[k], y0 + values[k + 1]
+                    k += 2
+                elif last == "c" or last == "s":
+                    # Reflection of the previous second control point.
+                    x1, y1 = 2.0 * x - control_x, 2.0 * y - control_y
+                else:
+                    x1, y1 = x, y
+                control_x, control_y = x0 + values[k], y0 + values[k + 1]
+                end_x, end_y = x0 + values[k + 2], y0 + values[k + 3]
+                kinds.append(_CUBIC)
+                cubics += (x, y, x1, y1, control_x, control_y, end_x, end_y)
+                x, y = end_x, end_y
+            elif kind == "q" or kind == "t":
+                x0, y0 = (x, y) if relative else (0.0, 0.0)
+                if kind == "q":
+                    control_x, control_y = x0 + values[k], y0 + values[k + 1]
+                    k += 2
+                elif last == "q" or last == "t":
+                    control_x, control_y = 2.0 * x - control_x, 2.0 * y - control_y
+                else:
+                    control_x, control_y = x, y
+                end_x, end_y = x0 + values[k], y0 + values[k + 1]
+                kinds.append(_QUADRATIC)
+                quadratics += (x, y, control_x, control_y, end_x, end_y)
+                x, y = end_x, end_y
+            else:
+                end_x, end_y = values[k + 5], values[k + 6]
+                if relative:
+                    end_x, end_y = x + end_x, y + end_y
+                kinds.append(_ARC)
+                arcs += (x, y, *values[k : k + 5], end_x, end_y)
+                x, y = end_x, end_y
+            last = kind
+
+    return kinds, points, cubics, quadratics, arcs, subpaths, closed
+
+
+def _flatten(kinds, points, cubics, quadratics, arcs, subpaths, closed, tolerance):
+    """ Flatten the segments of every kind at once and interleave their
+    points back in path order.
+    """
+    if not (cubics or quadratics or arcs):
+        vertices = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        offsets = np.append(np.asarray(subpaths, dtype=np.int64), len(vertices))
+        return Path(vertices, offsets, np.asarray(closed, dtype=bool))
+
+    kinds = np.asarray(kinds, dtype=np.int8)
+    counts = np.ones(len(kinds), dtype=np.int64)
+    flattened = [(_POINT, np.asarray(points, dtype=np.float64).reshape(-1, 2), None)]
+    if cubics:
+        curves = np.asarray(cubics, dtype=np.float64).reshape(-1, 4, 2)
+        flattened.append((_CUBIC,) + flatten_cubics(curves, tolerance))
+    if quadratics:
+        curves = np.asarray(quadratics, dtype=np.float64).reshape(-1, 3, 2)
+        flattened.append((_QUADRATIC,) + flatten_quadratics(curves, tolerance))
+    if arcs:
+        arcs = np.asarray(arcs, dtype=np.float64).reshape(-1, 9)
+        flattened.append((_ARC,) + flatten_arcs(arcs, tolerance))
+    for kind, _, n in flattened:
+        if n is not None:
+            counts[kinds == kind] = n
+
+    starts = np.cumsum(counts) - counts
+    vertices = np.empty((int(counts.sum()), 2))
+    for kind, kind_points, n in flattened:
+        first = starts[kinds == kind]
+        if n is None:
+            vertices[first] = kind_points
+        else:
+            local = np.arange(len(kind_points)) - np.repeat(np.cumsum(n) - n, n)
+            vertices[np.repeat(first, n) + local] = kind_points
+
+    offsets = np.append(starts[np.asarray(subpaths, dtype=np.int64)], len(vertices))
+    return Path(vertices, offsets, np.asarray(closed, dtype=bool))
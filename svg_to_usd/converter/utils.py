@@ -1,9 +1,16 @@
-from pxr import Gf, Usd, UsdGeom, Tf, Sdf, UsdShade
+from pxr import Gf, Usd, UsdGeom, Tf, Sdf, UsdShade, Vt
+import functools
+import math
 import re
 import logging
 
-import matplotlib.patches
+import numpy as np
+
 from . import common
+from . import stats as conversion_stats
+from . import stylesheet
+from . import svgpath
+from . import budgets
 
 ELLIPSIS_RES = 32
 UP_AXIS = "Y"
@@ -128,53 +135,132 @@ def convert_color(hex):
 
 # Take SVG Transform string and make xform ops
 
+_TRANSFORM_RE = re.compile(
+    r"(matrix|translate|scale|rotate|skewX|skewY)\s*\(([^)]*)\)", re.IGNORECASE
+)
+_NUMBER_RE = re.compile(r"[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?")
+
+IDENTITY_AFFINE = (1.0, 0.0, 0.0, 1.0, 0.0, 0.0)
+
+
+def _multiply_affine(m, n):
+    a, b, c, d, e, f = m
+    a2, b2, c2, d2, e2, f2 = n
+    return (
+        a * a2 + c * b2,
+        b * a2 + d * b2,
+        a * c2 + c * d2,
+        b * c2 + d * d2,
+        a * e2 + c * f2 + e,
+        b * e2 + d * f2 + f,
+    )
+
+
+def _transform_function_affine(name, args):
+    name = name.lower()
+    if name == "matrix" and len(args) >= 6:
+        return tuple(args[:6])
+    if name == "translate" and args:
+        return (1.0, 0.0, 0.0, 1.0, args[0], args[1] if len(args) > 1 else 0.0)
+    if name == "scale" and args:
+        sx = args[0]
+        sy = args[1] if len(args) > 1 else sx
+        return (sx, 0.0, 0.0, sy, 0.0, 0.0)
+    if name == "rotate" and args:
+        angle = math.radians(args[0])
+        cos, sin = math.cos(angle), math.sin(angle)
+        rotation = (cos, sin, -sin, cos, 0.0, 0.0)
+        if len(args) >= 3:
+            cx, cy = args[1], args[2]
+            rotation = _multiply_affine(
+                _multiply_affine((1.0, 0.0, 0.0, 1.0, cx, cy), rotation),
+                (1.0, 0.0, 0.0, 1.0, -cx, -cy),
+            )
+        return rotation
+    if name == "skewx" and args:
+        return (1.0, 0.0, math.tan(math.radians(args[0])), 1.0, 0.0, 0.0)
+    if name == "skewy" and args:
+        return (1.0, math.tan(math.radians(args[0])), 0.0, 1.0, 0.0, 0.0)
+    logging.warning("Could not parse transform {}({})".format(name, args))
+    return IDENTITY_AFFINE
+
+
+@functools.lru_cache(maxsize=4096)
+def parse_transform(transform_attr):
+    """
+    Parse an SVG transform list into a single 2D affine matrix.
+
+    Parameters
+    ----------
+    transform_attr : str
+        The transform attribute, e.g. "translate(10 20) rotate(45)".
+
+    Returns
+    -------
+    affine : tuple
+        ``(a, b, c, d, e, f)`` as in SVG's ``matrix(a b c d e f)``, with the
+        functions composed left to right as the specification requires.
+    """
+    affine = IDENTITY_AFFINE
+    for match in _TRANSFORM_RE.finditer(transform_attr):
+        args = [float(v) for v in _NUMBER_RE.findall(match.group(2))]
+        affine = _multiply_affine(
+            affine, _transform_function_affine(match.group(1), args)
+        )
+    return affine
 
-def convert_transform_attr(transform_attr, up_axis="Y"):
-    # TODO: We should support making a matrix op and per component
-
-    _output = Gf.Matrix4d(1.0)
-    _translate_mat = Gf.Matrix4d(1.0)
-    _rotate_mat = Gf.Matrix4d(1.0)
-
-    translate_search = re.search("translate\(.*?\)", transform_attr, re.IGNORECASE)
-    rotate_search = re.search("rotate\(.*?\)", transform_attr, re.IGNORECASE)
-
-    if rotate_search:
-        _rotate = rotate_search.group(0).replace("rotate(", "")
-        _rotate = _rotate.replace(")", "")
-        print("_rotate", _rotate)
-
-        if "," in _rotate:
-            # TODO: Figure out what this means....
-            _rotate = [-float(i) for i in _rotate.split(",")]
-            _r = Gf.Rotation(Gf.Vec3d(0, 1, 0), _rotate[0])
-            _rotate_mat = Gf.Matrix4d(1).SetRotate(_r)
-        elif " " in _rotate:
-            _rotate = [-float(i) for i in _rotate.split(" ")]
-            _r = Gf.Rotation(Gf.Vec3d(0, 1, 0), _rotate[0])
-            _rotate_mat = Gf.Matrix4d(1).SetRotate(_r)
-        else:
-            _rotate = -float(_rotate)
-            _r = Gf.Rotation(Gf.Vec3d(0, 1, 0), _rotate)
-            _rotate_mat = Gf.Matrix4d(1).SetRotate(_r)
-
-    # TODO: Handle Scale
-    # TODO: Handle multiple transforms
-    if translate_search:
-        _translate = translate_search.group(0).replace("translate(", "")
-        _translate = _translate.replace(")", "")
-        if "," in _translate:
-            _translate = [float(i) for i in _translate.split(",")]
-        elif " " in _translate:
-            _translate = [float(i) for i in _translate.split(" ")]
-        else:
-            _translate = (float(_translate), float(_translate))
-        _v = convert_position(_translate[0], _translate[1], vec_class=Gf.Vec3d)
-        _translate_mat = Gf.Matrix4d(1).SetTranslate(_v)
 
-    _output = _rotate_mat * _translate_mat
+_basis_cache = {}
+
+
+def position_basis():
+    """ 2x3 array mapping SVG (x, y) rows to USD positions for the current
+    ``convert_position`` (up axis).
+    """
+    basis = _basis_cache.get(convert_position)
+    if basis is None:
+        origin = np.array(convert_position(0.0, 0.0, vec_class=Gf.Vec3d))
+        basis = np.array(
+            [
+                np.array(convert_position(1.0, 0.0, vec_class=Gf.Vec3d)) - origin,
+                np.array(convert_position(0.0, 1.0, vec_class=Gf.Vec3d)) - origin,
+            ]
+        )
+        _basis_cache[convert_position] = basis
+    return basis
+
 
-    return _output
+def convert_positions(svg_points):
+    """ Vectorized ``convert_position`` for an (N, 2) array of SVG points. """
+    return np.asarray(svg_points, dtype=np.float64).reshape(-1, 2) @ position_basis()
+
+
+def affine_to_matrix(affine):
+    """ Embed a 2D SVG affine matrix in the USD drawing plane as a row vector
+    4x4 matrix (numpy array). Components along the up axis are left alone.
+    """
+    a, b, c, d, e, f = affine
+    basis = position_basis()
+    normal = np.cross(basis[0], basis[1])
+    matrix = np.identity(4)
+    matrix[:3, :3] = basis.T @ np.array([[a, b], [c, d]]) @ basis + np.outer(
+        normal, normal
+    )
+    matrix[3, :3] = np.array([e, f]) @ basis
+    return matrix
+
+
+@functools.lru_cache(maxsize=4096)
+def _transform_matrix(transform_attr, position_function):
+    return Gf.Matrix4d(affine_to_matrix(parse_transform(transform_attr)).tolist())
+
+
+def convert_transform_attr(transform_attr, up_axis="Y"):
+    """ Convert an SVG transform list (matrix, translate, scale, rotate,
+    skewX and skewY, in any combination) to a Gf.Matrix4d. Results are
+    cached per transform string and up axis.
+    """
+    return Gf.Matrix4d(_transform_matrix(transform_attr, convert_position))
 
 
 DEBUG = True
@@ -192,166 +278,149 @@ def segments(p):
 
 
 def _is_counter_clockwise(points):
-    signedArea = 0
-    for i, point in enumerate(points):
-        x1 = point[0]
-        y1 = point[1]
-        if point[0] == points[-1][0] and point[1] == points[-1][1]:
-            x2 = points[-1][0]
-            y2 = points[-1][1]
-        else:
-            x2 = points[i + 1][0]
-            y2 = points[i + 1][1]
-
-        signedArea += x1 * y2 - x2 * y1
-
-    return signedArea > 0
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    return bool(_counter_clockwise(points, np.zeros(1, dtype=np.int64))[0])
+
+
+def _counter_clockwise(points, starts):
+    """ Windings of the closed polygons packed back to back in ``points``,
+    polygon ``i`` starting at ``starts[i]``.
+    """
+    if len(points) < 2:
+        return np.zeros(len(starts), dtype=bool)
+    sizes = np.diff(starts, append=len(points))
+    lasts = points[starts + sizes - 1].repeat(sizes, axis=0)
+    current, following = points[:-1], points[1:]
+    # Points equal to the closing point of their polygon do not contribute,
+    # which also leaves out the step from one polygon to the next.
+    cross = np.zeros(len(points))
+    cross[:-1] = current[:, 0] * following[:, 1] - following[:, 0] * current[:, 1]
+    cross[(points == lasts).all(axis=1)] = 0.0
+    return np.add.reduceat(cross, starts) > 0
 
 
 def path_to_mesh(
     svg_path, usd_points, usd_fvi, usd_fvc, x_offset=0, y_offset=0, scale_factor=1
 ):
+    with conversion_stats.current().stage("tessellate"):
+        return _path_to_mesh(
+            svg_path, usd_points, usd_fvi, usd_fvc, x_offset, y_offset, scale_factor
+        )
 
-    # Array of arrays of points
-    _polygons = svg_path.to_polygons()
-    _num_polys = len(_polygons)
-
-    # TODO: Put this in one of the other poly loops
-    for i, _poly in enumerate(_polygons):
-        for j, _point in enumerate(_poly):
-            _polygons[i][j] = [
-                (_point[0] + x_offset) * scale_factor,
-                (_point[1] + y_offset) * scale_factor,
-            ]
+
+def _closest_pair(outside, inside, chunk=1 << 20):
+    """ Indices of the closest pair of points between two polygons, the first
+    one in (inside, outside) order on ties.
+    """
+    best = (np.inf, 0, 0)
+    rows = max(1, chunk // max(len(outside), 1))
+    for start in range(0, len(inside), rows):
+        block = inside[start : start + rows]
+        distances = ((block[:, None, :] - outside[None, :, :]) ** 2).sum(axis=2)
+        i, o = np.unravel_index(np.argmin(distances), distances.shape)
+        if distances[i, o] < best[0]:
+            best = (distances[i, o], o, start + i)
+    return best[1], best[2]
+
+
+def _first_index(points, point):
+    return int(np.flatnonzero(np.all(points == point, axis=1))[0])
+
+
+def _path_to_mesh(
+    svg_path, usd_points, usd_fvi, usd_fvc, x_offset=0, y_offset=0, scale_factor=1
+):
+    # All polygons back to back, so windings and bounds are computed at once
+    _all_points, _starts = svg_path.packed_polygons()
+    _num_polys = len(_starts)
 
     if _num_polys <= 0:
         return usd_points, usd_fvi, usd_fvc
 
-    _polygon_windings = []
+    _all_points = (_all_points + (x_offset, y_offset)) * scale_factor
+    _polygons = svgpath.split_polygons(_all_points, _starts)
 
-    for p in _polygons:
-        _polygon_windings.append(_is_counter_clockwise(p))
+    _polygon_windings = _counter_clockwise(_all_points, _starts)
+
+    # Only polygons within the bounds of another can be inside it
+    _mins = np.minimum.reduceat(_all_points, _starts)
+    _maxs = np.maximum.reduceat(_all_points, _starts)
 
     # - Convert single array of polys to array of 1 parent -> X children objects
 
     _poly_parents = []
 
-    _children = []
+    _children = set()
 
     for _poly_idx, _poly in enumerate(_polygons):
 
         if _poly_idx in _children:
             continue
-        _isCcw = _polygon_windings[_poly_idx]
-
-        _comparrison_dir = _isCcw
-
-        _p1_path = matplotlib.path.Path(_poly)
-
-        _poly_storage = {"root": _poly, "children": []}
-
-        # Seach all inside polygons and check if inside this polygon
-        for _inside_poly_idx, _inside_poly in enumerate(_polygons):
-            # Skip same
-            if _poly_idx == _inside_poly_idx:
-                continue
-            # Skip outter
-            if _polygon_windings[_inside_poly_idx] == _comparrison_dir:
-                continue
+        budgets.check_time()
 
-            _p2_path = matplotlib.path.Path(_inside_poly)
+        _poly_children = []
 
-            if _p1_path.contains_path(_p2_path):
-                # This poly is inside parent
-                _poly_storage["children"].append(_inside_poly)
-
-                _children.append(_inside_poly_idx)
+        # Seach all inside polygons of the opposite winding
+        _candidates = np.flatnonzero(
+            (_polygon_windings != _polygon_windings[_poly_idx])
+            & (_mins >= _mins[_poly_idx]).all(axis=1)
+            & (_maxs <= _maxs[_poly_idx]).all(axis=1)
+        )
+        if len(_candidates):
+            _inside = svgpath.contains_polygons(
+                _poly, [_polygons[i] for i in _candidates]
+            )
+            _poly_children = _candidates[_inside].tolist()
+            _children.update(_poly_children)
 
-        _poly_parents.append(_poly_storage)
+        _poly_parents.append([_poly_idx] + _poly_children)
 
     # -
 
+    _usd_polygons = svgpath.split_polygons(convert_positions(_all_points), _starts)
+
     _point_buffer = []
     _fvi_buffer = []
     _fvc_buffer = []
+    _num_buffered = len(usd_points)
 
-    for _poly_obj in _poly_parents:
-        _polygons = [_poly_obj["root"]] + _poly_obj["children"]
-
-        _closest_dist = -1
-        _incoming_point_offset = len(usd_points)
+    for _poly_indices in _poly_parents:
+        # Assumes that incoming polygons are closed and duplicate end points
+        _outside = _usd_polygons[_poly_indices[0]]
 
-        # array of tuples with indexes into original polygons
-        # tuple in pattern (outside_idx, inside_idx)
-        closest_pairs = [(-1, -1)] * (_num_polys - 1)
-        _outside = _polygons[0]
+        _combined_points = [_outside[:-1]]
+        _combined_fvi = list(range(len(_outside) - 1))
+        _idc_offset = len(_outside) - 1
 
-        # loop over all inside polys
-        for _inside_idx, _inside in enumerate(_polygons[1:]):
-            _closest_dist = -1
+        for _inside in [_usd_polygons[i] for i in _poly_indices[1:]]:
+            budgets.check_time()
+            _o_idx, _i_idx = _closest_pair(_outside, _inside)
+            _sub_num_points = len(_inside) - 1
 
-            for _i_idx, _i_pos in enumerate(_inside):
-                for _o_idx, _o_pos in enumerate(_outside):
-                    _dist = (
-                        convert_position(_i_pos[0], _i_pos[1])
-                        - convert_position(_o_pos[0], _o_pos[1])
-                    ).GetLength()
-                    if _dist < _closest_dist or _closest_dist < 0:
-                        _closest_dist = _dist
-                        closest_pairs[_inside_idx] = (_o_idx, _i_idx)
-
-        _combined_points = []
-        _combined_fvi = []
-
-        _idc_offset = 0
-
-        for _polygon_idx, _polygon in enumerate(_polygons):
-            _sub_points = [convert_position(_v[0], _v[1]) for _v in _polygon]
-            # Assumes that incoming polygons are closed and duplicate end points
-            _sub_points = _sub_points[:-1]
-            _sub_num_points = len(_sub_points)
-
-            _sub_fvi = [i for i in range(_sub_num_points)]
-
-            if _polygon_idx == 0:
-                # First polygon is outside, so added normally
-                _combined_points += _sub_points
-                _combined_fvi += _sub_fvi
-            else:
-                _adjusted_fvi = [i + _idc_offset for i in _sub_fvi]
-
-                _pair = closest_pairs[_polygon_idx - 1]
-
-                _combined_points += _sub_points
-
-                # This is ugly
-                _outside_insertion_pos = convert_position(
-                    _polygons[0][_pair[0]][0], _polygons[0][_pair[0]][1]
-                )
-                _inside_insertion_pos = convert_position(
-                    _polygon[_pair[1]][0], _polygon[_pair[1]][1]
-                )
-
-                _outside_insertion_idx = _combined_points.index(_outside_insertion_pos)
-                _inside_insertion_idx = _combined_points.index(_inside_insertion_pos)
+            # The closing duplicate stands for the first point
+            _outside_insertion_idx = _first_index(_outside[:-1], _outside[_o_idx])
+            _inside_insertion_idx = _idc_offset + _first_index(
+                _inside[:-1], _inside[_i_idx]
+            )
 
-                _roll_idx = _adjusted_fvi.index(_inside_insertion_idx)
-                _adjusted_fvi = _adjusted_fvi[_roll_idx:] + _adjusted_fvi[:_roll_idx]
+            _adjusted_fvi = list(range(_idc_offset, _idc_offset + _sub_num_points))
+            _roll_idx = _inside_insertion_idx - _idc_offset
+            _adjusted_fvi = _adjusted_fvi[_roll_idx:] + _adjusted_fvi[:_roll_idx]
 
-                _insertion_idx = _combined_fvi.index(_outside_insertion_idx)
-                _combined_fvi[_insertion_idx:_insertion_idx] = (
-                    [_outside_insertion_idx] + _adjusted_fvi + [_inside_insertion_idx]
-                )
+            _insertion_idx = _combined_fvi.index(_outside_insertion_idx)
+            _combined_fvi[_insertion_idx:_insertion_idx] = (
+                [_outside_insertion_idx] + _adjusted_fvi + [_inside_insertion_idx]
+            )
 
+            _combined_points.append(_inside[:-1])
             _idc_offset += _sub_num_points
 
-        _fvi_buffer += [
-            k + len(_point_buffer) + _incoming_point_offset for k in _combined_fvi
-        ]
+        _fvi_buffer += [k + _num_buffered for k in _combined_fvi]
         _point_buffer += _combined_points
+        _num_buffered += _idc_offset
         _fvc_buffer += [len(_combined_fvi)]
 
-    usd_points += _point_buffer
+    usd_points.extend(to_vec3f_array(np.concatenate(_point_buffer)))
     usd_fvi += _fvi_buffer
     usd_fvc += _fvc_buffer
 
@@ -359,23 +428,25 @@ def path_to_mesh(
 
 
 def path_to_curve(svg_path, usd_points, usd_fvc, x_offset=0, y_offset=0):
+    with conversion_stats.current().stage("tessellate"):
+        return _path_to_curve(svg_path, usd_points, usd_fvc, x_offset, y_offset)
+
+
+def _path_to_curve(svg_path, usd_points, usd_fvc, x_offset=0, y_offset=0):
     _polygons = svg_path.to_polygons()
     _num_polygons = len(_polygons)
 
     if _num_polygons <= 0:
         return usd_points, usd_fvc
 
-    for pi, p in enumerate(_polygons):
-        _points = [convert_position(v[0], v[1]) for v in p]
-
+    for p in _polygons:
         # TODO: Should check if first and last are the same...
         # But most seem to be
-        _points = _points[:-1]
-        _num_points = len(_points)
+        _points = convert_positions(p[:-1])
 
-        usd_points += _points
+        usd_points.extend(to_vec3f_array(_points))
 
-        usd_fvc += [_num_points]
+        usd_fvc += [len(_points)]
 
     return usd_points, usd_fvc
 
@@ -396,6 +467,11 @@ def handle_xform_attrs(svg_element, usd_xform):
 
 
 def handle_geom_attrs(svg_element, usd_mesh):
+    with conversion_stats.current().stage("attributes"):
+        return _handle_geom_attrs(svg_element, usd_mesh)
+
+
+def _handle_geom_attrs(svg_element, usd_mesh):
 
     handle_xform_attrs(svg_element, usd_mesh)
 
@@ -469,7 +545,10 @@ def handle_geom_attrs(svg_element, usd_mesh):
     #                 usd_mesh.CreateWidthsAttr().Set(usd_widths)
     #                 usd_mesh.SetWidthsInterpolation(UsdGeom.Tokens.constant)
 
-    if svg_fill:
+    # PointInstancers (instanced text) carry their colors per instance.
+    is_gprim = usd_mesh.GetPrim().IsA(UsdGeom.Gprim)
+
+    if svg_fill and is_gprim:
         if "url(" in svg_fill:
             pattern_id = svg_fill.replace("url(#", "")
             pattern_id = pattern_id.replace(")", "")
@@ -481,6 +560,14 @@ def handle_geom_attrs(svg_element, usd_mesh):
                 binding = UsdShade.MaterialBindingAPI.Apply(usd_mesh.GetPrim())
                 if binding:
                     binding.Bind(usd_material)
+            else:
+                # Gradients are applied once the points exist, see
+                # fills.gradient. Use the fallback color if there is one.
+                svg_fallback = svg_fill.rpartition(")")[-1].strip()
+                if svg_fallback and svg_fallback != "none":
+                    usd_mesh.CreateDisplayColorPrimvar(UsdGeom.Tokens.constant).Set(
+                        [convert_color(svg_fallback)]
+                    )
         else:
             usd_colors = [convert_color(svg_fill)]
 
@@ -489,9 +576,10 @@ def handle_geom_attrs(svg_element, usd_mesh):
 
     # - Normals
 
-    usd_normals = [default_normal()]
-    usd_mesh.CreateNormalsAttr().Set(usd_normals)
-    usd_mesh.SetNormalsInterpolation(UsdGeom.Tokens.uniform)
+    if is_gprim:
+        usd_normals = [default_normal()]
+        usd_mesh.CreateNormalsAttr().Set(usd_normals)
+        usd_mesh.SetNormalsInterpolation(UsdGeom.Tokens.uniform)
 
     # - Subdivision
     if usd_mesh.GetPrim().IsA(UsdGeom.Mesh):
@@ -523,50 +611,192 @@ def handle_geom_attrs(svg_element, usd_mesh):
 
         _type = convert_type(_val)
         if _type:
-            usd_mesh.CreatePrimvar(
+            UsdGeom.PrimvarsAPI(usd_mesh).CreatePrimvar(
                 Tf.MakeValidIdentifier(_attr), _type, UsdGeom.Tokens.constant
             ).Set(_val)
 
     return usd_mesh
 
 
-def set_extent(prim, bboxCache):
-    # Get bbox
-    bb = bboxCache.ComputeWorldBound(prim)
+def to_vec3f_array(points):
+    if isinstance(points, np.ndarray):
+        return Vt.Vec3fArray.FromNumpy(np.ascontiguousarray(points, dtype=np.float32))
+    return Vt.Vec3fArray(points)
+
+
+def take(values, index):
+    """ The elements ``index`` of a Vt array, as the same type of array. """
+    try:
+        return type(values).FromNumpy(np.ascontiguousarray(np.asarray(values)[index]))
+    except (AttributeError, TypeError, ValueError):
+        return type(values)([values[i] for i in index])
+
+
+def compute_extent(usd_points, padding=0.0):
+    """ Local bounds of ``usd_points`` as a Gf.Range3d, from a vectorized
+    min/max over the point array.
+    """
+    points = np.asarray(to_vec3f_array(usd_points))
+    if not len(points):
+        return Gf.Range3d()
+    lo = points.min(axis=0).astype(np.float64) - padding
+    hi = points.max(axis=0).astype(np.float64) + padding
+    return Gf.Range3d(Gf.Vec3d(*lo), Gf.Vec3d(*hi))
+
+
+def set_extent(usd_boundable, extent):
+    """ Author ``extent`` (a Gf.Range3d) and remember it for the extentsHint
+    roll up of the parent groups.
+    """
+    common.extent_map[usd_boundable.GetPath()] = extent
+    if extent.IsEmpty():
+        return
+    usd_boundable.CreateExtentAttr().Set(
+        Vt.Vec3fArray([Gf.Vec3f(extent.GetMin()), Gf.Vec3f(extent.GetMax())])
+    )
+
+
+def author_mesh(usd_mesh, usd_points, usd_fvi, usd_fvc):
+    usd_points = to_vec3f_array(usd_points)
+    usd_mesh.CreatePointsAttr().Set(usd_points)
+    usd_mesh.CreateFaceVertexIndicesAttr().Set(usd_fvi)
+    usd_mesh.CreateFaceVertexCountsAttr().Set(usd_fvc)
+    set_extent(usd_mesh, compute_extent(usd_points))
+
+
+def author_curves(usd_curves, usd_points, usd_fvc):
+    usd_points = to_vec3f_array(usd_points)
+    usd_curves.CreatePointsAttr().Set(usd_points)
+    usd_curves.CreateCurveVertexCountsAttr().Set(usd_fvc)
+
+    # Curves are as wide as their widths, so pad by the widest half width.
+    widths = usd_curves.GetWidthsAttr().Get()
+    padding = max(widths) * 0.5 if widths else 0.0
+    set_extent(usd_curves, compute_extent(usd_points, padding))
+
+
+def bake_transforms(usd_prim):
+    """
+    Bake the transforms of ``usd_prim`` and its descendants, together with
+    the already baked transforms of its ancestors, into their points.
+
+    Point based prims get their points transformed in one vectorized step
+    and their xformOps removed, so nothing is left to evaluate at render
+    time. Xforms only pass their transform down. Other prims, which have no
+    points to bake into, and instances, whose points are shared, get their
+    accumulated matrix as a single op.
+    """
+    root_path = usd_prim.GetPath()
+    iterator = iter(Usd.PrimRange(usd_prim.GetPrim(), Usd.PrimAllPrimsPredicate))
+    for prim in iterator:
+        path = prim.GetPath()
+        if path in common.bake_map:
+            iterator.PruneChildren()
+            continue
+
+        xformable = UsdGeom.Xformable(prim)
+        local = np.array(xformable.GetLocalTransformation())
+        parent_world = common.bake_map.get(path.GetParentPath())
+        world = local if parent_world is None else local @ parent_world
+        common.bake_map[path] = world
+
+        if prim.IsInstance():
+            # The ops come from the prototype, override them with the baked
+            # matrix instead of removing them.
+            xformable.ClearXformOpOrder()
+            if not np.allclose(world, np.identity(4)):
+                xformable.AddTransformOp(opSuffix="baked").Set(
+                    Gf.Matrix4d(world.tolist())
+                )
+            iterator.PruneChildren()
+            continue
+
+        for op in xformable.GetOrderedXformOps():
+            prim.RemoveProperty(op.GetName())
+        prim.RemoveProperty("xformOpOrder")
+
+        if np.allclose(world, np.identity(4)):
+            continue
+
+        if prim.IsA(UsdGeom.PointBased):
+            points_attr = UsdGeom.PointBased(prim).GetPointsAttr()
+            points = np.asarray(points_attr.Get(), dtype=np.float64).reshape(-1, 3)
+            points = points @ world[:3, :3] + world[3, :3]
+            points_attr.Set(to_vec3f_array(points))
+
+            padding = 0.0
+            if prim.IsA(UsdGeom.Curves):
+                widths = UsdGeom.Curves(prim).GetWidthsAttr().Get()
+                padding = max(widths) * 0.5 if widths else 0.0
+            set_extent(UsdGeom.Boundable(prim), compute_extent(points, padding))
+        elif not prim.IsA(UsdGeom.Xform):
+            xformable.AddTransformOp().Set(Gf.Matrix4d(world.tolist()))
+
+        if prim.IsA(UsdGeom.PointInstancer):
+            # Prototypes are placed by the instancer, not by their parent.
+            iterator.PruneChildren()
+
+
+def rollup_extents_hint(usd_xform):
+    """ Union the bounds of the children of ``usd_xform`` in its local space
+    and author them as ``extentsHint``.
+    """
+    prim = usd_xform.GetPrim()
+    bounds = Gf.Range3d()
+    # All children, prototypes live below an abstract class prim.
+    for child in prim.GetAllChildren():
+        child_bounds = common.extent_map.get(child.GetPath())
+        if child_bounds is None or child_bounds.IsEmpty():
+            continue
+        xformable = UsdGeom.Xformable(child)
+        if xformable:
+            child_bounds = Gf.BBox3d(
+                child_bounds, xformable.GetLocalTransformation()
+            ).ComputeAlignedRange()
+        bounds = Gf.Range3d.GetUnion(bounds, child_bounds)
+
+    common.extent_map[prim.GetPath()] = bounds
+    if bounds.IsEmpty():
+        return
+    UsdGeom.ModelAPI.Apply(prim).SetExtentsHint(
+        Vt.Vec3fArray([Gf.Vec3f(bounds.GetMin()), Gf.Vec3f(bounds.GetMax())])
+    )
 
-    # Get min and max vecs
-    minr = bb.GetRange().GetMin()
-    maxr = bb.GetRange().GetMax()
 
-    prim.GetAttribute("extent").Set([minr, maxr])
+def _style_value(key, value):
+    if key == "stroke-width" or key == "font-size":
+        return value.replace("px", "")
+    return value
 
 
 def parse_attributes(element):
+    """
+    Resolve the attributes of an element, lowest to highest precedence:
+    presentation attributes, ``<style>`` rules, inline ``style``,
+    ``!important`` rules, then inline ``!important`` declarations.
+    """
     flattened_attributes = {}
-    if "style" in element.attrib:
-        raw_attributes = element.attrib["style"]
-        for attribute in raw_attributes.split(";"):
-            try:
-                key, value = [x.strip() for x in attribute.split(":")]
-                if key == "fill":
-                    if value == "none":
-                        return
-                    else:
-                        flattened_attributes[key] = value
-                elif key == "stroke":
-                    if value == "none":
-                        return
-                    else:
-                        flattened_attributes[key] = value
-                elif key == "stroke-width" or key == "font-size":
-                    value = value.replace("px", "")
-                    flattened_attributes[key] = value
-                else:
-                    flattened_attributes[key] = value
-            except:
-                pass
     for key in element.attrib:
         if key != "style":
             flattened_attributes[key] = element.attrib[key]
 
+    sheet_attributes, important = common.style_map.get(element, (None, None))
+    if sheet_attributes:
+        for key, value in sheet_attributes.items():
+            flattened_attributes[key] = _style_value(key, value)
+
+    inline, inline_important = {}, {}
+    if "style" in element.attrib:
+        inline, inline_important = stylesheet.parse_declarations(element.attrib["style"])
+        for key, value in inline.items():
+            flattened_attributes[key] = _style_value(key, value)
+
+    if important:
+        for key, value in important.items():
+            flattened_attributes[key] = _style_value(key, value)
+
+    # Inline !important declarations beat !important rules.
+    for key, value in inline_important.items():
+        flattened_attributes[key] = _style_value(key, value)
+
     return flattened_attributes
@@ -0,0 +1,356 @@
+""" Long running conversion server.
+
+Keeps a pool of worker processes with pxr, matplotlib, fontTools and the
+converter imported, so the font manager, parsed fonts and glyph
+tessellations stay warm between jobs. Jobs come in over HTTP, on localhost
+or on a Unix socket:
+
+``POST /convert``
+    Either a JSON object::
+
+        {"svg_path": "in.svg" | "svg": "<svg ...>",
+         "usd_path": "out.usd",          # optional
+         "format": "usda" | "usdc",      # without usd_path, default usda
+         "options": {"up_axis": "z"},    # conversion_options overrides
+         "stats": false}
+
+    or the SVG document itself as the body. With ``usd_path`` the layer is
+    written there and the answer is JSON with the job timings (and the
+    statistics if asked for). Otherwise the answer is the USD layer, with
+    the timings in ``X-Queue-Seconds``, ``X-Convert-Seconds`` and
+    ``X-Total-Seconds`` headers. Sidecar files such as textures and payload
+    layers are only kept with ``usd_path``.
+
+``GET /status``
+    Number of workers, queue depth, running, completed and failed jobs and
+    the timings of the most recent jobs.
+
+Usage::
+
+    python -m svg_to_usd.server [--host 127.0.0.1] [--port 8765]
+                                [--socket PATH] [--workers N]
+"""
+import argparse
+import collections
+import concurrent.futures
+import http.server
+import json
+import logging
+import multiprocessing
+import os
+import shutil
+import socketserver
+import tempfile
+import threading
+import time
+import urllib.parse
+
+# Defaults of the worker processes, restored before every job.
+_defaults = None
+
+
+def _initialize():
+    """ Worker process initializer, pays for the imports once. """
+    global _defaults
+    from . import convert  # noqa: F401
+    from .converter import conversion_context, conversion_options
+    from .converter.geometry import text  # noqa: F401
+
+    _defaults = (dict(conversion_options), dict(conversion_context))
+
+
+def _ping():
+    return os.getpid()
+
+
+def _run_job(job):
+    """ Convert one job in a worker process. """
+    from pxr import Sdf
+
+    from . import convert
+    from .converter import conversion_context, conversion_options
+
+    options, context = _defaults
+    conversion_options.clear()
+    conversion_options.update(options)
+    conversion_options.update(job.get("options") or {})
+    conversion_context.clear()
+    conversion_context.update(context)
+
+    start = time.perf_counter()
+    scratch = tempfile.mkdtemp(prefix="svg_to_usd_")
+    try:
+        svg_path = job.get("svg_path")
+        if svg_path is None:
+            svg_path = os.path.join(scratch, "input.svg")
+            with open(svg_path, "wb") as fh:
+                fh.write(job["svg"])
+
+        usd_path = job.get("usd_path")
+        if usd_path:
+            usd_path = os.path.abspath(usd_path)
+        else:
+            usd_path = os.path.join(scratch, "output." + job.get("format", "usda"))
+
+        # A layer left open by an earlier job would make CreateNew fail.
+        layer = Sdf.Layer.Find(usd_path)
+        if layer:
+            layer.Clear()
+
+        stage = convert.convert_new(svg_path, usd_path, stats=job.get("stats", False))
+        stats = None
+        if isinstance(stage, tuple):
+            stage, stats = stage
+        del stage
+
+        result = {
+            "pid": os.getpid(),
+            "convert_seconds": time.perf_counter() - start,
+            "stats": stats.to_dict() if stats else None,
+        }
+        if job.get("usd_path"):
+            result["usd_path"] = usd_path
+        else:
+            with open(usd_path, "rb") as fh:
+                result["usd"] = fh.read()
+        return result
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+
+class ConversionServer(object):
+    """
+    Runs jobs on a pool of warm worker processes and keeps the counters
+    reported by ``status``.
+
+    ``convert`` blocks until its job is done, at most ``workers`` jobs run
+    at once and the others wait in the queue.
+    """
+
+    def __init__(self, workers=None, history=100):
+        self.workers = workers or os.cpu_count() or 1
+        self._pool = concurrent.futures.ProcessPoolExecutor(
+            self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_initialize,
+        )
+        self._slots = threading.BoundedSemaphore(self.workers)
+        self._lock = threading.Lock()
+        self._next_id = 0
+        self.queued = 0
+        self.running = 0
+        self.completed = 0
+        self.failed = 0
+        self.recent = collections.deque(maxlen=history)
+
+    def warm_up(self):
+        """ Start every worker process now instead of on the first jobs. """
+        futures = [self._pool.submit(_ping) for _ in range(self.workers)]
+        return sorted(set(future.result() for future in futures))
+
+    def convert(self, job):
+        """
+        Run ``job`` (see ``_run_job``) and return its result with the
+        ``job``, ``queue_seconds`` and ``total_seconds`` timings added.
+        Exceptions of the conversion are raised again.
+        """
+        submitted = time.perf_counter()
+        with self._lock:
+            self._next_id += 1
+            job_id = self._next_id
+            self.queued += 1
+
+        with self._slots:
+            started = time.perf_counter()
+            with self._lock:
+                self.queued -= 1
+                self.running += 1
+            try:
+                result = self._pool.submit(_run_job, job).result()
+            except Exception:
+                with self._lock:
+                    self.failed += 1
+                raise
+            finally:
+                with self._lock:
+                    self.running -= 1
+
+        result["job"] = job_id
+        result["queue_seconds"] = started - submitted
+        result["total_seconds"] = time.perf_counter() - submitted
+        with self._lock:
+            self.completed += 1
+            self.recent.append(
+                {
+                    key: result[key]
+                    for key in ("job", "pid", "queue_seconds", "convert_seconds", "total_seconds")
+                }
+            )
+        logging.info(
+            "Job {} done in {:.3f}s ({:.3f}s queued)".format(
+                job_id, result["total_seconds"], result["queue_seconds"]
+            )
+        )
+        return result
+
+    def status(self):
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "queue_depth": self.queued,
+                "running": self.running,
+                "completed": self.completed,
+                "failed": self.failed,
+                "recent": list(self.recent),
+            }
+
+    def close(self):
+        self._pool.shutdown()
+
+
+class RequestHandler(http.server.BaseHTTPRequestHandler):
+    """ HTTP front end of the ``ConversionServer`` in ``self.server.conversion``. """
+
+    protocol_version = "HTTP/1.1"
+
+    def address_string(self):
+        # Unix socket clients have no address.
+        if isinstance(self.client_address, tuple) and self.client_address:
+            return str(self.client_address[0])
+        return "local"
+
+    def log_message(self, format, *args):
+        logging.debug("%s - %s", self.address_string(), format % args)
+
+    def _send(self, status, body, content_type="application/json", headers=None):
+        if not isinstance(body, bytes):
+            body = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if urllib.parse.urlparse(self.path).path != "/status":
+            self._send(404, {"error": "Unknown path {}".format(self.path)})
+            return
+        self._send(200, self.server.conversion.status())
+
+    def do_POST(self):
+        url = urllib.parse.urlparse(self.path)
+        if url.path != "/convert":
+            self._send(404, {"error": "Unknown path {}".format(self.path)})
+            return
+
+        length = int(self.headers.get("Content-Length", 0))
+        body = self.rfile.read(length)
+        try:
+            job = self._parse_job(body, urllib.parse.parse_qs(url.query))
+        except ValueError as e:
+            self._send(400, {"error": str(e)})
+            return
+
+        try:
+            result = self.server.conversion.convert(job)
+        except Exception as e:
+            logging.exception("Conversion failed")
+            self._send(500, {"error": "{}: {}".format(type(e).__name__, e)})
+            return
+
+        if "usd" not in result:
+            self._send(200, result)
+            return
+        self._send(
+            200,
+            result["usd"],
+            content_type="application/octet-stream",
+            headers={
+                "X-Job": str(result["job"]),
+                "X-Queue-Seconds": "{:.6f}".format(result["queue_seconds"]),
+                "X-Convert-Seconds": "{:.6f}".format(result["convert_seconds"]),
+                "X-Total-Seconds": "{:.6f}".format(result["total_seconds"]),
+            },
+        )
+
+    def _parse_job(self, body, query):
+        from .converter import conversion_options
+
+        content_type = self.headers.get("Content-Type", "")
+        if not content_type.startswith("application/json"):
+            job = {"svg": body}
+            if "format" in query:
+                job["format"] = query["format"][0]
+        else:
+            try:
+                job = json.loads(body.decode("utf-8"))
+            except (UnicodeDecodeError, json.JSONDecodeError) as e:
+                raise ValueError("Invalid JSON: {}".format(e))
+            if not isinstance(job, dict):
+                raise ValueError("Expected a JSON object")
+            if "svg" in job:
+                job["svg"] = job["svg"].encode("utf-8")
+
+        if "svg" not in job and "svg_path" not in job:
+            raise ValueError("Missing svg or svg_path")
+        if job.get("format", "usda") not in ("usda", "usdc", "usd"):
+            raise ValueError("Unknown format {}".format(job["format"]))
+        unknown = set(job.get("options") or {}) - set(conversion_options)
+        if unknown:
+            raise ValueError("Unknown options {}".format(sorted(unknown)))
+        return job
+
+
+class HTTPServer(http.server.ThreadingHTTPServer):
+    daemon_threads = True
+
+
+class UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def serve(conversion, host="127.0.0.1", port=8765, socket_path=None):
+    """ Serve ``conversion`` (a ``ConversionServer``) until interrupted. """
+    if socket_path:
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        httpd = UnixHTTPServer(socket_path, RequestHandler)
+        logging.info("Listening on {}".format(socket_path))
+    else:
+        httpd = HTTPServer((host, port), RequestHandler)
+        logging.info("Listening on http://{}:{}".format(host, httpd.server_address[1]))
+    httpd.conversion = conversion
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        httpd.server_close()
+        if socket_path and os.path.exists(socket_path):
+            os.remove(socket_path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="svg_to_usd conversion server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--socket", help="Listen on this Unix socket instead of TCP")
+    parser.add_argument(
+        "--workers", type=int, default=0, help="Worker processes, 0 uses every core"
+    )
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(format="%(levelname)s:\t%(message)s", level=logging.INFO)
+    conversion = ConversionServer(args.workers)
+    logging.info("Starting {} workers".format(conversion.workers))
+    conversion.warm_up()
+    try:
+        serve(conversion, args.host, args.port, args.socket)
+    finally:
+        conversion.close()
+
+
+if __name__ == "__main__":
+    main()
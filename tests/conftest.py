@@ -0,0 +1,47 @@
+import pytest
+
+from svg_to_usd.converter import conversion_options, conversion_context
+
+
+@pytest.fixture(autouse=True)
+def options():
+    """ The conversion options, restored after every test. """
+    saved_options = dict(conversion_options)
+    saved_context = dict(conversion_context)
+    yield conversion_options
+    conversion_options.clear()
+    conversion_options.update(saved_options)
+    conversion_context.clear()
+    conversion_context.update(saved_context)
+
+
+@pytest.fixture
+def svg_file(tmp_path):
+    """ Write SVG markup to a file and return its path. """
+
+    def write(markup, name="doc.svg"):
+        path = tmp_path / name
+        path.write_text(
+            '<svg xmlns="http://www.w3.org/2000/svg" '
+            'xmlns:xlink="http://www.w3.org/1999/xlink" '
+            'width="100" height="100" viewBox="0 0 100 100">{}</svg>'.format(markup)
+        )
+        return str(path)
+
+    return write
+
+
+
+@pytest.fixture
+def convert_svg(svg_file):
+    """ Convert SVG markup into a new in-memory stage. """
+    from pxr import Usd
+    from svg_to_usd import convert
+
+    def run(markup, **options):
+        conversion_options.update(options)
+        stage = Usd.Stage.CreateInMemory()
+        convert.convert(svg_file(markup), stage)
+        return stage
+
+    return run
@@ -0,0 +1,97 @@
+import logging
+
+import pytest
+from pxr import UsdGeom
+
+from svg_to_usd.converter import budgets
+
+SQUARES = " ".join("M{0} 0 h1 v1 h-1 z".format(i * 2) for i in range(5))
+SHAPES = (
+    '<path id="squares" d="{}"/>'
+    '<polygon id="triangle" points="0,0 4,0 4,4"/>'
+    '<rect id="box" width="3" height="3"/>'
+).format(SQUARES)
+
+
+def geometry(stage, name):
+    prim = stage.GetPrimAtPath("/" + name)
+    if not prim:
+        return None, 0
+    return prim.GetTypeName(), len(prim.GetAttribute("points").Get())
+
+
+def test_within_budget(convert_svg):
+    stage = convert_svg(SHAPES, element_max_subpaths=5, element_max_vertices=20)
+    assert geometry(stage, "squares") == ("Mesh", 20)
+    assert budgets.exceeded == []
+
+
+def test_subpaths_fall_back_to_curves(convert_svg, caplog):
+    with caplog.at_level(logging.WARNING):
+        stage = convert_svg(SHAPES, element_max_subpaths=3)
+    assert geometry(stage, "squares") == ("BasisCurves", 25)
+    curves = UsdGeom.BasisCurves(stage.GetPrimAtPath("/squares"))
+    assert curves.GetTypeAttr().Get() == UsdGeom.Tokens.linear
+    assert list(curves.GetCurveVertexCountsAttr().Get()) == [5] * 5
+    assert geometry(stage, "triangle") == ("Mesh", 3)
+
+    record = {
+        "element": "squares",
+        "tag": "path",
+        "budget": "subpaths",
+        "value": 5,
+        "limit": 3,
+        "fallback": "curves",
+    }
+    assert budgets.exceeded == [record]
+    assert [r.budget for r in caplog.records if hasattr(r, "budget")] == [record]
+
+
+def test_vertices_fall_back_to_bounds(convert_svg):
+    stage = convert_svg(SHAPES, element_max_vertices=10)
+    assert geometry(stage, "squares") == ("Mesh", 4)
+    extent = UsdGeom.Mesh(stage.GetPrimAtPath("/squares")).GetExtentAttr().Get()
+    assert tuple(extent[0]) == pytest.approx((0, 0, 0))
+    assert tuple(extent[1]) == pytest.approx((9, 0, 1))
+    assert budgets.exceeded[0]["fallback"] == "bbox"
+
+
+def test_seconds(convert_svg):
+    stage = convert_svg(SHAPES, element_max_seconds=1e-12)
+    assert geometry(stage, "squares") == ("BasisCurves", 25)
+    assert budgets.exceeded[0]["budget"] == "seconds"
+
+
+def test_document_seconds(convert_svg):
+    stage = convert_svg(SHAPES, document_max_seconds=1e-12)
+    assert geometry(stage, "squares") == ("BasisCurves", 25)
+    # Polygons are closed, shapes without an outline get their bounds
+    triangle = stage.GetPrimAtPath("/triangle").GetAttribute("points").Get()
+    assert len(triangle) == 4 and triangle[0] == triangle[-1]
+    assert geometry(stage, "box") == ("Mesh", 4)
+    assert [r["fallback"] for r in budgets.exceeded] == ["curves", "curves", "bbox"]
+
+
+def test_skip(convert_svg):
+    stage = convert_svg(SHAPES, element_max_subpaths=3, budget_fallback="skip")
+    assert geometry(stage, "squares") == (None, 0)
+    assert budgets.exceeded[0]["fallback"] == "skip"
+
+
+def test_document_vertices(convert_svg, caplog):
+    with caplog.at_level(logging.WARNING):
+        stage = convert_svg(
+            SHAPES + '<text id="label" x="1" y="1">hi</text>', document_max_vertices=5
+        )
+    # The first element is converted, the others once the budget is spent
+    assert geometry(stage, "squares") == ("Mesh", 20)
+    assert geometry(stage, "triangle") == ("Mesh", 4)
+    assert geometry(stage, "box") == ("Mesh", 4)
+    assert not stage.GetPrimAtPath("/label")
+    assert [(r["element"], r["fallback"]) for r in budgets.exceeded] == [
+        ("triangle", "bbox"),
+        ("box", "bbox"),
+        ("label", "skip"),
+    ]
+    # Warned about once
+    assert len([r for r in caplog.records if hasattr(r, "budget")]) == 1
@@ -0,0 +1,109 @@
+import xml.etree.ElementTree as ET
+
+import pytest
+from pxr import Usd
+
+from svg_to_usd.converter import culling
+
+SHAPES = """
+<rect id="out" x="200" width="10" height="10"/>
+<rect id="edge" x="95" width="10" height="10"/>
+<rect id="moved" x="200" width="10" height="10" transform="translate(-150 0)"/>
+<rect id="reach" x="101" width="10" height="10" fill="none" stroke="red" stroke-width="4"/>
+<g id="away" transform="translate(500 0)"><rect id="in_away" width="5" height="5"/></g>
+<g id="text_group"><text id="label" x="300" y="10">hi</text></g>
+<g id="ref" transform="translate(300 0)"><rect id="in_ref" width="5" height="5"/></g>
+<use id="instance" xlink:href="#ref" x="-290"/>
+<rect id="tiny" width="0.5" height="0.5"/>
+<rect id="scaled" width="0.5" height="0.5" transform="scale(10)"/>
+<rect id="undisplayed" width="5" height="5" display="none"/>
+<rect id="clear" width="5" height="5" opacity="0"/>
+<rect id="hidden" width="5" height="5" visibility="hidden"/>
+<rect id="unpainted" width="5" height="5" fill="none"/>
+<g id="unpainted_group" fill="none"><rect id="inherited" width="5" height="5"/></g>
+<rect id="outlined" width="5" height="5" fill="none" stroke="black"/>
+"""
+ALL = {
+    "/out", "/edge", "/moved", "/reach", "/away", "/away/in_away", "/text_group",
+    "/text_group/label", "/ref", "/ref/in_ref", "/instance", "/instance/ref",
+    "/instance/ref/in_ref", "/tiny", "/scaled", "/undisplayed", "/clear", "/hidden",
+    "/unpainted", "/unpainted_group", "/unpainted_group/inherited", "/outlined",
+}
+
+
+def converted(stage):
+    """ Paths of the converted prims, instances included. """
+    return {
+        str(prim.GetPath())
+        for prim in stage.Traverse(Usd.TraverseInstanceProxies())
+    }
+
+
+def test_nothing_is_culled_by_default(convert_svg):
+    assert converted(convert_svg(SHAPES)) == ALL
+
+
+def test_viewport(convert_svg):
+    culled = ALL - converted(convert_svg(SHAPES, cull_viewport=True))
+    # Referenced elements are culled in place, but not where they are used
+    assert culled == {"/out", "/away", "/away/in_away", "/ref", "/ref/in_ref"}
+
+
+def test_min_area(convert_svg):
+    culled = ALL - converted(convert_svg(SHAPES, cull_min_area=1.0))
+    assert culled == {"/tiny"}
+
+
+def test_min_area_after_transforms(convert_svg):
+    markup = '<g id="g" transform="scale(0.5)"><rect id="small" width="1.5" height="1.5"/></g>'
+    assert "/g/small" not in converted(convert_svg(markup, cull_min_area=1.0))
+    assert "/g/small" in converted(convert_svg(markup, cull_min_area=0.5))
+
+
+def test_invisible(convert_svg):
+    culled = ALL - converted(convert_svg(SHAPES, cull_invisible=True))
+    assert culled == {
+        "/undisplayed", "/clear", "/hidden", "/unpainted", "/unpainted_group/inherited",
+    }
+
+
+def root(markup):
+    return ET.fromstring(markup.format(xmlns='xmlns="http://www.w3.org/2000/svg"'))
+
+
+@pytest.mark.parametrize(
+    "markup, expected",
+    [
+        ('<svg {xmlns} width="200" height="100"/>', ((0, 0, 200, 100), 1)),
+        ('<svg {xmlns} width="1in" height="2cm"/>', ((0, 0, 96, 96 / 2.54 * 2), 1)),
+        ('<svg {xmlns} viewBox="10 20 30 40"/>', ((10, 20, 40, 60), 1)),
+        ('<svg {xmlns} width="200" height="200" viewBox="0 0 100 100"/>', ((0, 0, 100, 100), 4)),
+        # Letterboxed, the viewport shows more than the viewBox
+        ('<svg {xmlns} width="200" height="100" viewBox="0 0 100 100"/>', ((-100, 0, 200, 100), 1)),
+        (
+            '<svg {xmlns} width="200" height="100" viewBox="0 0 100 100" '
+            'preserveAspectRatio="none"/>',
+            ((0, 0, 100, 100), 2),
+        ),
+        ('<svg {xmlns} width="100%" height="100%"/>', (None, 1)),
+    ],
+)
+def test_document_viewport(markup, expected):
+    box, pixel_area = culling.viewport(root(markup))
+    expected_box, expected_area = expected
+    if expected_box is None:
+        assert box is None
+    else:
+        assert box == pytest.approx(expected_box)
+    assert pixel_area == pytest.approx(expected_area)
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    [("10", 10), ("10px", 10), ("1in", 96), ("3pt", 4), (" 2pc ", 32), ("50%", None), ("em", None)],
+)
+def test_length(value, expected):
+    if expected is None:
+        assert culling.length(value) is None
+    else:
+        assert culling.length(value) == pytest.approx(expected)
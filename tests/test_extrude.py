@@ -0,0 +1,96 @@
+import numpy as np
+import pytest
+from pxr import UsdGeom
+
+SHAPES = (
+    '<rect id="rect" width="10" height="20"/>'
+    '<path id="ring" d="M0 0 H30 V30 H0 Z M10 10 V20 H20 V10 Z" fill-rule="evenodd"/>'
+    '<circle id="circle" cx="50" cy="50" r="10"/>'
+    '<polygon id="own" points="0,0 4,0 0,4" data-extrude-depth="2"/>'
+    '<line id="line" x1="0" y1="0" x2="3" y2="3" stroke="red"/>'
+)
+
+
+@pytest.fixture
+def stage(convert_svg):
+    return convert_svg(SHAPES, extrude_depth=5.0)
+
+
+def mesh_arrays(stage, name):
+    mesh = UsdGeom.Mesh(stage.GetPrimAtPath("/" + name))
+    points = np.asarray(mesh.GetPointsAttr().Get(), dtype=np.float64)
+    indices = np.asarray(mesh.GetFaceVertexIndicesAttr().Get())
+    counts = np.asarray(mesh.GetFaceVertexCountsAttr().Get())
+    return mesh, points, indices, counts
+
+
+def faces(indices, counts):
+    return np.split(indices, np.cumsum(counts)[:-1])
+
+
+def volume(points, indices, counts):
+    """ Signed volume of a closed mesh, positive when its faces point out. """
+    total = 0.0
+    for face in faces(indices, counts):
+        for i in range(1, len(face) - 1):
+            a, b, c = points[face[0]], points[face[i]], points[face[i + 1]]
+            total += np.dot(a, np.cross(b, c)) / 6.0
+    return total
+
+
+def edges(indices, counts):
+    directed = []
+    for face in faces(indices, counts):
+        directed += [(a, b) for a, b in zip(face, np.roll(face, -1)) if a != b]
+    return directed
+
+
+def test_rect_becomes_a_box(stage):
+    mesh, points, indices, counts = mesh_arrays(stage, "rect")
+    assert len(points) == 8
+    assert counts.tolist() == [4] * 6
+    extent = mesh.GetExtentAttr().Get()
+    assert tuple(extent[0]) == pytest.approx((0, -5, 0))
+    assert tuple(extent[1]) == pytest.approx((10, 0, 20))
+    assert volume(points, indices, counts) == pytest.approx(10 * 20 * 5)
+
+
+@pytest.mark.parametrize("name", ["rect", "ring", "circle", "own"])
+def test_solids_are_closed(stage, name):
+    _, _, indices, counts = mesh_arrays(stage, name)
+    directed = edges(indices, counts)
+    # Every edge is used once in each direction
+    assert sorted(directed) == sorted((b, a) for a, b in directed)
+
+
+def test_holes_get_walls_and_no_bridge_walls(stage):
+    _, points, indices, counts = mesh_arrays(stage, "ring")
+    assert (counts == 4).sum() == 8
+    assert volume(points, indices, counts) == pytest.approx((30 * 30 - 10 * 10) * 5)
+
+
+def test_normals_are_per_face(stage):
+    mesh, _, _, counts = mesh_arrays(stage, "circle")
+    normals = np.asarray(mesh.GetNormalsAttr().Get())
+    assert mesh.GetNormalsInterpolation() == UsdGeom.Tokens.uniform
+    assert len(normals) == len(counts)
+    np.testing.assert_allclose(normals[0], [0, 1, 0])
+    np.testing.assert_allclose(normals[1], [0, -1, 0])
+    np.testing.assert_allclose(np.linalg.norm(normals, axis=1), 1, rtol=1e-6)
+    np.testing.assert_allclose(normals[2:, 1], 0, atol=1e-6)
+
+
+def test_depth_attribute_overrides_option(stage):
+    _, points, indices, counts = mesh_arrays(stage, "own")
+    assert points[:, 1].min() == pytest.approx(-2)
+    assert volume(points, indices, counts) == pytest.approx(8 * 2)
+
+
+def test_lines_are_not_extruded(stage):
+    assert stage.GetPrimAtPath("/line").IsA(UsdGeom.BasisCurves)
+
+
+def test_depth_attribute_alone_extrudes(convert_svg):
+    stage = convert_svg(SHAPES)
+    assert len(mesh_arrays(stage, "rect")[1]) == 4
+    assert len(mesh_arrays(stage, "own")[1]) == 6
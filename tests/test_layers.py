@@ -0,0 +1,84 @@
+import glob
+import os
+
+import pytest
+from pxr import Usd
+
+from svg_to_usd import convert
+from svg_to_usd.converter import conversion_options
+
+DEFS = (
+    '<defs><linearGradient id="fade"><stop offset="0" stop-color="red"/>'
+    '<stop offset="1" stop-color="blue"/></linearGradient>'
+    '<symbol id="mark" viewBox="0 0 10 10"><circle cx="5" cy="5" r="4"/></symbol></defs>'
+)
+GROUP = (
+    '<g id="part_{0}" transform="rotate({1} 50 50)">'
+    '<rect id="box_{0}" x="{0}" y="10" width="8" height="6" fill="url(#fade)"/>'
+    '<path id="ring_{0}" d="M{0} 30 h20 v20 h-20 z m5 5 v10 h10 v-10 z" fill="green"/>'
+    '<use id="mark_{0}" xlink:href="#mark" x="{0}" y="60" width="5" height="5"/>'
+    '<polyline id="line_{0}" points="{0},80 {1},90 30,85" fill="none" stroke="black"/>'
+    "</g>"
+)
+GROUPS = "".join(GROUP.format(i, i * 7) for i in range(6))
+DOCUMENTS = {
+    "flat": DEFS + GROUPS,
+    # A single wrapper group, like an Inkscape layer
+    "wrapped": DEFS + '<g id="layer" transform="translate(5 5) scale(0.9)">{}</g>'.format(GROUPS),
+}
+
+
+def flat(stage):
+    """ Every composed prim, attribute value and relationship target. """
+    lines = []
+    predicate = Usd.TraverseInstanceProxies(Usd.PrimAllPrimsPredicate)
+    for prim in stage.Traverse(predicate):
+        lines.append("{} {} {}".format(prim.GetPath(), prim.GetTypeName(), prim.IsInstance()))
+        for attribute in prim.GetAttributes():
+            if attribute.HasAuthoredValue():
+                lines.append("  {} {}".format(attribute.GetName(), attribute.Get()))
+        for relationship in prim.GetRelationships():
+            lines.append("  {} {}".format(relationship.GetName(), relationship.GetTargets()))
+    return lines
+
+
+def convert_both(svg_file, tmp_path, markup, **options):
+    path = svg_file(markup)
+    expected = flat(convert.convert_new(path, str(tmp_path / "memory.usda")))
+    conversion_options.update(options)
+    actual = flat(convert.convert_new(path, str(tmp_path / "layers.usda")))
+    return expected, actual
+
+
+@pytest.mark.parametrize("document", sorted(DOCUMENTS))
+@pytest.mark.parametrize("size", [1, 4, 1000])
+@pytest.mark.parametrize("bake", [False, True], ids=["xforms", "baked"])
+def test_streamed_output_matches(svg_file, tmp_path, document, size, bake):
+    conversion_options["bake_transforms"] = bake
+    expected, actual = convert_both(
+        svg_file, tmp_path, DOCUMENTS[document], stream_chunk_size=size
+    )
+    assert actual == expected
+
+
+def test_wrapper_groups_are_split_between_chunks(svg_file, tmp_path):
+    convert_both(svg_file, tmp_path, DOCUMENTS["wrapped"], stream_chunk_size=4)
+    chunks = glob.glob(os.path.join(str(tmp_path), "layers_chunks", "chunk_*.usda"))
+    # Materials, then at least one chunk for each group of 5 elements
+    assert len(chunks) > 6
+
+
+@pytest.mark.parametrize("document", sorted(DOCUMENTS))
+@pytest.mark.parametrize(
+    "shard_by, shard_size", [("count", 4), ("count", 1000), ("group", 4)]
+)
+def test_sharded_output_matches(svg_file, tmp_path, document, shard_by, shard_size):
+    expected, actual = convert_both(
+        svg_file,
+        tmp_path,
+        DOCUMENTS[document],
+        shard_by=shard_by,
+        shard_size=shard_size,
+        shard_workers=2,
+    )
+    assert actual == expected
@@ -0,0 +1,122 @@
+import logging
+
+import numpy as np
+import pytest
+from pxr import Usd, UsdGeom, Vt
+
+from svg_to_usd.converter import optimize
+
+# Two unit quads sharing an edge, every face with its own points, and an
+# unused point at the end.
+POINTS = [
+    (0, 0, 0), (1, 0, 0), (1, 0, 1), (0, 0, 1),
+    (1, 0, 0), (2, 0, 0), (2, 0, 1), (1, 0, 1),
+    (9, 0, 9),
+]
+INDICES = [0, 1, 2, 3, 4, 5, 6, 7]
+COUNTS = [4, 4]
+
+
+@pytest.fixture
+def mesh():
+    stage = Usd.Stage.CreateInMemory()
+    usd_mesh = UsdGeom.Mesh.Define(stage, "/mesh")
+    usd_mesh.CreatePointsAttr(POINTS)
+    usd_mesh.CreateFaceVertexIndicesAttr(INDICES)
+    usd_mesh.CreateFaceVertexCountsAttr(COUNTS)
+    # The stage must outlive the test
+    yield usd_mesh
+
+
+def corners(usd_mesh):
+    """ The position of every face vertex, what welding must not change. """
+    points = np.asarray(usd_mesh.GetPointsAttr().Get())
+    return points[np.asarray(usd_mesh.GetFaceVertexIndicesAttr().Get())]
+
+
+def run(usd_mesh, **options):
+    optimize.conversion_options.update(options)
+    optimize.apply(usd_mesh)
+
+
+def test_weld_merges_coincident_points_and_drops_unused(mesh):
+    before = corners(mesh)
+    run(mesh, weld_points=True)
+    assert len(mesh.GetPointsAttr().Get()) == 6
+    np.testing.assert_array_equal(corners(mesh), before)
+    assert list(mesh.GetFaceVertexCountsAttr().Get()) == COUNTS
+    extent = mesh.GetExtentAttr().Get()
+    assert tuple(extent[1]) == (2, 0, 1)
+
+
+def test_points_are_in_vertex_fetch_order(mesh):
+    run(mesh, weld_points=True)
+    indices = list(mesh.GetFaceVertexIndicesAttr().Get())
+    first_uses = sorted(set(indices), key=indices.index)
+    assert first_uses == list(range(len(first_uses)))
+    assert indices == [0, 1, 2, 3, 1, 4, 5, 2]
+
+
+def test_different_per_point_primvars_are_not_welded(mesh):
+    colors = [(i / 10.0, 0, 0) for i in range(len(POINTS))]
+    primvar = mesh.CreateDisplayColorPrimvar(UsdGeom.Tokens.vertex)
+    primvar.Set(colors)
+    before = corners(mesh)
+    run(mesh, weld_points=True)
+    # Only the unused point goes
+    assert len(mesh.GetPointsAttr().Get()) == 8
+    np.testing.assert_array_equal(corners(mesh), before)
+    remapped = np.asarray(primvar.Get())[np.asarray(mesh.GetFaceVertexIndicesAttr().Get())]
+    np.testing.assert_allclose(remapped, np.asarray(colors)[INDICES])
+
+
+def test_indexed_primvars_follow_the_points(mesh):
+    primvar = mesh.CreateDisplayColorPrimvar(UsdGeom.Tokens.vertex)
+    primvar.Set([(1, 0, 0), (0, 1, 0)])
+    primvar.SetIndices(Vt.IntArray([0, 1, 1, 0, 1, 0, 1, 1, 0]))
+    run(mesh, weld_points=True)
+    assert len(mesh.GetPointsAttr().Get()) == 6
+    assert list(primvar.GetIndices()) == [0, 1, 1, 0, 0, 1]
+
+
+def test_mismatched_primvars_prevent_welding(mesh, caplog):
+    primvar = mesh.CreateDisplayColorPrimvar(UsdGeom.Tokens.vertex)
+    primvar.Set([(1, 0, 0)])
+    with caplog.at_level(logging.WARNING):
+        run(mesh, weld_points=True)
+    assert len(mesh.GetPointsAttr().Get()) == len(POINTS)
+    assert "Not welding" in caplog.text
+
+
+def test_negative_zero_welds_with_zero(mesh):
+    points = list(POINTS)
+    points[4] = (1, -0.0, 0)
+    mesh.GetPointsAttr().Set(points)
+    run(mesh, weld_points=True)
+    assert len(mesh.GetPointsAttr().Get()) == 6
+
+
+def test_quantize_snaps_then_welds(mesh):
+    points = list(POINTS)
+    points[4] = (1.04, 0, 0.03)
+    mesh.GetPointsAttr().Set(points)
+    run(mesh, weld_points=True, quantize_grid=0.25)
+    assert len(mesh.GetPointsAttr().Get()) == 6
+
+    points = np.asarray(mesh.GetPointsAttr().Get())
+    np.testing.assert_array_equal(points, np.round(points / 0.25) * 0.25)
+
+
+def test_quantize_alone_keeps_the_topology(mesh):
+    run(mesh, quantize_grid=0.5)
+    assert len(mesh.GetPointsAttr().Get()) == len(POINTS)
+    assert list(mesh.GetFaceVertexIndicesAttr().Get()) == INDICES
+
+
+def test_stroke_outlines_are_welded_when_converted(convert_svg):
+    markup = '<polyline id="line" points="0,0 10,0 10,10 20,10" fill="none" stroke="red"/>'
+    stage = convert_svg(markup, stroke_to_mesh=True)
+    count = len(UsdGeom.Mesh(stage.GetPrimAtPath("/line")).GetPointsAttr().Get())
+    stage = convert_svg(markup, stroke_to_mesh=True, weld_points=True)
+    welded = UsdGeom.Mesh(stage.GetPrimAtPath("/line")).GetPointsAttr().Get()
+    assert len(welded) < count
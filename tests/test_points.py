@@ -0,0 +1,49 @@
+import logging
+
+import pytest
+
+from svg_to_usd.converter import svgpath
+
+
+@pytest.mark.parametrize(
+    "points",
+    ["1,2 3,4", "1 2 3 4", "1 2,3 4", "1,2,3,4", "  1 , 2\n3\t4 ", "1,2\r\n3,4"],
+)
+def test_separators(points):
+    assert svgpath.parse_points(points).tolist() == [[1, 2], [3, 4]]
+
+
+def test_compact_negatives_and_decimals():
+    assert svgpath.parse_points("10-5-3.5.5").tolist() == [[10, -5], [-3.5, 0.5]]
+
+
+def test_exponents_and_signs():
+    assert svgpath.parse_points("1e1,2E-1 -3,+4").tolist() == [[10, 0.2], [-3, 4]]
+
+
+def test_odd_trailing_coordinate_is_dropped(caplog):
+    with caplog.at_level(logging.WARNING):
+        points = svgpath.parse_points("1 2 3")
+    assert points.tolist() == [[1, 2]]
+    assert "odd coordinate" in caplog.text
+
+
+@pytest.mark.parametrize("points", ["", "   ", "\n"])
+def test_empty(points):
+    assert svgpath.parse_points(points).shape == (0, 2)
+
+
+def test_polyline_without_points_is_skipped(convert_svg, caplog):
+    with caplog.at_level(logging.WARNING):
+        stage = convert_svg('<polyline id="line" fill="none" stroke="black"/>')
+    assert not stage.GetPrimAtPath("/line")
+    assert "no points attribute" in caplog.text
+
+
+def test_polygon_points_become_mesh_points(convert_svg):
+    from pxr import UsdGeom
+
+    stage = convert_svg('<polygon id="shape" points="10,10 20-5 30,10"/>')
+    mesh = UsdGeom.Mesh(stage.GetPrimAtPath("/shape"))
+    points = [tuple(p) for p in mesh.GetPointsAttr().Get()]
+    assert points == [(10, 0, 10), (20, 0, -5), (30, 0, 10)]
@@ -0,0 +1,102 @@
+import os
+import threading
+
+import pytest
+from pxr import Usd
+
+from svg_to_usd import convert
+from svg_to_usd.convert import ConversionCancelled
+from svg_to_usd.converter import conversion_context, conversion_options
+
+SHAPES = "".join(
+    '<g id="group_{0}"><rect id="rect_{0}" x="{0}" width="1" height="1"/>'
+    '<circle id="circle_{0}" cx="{0}" cy="5" r="1"/></g>'.format(i)
+    for i in range(20)
+)
+
+
+def cancel_after(count):
+    """ A progress callback cancelling once ``count`` elements are converted. """
+    calls = []
+
+    def progress(processed, total, stage, element_id):
+        calls.append((processed, total, stage, element_id))
+        return stage == "convert" and processed >= count
+
+    progress.calls = calls
+    return progress
+
+
+@pytest.fixture(autouse=True)
+def report_every_element(options):
+    options["progress_interval"] = 0.0
+
+
+def test_progress_reports(svg_file):
+    calls = []
+    stage = Usd.Stage.CreateInMemory()
+    convert.convert(svg_file(SHAPES), stage, progress=lambda *args: calls.append(args))
+
+    stages = [stage_name for _, _, stage_name, _ in calls]
+    assert stages[0] == "parse"
+    assert [s for i, s in enumerate(stages) if i == 0 or s != stages[i - 1]] == [
+        "parse", "preprocess", "cull", "convert",
+    ]
+    processed = [p for p, _, _, _ in calls]
+    assert processed == sorted(processed)
+    total = calls[-1][1]
+    assert processed[-1] == total == 61
+    assert "rect_3" in [element_id for _, _, _, element_id in calls]
+
+
+def files(directory):
+    return sorted(
+        os.path.join(parent, name)
+        for parent, _, names in os.walk(directory)
+        for name in names
+    )
+
+
+@pytest.mark.parametrize(
+    "extra_options",
+    [
+        {},
+        {"stream_chunk_size": 5},
+        {"payload_min_prims": 2},
+        {"shard_by": "count", "shard_size": 6, "shard_workers": 1},
+    ],
+    ids=["layer", "streamed", "payloads", "sharded"],
+)
+def test_cancelled_conversion_leaves_no_files(svg_file, tmp_path, extra_options):
+    conversion_options.update(extra_options)
+    path = svg_file(SHAPES)
+    before = files(tmp_path)
+    usd_path = str(tmp_path / "out.usda")
+    progress = cancel_after(30)
+    with pytest.raises(ConversionCancelled):
+        convert.convert_new(path, usd_path, progress=progress)
+    assert progress.calls[-1][0] >= 30
+    assert files(tmp_path) == before
+
+    # Nothing is left open either, the same path converts again
+    stage = convert.convert_new(path, usd_path)
+    assert stage.GetPrimAtPath("/group_19/circle_19")
+
+
+def test_cancelled_conversion_restores_the_stage(svg_file):
+    stage = Usd.Stage.CreateInMemory()
+    stage.DefinePrim("/existing", "Xform")
+    before = stage.GetRootLayer().ExportToString()
+    with pytest.raises(ConversionCancelled):
+        convert.convert(svg_file(SHAPES), stage, progress=cancel_after(10))
+    assert stage.GetRootLayer().ExportToString() == before
+
+
+def test_cancel_event(svg_file, tmp_path):
+    cancel = threading.Event()
+    cancel.set()
+    conversion_context["cancel"] = cancel
+    usd_path = str(tmp_path / "out.usda")
+    with pytest.raises(ConversionCancelled):
+        convert.convert_new(svg_file(SHAPES), usd_path)
+    assert not os.path.exists(usd_path)
@@ -0,0 +1,101 @@
+import numpy as np
+import pytest
+from pxr import UsdGeom
+
+from svg_to_usd.converter import simplify
+
+
+def noisy_polylines(seed, sizes):
+    random = np.random.default_rng(seed)
+    parts = []
+    for size in sizes:
+        t = np.linspace(0.0, 2.0 * np.pi, size)
+        outline = np.stack([np.cos(t) * 50.0, np.sin(3.0 * t) * 20.0], axis=1)
+        parts.append(outline + random.normal(scale=0.05, size=(size, 2)))
+    offsets = np.concatenate([[0], np.cumsum(sizes)])
+    return np.concatenate(parts), offsets
+
+
+def segment_distance(point, a, b):
+    ab = b - a
+    length = np.dot(ab, ab)
+    t = np.clip(np.dot(point - a, ab) / length, 0.0, 1.0) if length else 0.0
+    return np.linalg.norm(point - a - t * ab)
+
+
+def check_invariants(vertices, offsets, keep, tolerance):
+    for start, end in zip(offsets[:-1], offsets[1:]):
+        if end == start:
+            continue
+        kept = np.flatnonzero(keep[start:end]) + start
+        assert kept[0] == start and kept[-1] == end - 1
+        if end - start >= 3:
+            assert len(kept) >= 3
+        for a, b in zip(kept[:-1], kept[1:]):
+            for i in range(a + 1, b):
+                assert segment_distance(vertices[i], vertices[a], vertices[b]) <= tolerance
+
+
+@pytest.mark.parametrize(
+    "sizes",
+    [[40], [5, 60, 3, 2, 90], [300, 1000], [9000]],
+    ids=["single", "small", "batched", "chunked"],
+)
+@pytest.mark.parametrize("tolerance", [0.01, 0.1, 1.0])
+def test_dropped_vertices_stay_within_tolerance(sizes, tolerance):
+    vertices, offsets = noisy_polylines(len(sizes), sizes)
+    keep = simplify.douglas_peucker(vertices, offsets, tolerance)
+    check_invariants(vertices, offsets, keep, tolerance)
+    if tolerance >= 1.0:
+        assert keep.sum() < len(vertices)
+
+
+def test_batched_and_per_range_splits_agree():
+    vertices, offsets = noisy_polylines(1, [50, 80, 30])
+    first, last = offsets[:-1], offsets[1:] - 1
+
+    each = np.zeros(len(vertices), dtype=bool)
+    simplify._split_each(vertices, first, last, 0.2, each)
+    batched = np.zeros(len(vertices), dtype=bool)
+    simplify._split_batched(vertices, first, last, 0.2, batched)
+    np.testing.assert_array_equal(each, batched)
+
+
+def test_collinear_vertices_are_dropped():
+    square = np.array(
+        [[0, 0], [5, 0], [10, 0], [10, 5], [10, 10], [5, 10], [0, 10], [0, 5]], dtype=float
+    )
+    assert simplify.points(square, 0.01).tolist() == [
+        [0, 0], [10, 0], [10, 10], [0, 10], [0, 5],
+    ]
+
+
+def test_small_polygons_do_not_collapse():
+    sliver = np.array([[0, 0], [10, 0.001], [20, 0]], dtype=float)
+    np.testing.assert_array_equal(simplify.points(sliver, 1.0), sliver)
+
+
+def test_zero_tolerance_keeps_everything():
+    vertices, offsets = noisy_polylines(0, [100])
+    assert simplify.polylines(vertices, offsets, 0.0)[0] is vertices
+
+
+def test_offsets_follow_the_kept_vertices():
+    vertices, offsets = noisy_polylines(2, [100, 4, 200])
+    simplified, new_offsets = simplify.polylines(vertices, offsets, 0.5)
+    keep = simplify.douglas_peucker(vertices, offsets, 0.5)
+    for i in range(3):
+        start, end = offsets[i], offsets[i + 1]
+        np.testing.assert_array_equal(
+            simplified[new_offsets[i] : new_offsets[i + 1]], vertices[start:end][keep[start:end]]
+        )
+
+
+def test_paths_are_simplified_when_converted(convert_svg):
+    d = "M0 0 " + " ".join("L{} {}".format(x, (x % 2) * 0.01) for x in range(1, 50))
+    d += " L49 20 L0 20 Z"
+    markup = '<path id="wavy" d="{}"/>'.format(d)
+    stage = convert_svg(markup)
+    assert len(UsdGeom.Mesh(stage.GetPrimAtPath("/wavy")).GetPointsAttr().Get()) == 52
+    stage = convert_svg(markup, simplify_tolerance=0.1)
+    assert len(UsdGeom.Mesh(stage.GetPrimAtPath("/wavy")).GetPointsAttr().Get()) == 4
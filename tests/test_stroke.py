@@ -0,0 +1,142 @@
+import numpy as np
+import pytest
+from pxr import UsdGeom
+
+from svg_to_usd.converter import stroke
+
+LINE = [(np.array([[0.0, 0.0], [10.0, 0.0]]), False)]
+CORNER = [(np.array([[0.0, 0.0], [10.0, 0.0], [10.0, 10.0]]), False)]
+SQUARE = [(np.array([[0.0, 0.0], [10.0, 0.0], [10.0, 10.0], [0.0, 10.0]]), True)]
+
+
+def outline(polylines, **attributes):
+    element_attributes = {"stroke": "black", "stroke-width": "2"}
+    element_attributes.update(attributes)
+    return stroke.outline(polylines, stroke.stroke_style(element_attributes))
+
+
+def face_areas(points, indices, counts):
+    areas = []
+    for face in np.split(indices, np.cumsum(counts)[:-1]):
+        x, y = points[face, 0], points[face, 1]
+        areas.append(0.5 * np.sum(x * np.roll(y, -1) - np.roll(x, -1) * y))
+    return np.array(areas)
+
+
+def has_point(points, point):
+    return np.isclose(points, point).all(axis=1).any()
+
+
+def test_butt_cap():
+    points, indices, counts = outline(LINE)
+    assert points.min(axis=0).tolist() == [0, -1]
+    assert points.max(axis=0).tolist() == [10, 1]
+    assert abs(face_areas(points, indices, counts).sum()) == pytest.approx(20)
+
+
+def test_square_cap():
+    points, _, _ = outline(LINE, **{"stroke-linecap": "square"})
+    assert points.min(axis=0).tolist() == [-1, -1]
+    assert points.max(axis=0).tolist() == [11, 1]
+
+
+def test_round_cap():
+    points, _, _ = outline(LINE, **{"stroke-linecap": "round"})
+    assert points[:, 0].min() == pytest.approx(-1)
+    assert points[:, 0].max() == pytest.approx(11)
+    beyond = points[points[:, 0] > 10]
+    np.testing.assert_allclose(np.linalg.norm(beyond - [10, 0], axis=1), 1)
+
+
+@pytest.mark.parametrize("join, corner", [("miter", True), ("bevel", False), ("round", False)])
+def test_joins(join, corner):
+    points, _, _ = outline(CORNER, **{"stroke-linejoin": join})
+    assert has_point(points, [11, -1]) == corner
+    assert points.max(axis=0).tolist() == pytest.approx([11, 10])
+    if join == "round":
+        outside = points[(points[:, 0] > 10) & (points[:, 1] < 0)]
+        assert len(outside)
+        np.testing.assert_allclose(np.linalg.norm(outside - [10, 0], axis=1), 1)
+
+
+def test_miter_limit_falls_back_to_bevel():
+    sharp = [(np.array([[0.0, 0.0], [10.0, 0.0], [0.0, 1.0]]), False)]
+    limited, _, _ = outline(sharp, **{"stroke-miterlimit": "4"})
+    assert limited[:, 0].max() < 11
+    unlimited, _, _ = outline(sharp, **{"stroke-miterlimit": "100"})
+    assert unlimited[:, 0].max() > 20
+
+
+def test_closed_polylines_have_no_caps():
+    points, _, _ = outline(SQUARE, **{"stroke-linecap": "square"})
+    assert points.min(axis=0).tolist() == [-1, -1]
+    assert points.max(axis=0).tolist() == [11, 11]
+    assert has_point(points, [-1, -1])
+
+
+def test_faces_share_one_winding():
+    for polylines in (LINE, CORNER, SQUARE):
+        for join in ("miter", "bevel", "round"):
+            areas = face_areas(*outline(polylines, **{"stroke-linejoin": join}))
+            assert (areas[np.abs(areas) > 1e-9] < 0).all()
+
+
+def test_dashes():
+    points, _, counts = outline(LINE, **{"stroke-dasharray": "2 3"})
+    assert len(counts) == 2
+    assert sorted(set(points[:, 0].round(6))) == [0, 2, 5, 7]
+
+
+def test_dash_offset():
+    points, _, _ = outline(LINE, **{"stroke-dasharray": "2,3", "stroke-dashoffset": "1"})
+    assert sorted(set(points[:, 0].round(6))) == [0, 1, 4, 6, 9, 10]
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    [
+        ("1 2 3", [1, 2, 3, 1, 2, 3]),
+        ("4px, 2px", [4, 2]),
+        ("none", None),
+        ("0 0", None),
+        ("1 -2", None),
+        ("a b", None),
+    ],
+)
+def test_dasharray(value, expected):
+    style = stroke.stroke_style({"stroke": "black", "stroke-dasharray": value})
+    assert style["dasharray"] == expected
+
+
+def test_no_visible_stroke():
+    assert stroke.stroke_style({}) is None
+    assert stroke.stroke_style({"stroke": "none"}) is None
+    assert stroke.stroke_style({"stroke": "red", "stroke-width": "0"}) is None
+
+
+def test_filled_shape_gets_sibling_fill_and_outline(convert_svg):
+    stage = convert_svg(
+        '<rect id="box" x="10" y="10" width="20" height="20" fill="red" '
+        'stroke="blue" stroke-width="2" transform="translate(5 0)"/>',
+        stroke_to_mesh=True,
+    )
+    box = stage.GetPrimAtPath("/box")
+    assert box.IsA(UsdGeom.Xform)
+    assert UsdGeom.Xformable(box).GetOrderedXformOps()
+    assert [c.GetName() for c in box.GetChildren()] == ["fill", "outline"]
+    fill, line = (UsdGeom.Mesh(c) for c in box.GetChildren())
+    assert len(fill.GetPointsAttr().Get()) == 4
+    assert tuple(line.GetDisplayColorAttr().Get()[0]) == pytest.approx((0, 0, 1))
+    extent = line.GetExtentAttr().Get()
+    assert tuple(extent[0]) == pytest.approx((9, 0, 9))
+    assert tuple(extent[1]) == pytest.approx((31, 0, 31))
+
+
+def test_unfilled_shape_is_its_outline(convert_svg):
+    stage = convert_svg(
+        '<polyline id="line" points="0,0 10,0" fill="none" stroke="blue"/>',
+        stroke_to_mesh=True,
+    )
+    line = stage.GetPrimAtPath("/line")
+    assert line.IsA(UsdGeom.Mesh)
+    assert not line.GetChildren()
@@ -0,0 +1,101 @@
+import xml.etree.ElementTree as ET
+
+import pytest
+from pxr import UsdGeom
+
+from svg_to_usd.converter import common, stylesheet, utils
+
+
+@pytest.fixture
+def resolve(monkeypatch):
+    """ Resolve the attributes of the element with ``id`` in SVG markup. """
+
+    def run(markup, id):
+        root = ET.fromstring(
+            '<svg xmlns="http://www.w3.org/2000/svg">{}</svg>'.format(markup)
+        )
+        parent_map = {c: p for p in root.iter() for c in p}
+        monkeypatch.setattr(common, "style_map", stylesheet.compute_styles(root, parent_map))
+        element = next(e for e in root.iter() if e.attrib.get("id") == id)
+        return utils.parse_attributes(element)
+
+    return run
+
+
+def test_specificity_beats_order(resolve):
+    css = "<style>#a { fill: red } .c { fill: green } rect { fill: blue }</style>"
+    assert resolve(css + '<rect id="a" class="c"/>', "a")["fill"] == "red"
+    assert resolve(css + '<rect id="b" class="c"/>', "b")["fill"] == "green"
+    assert resolve(css + '<rect id="d"/>', "d")["fill"] == "blue"
+
+
+def test_later_rule_wins_at_equal_specificity(resolve):
+    markup = '<style>.x { fill: red } .y { fill: blue }</style><rect id="a" class="y x"/>'
+    assert resolve(markup, "a")["fill"] == "blue"
+    markup = "<style>.x { fill: red }</style><style>.x { fill: blue }</style>"
+    assert resolve(markup + '<rect id="a" class="x"/>', "a")["fill"] == "blue"
+
+
+def test_presentation_attribute_sheet_then_inline(resolve):
+    sheet = "<style>rect { fill: green; stroke: green }</style>"
+    attributes = resolve(
+        sheet + '<rect id="a" fill="red" stroke="red" opacity="0.5" style="stroke: blue"/>',
+        "a",
+    )
+    assert attributes["fill"] == "green"
+    assert attributes["stroke"] == "blue"
+    assert attributes["opacity"] == "0.5"
+
+
+@pytest.mark.parametrize(
+    "sheet, style, expected",
+    [
+        ("fill: red !important", "fill: blue", "red"),
+        ("fill: red", "fill: blue !important", "blue"),
+        ("fill: red !important", "fill: blue !important", "blue"),
+    ],
+)
+def test_important(resolve, sheet, style, expected):
+    markup = '<style>#a {{ {} }}</style><rect id="a" style="{}"/>'.format(sheet, style)
+    assert resolve(markup, "a")["fill"] == expected
+
+
+def test_important_rules_ignore_specificity_of_normal_rules(resolve):
+    markup = (
+        "<style>rect { fill: red !important } #a { fill: blue }</style>"
+        '<rect id="a"/>'
+    )
+    assert resolve(markup, "a")["fill"] == "red"
+
+
+def test_combinators(resolve):
+    markup = (
+        "<style>g rect { fill: red } g > rect { stroke: blue }</style>"
+        '<g><g><rect id="deep"/></g><rect id="child"/></g><rect id="outside"/>'
+    )
+    deep = resolve(markup, "deep")
+    assert deep["fill"] == "red"
+    assert deep["stroke"] == "blue"
+    assert "stroke" not in resolve(markup, "outside")
+    assert "fill" not in resolve(markup, "outside")
+
+
+def test_unsupported_selectors_and_at_rules_are_ignored(resolve):
+    markup = (
+        "<style>/* rect { fill: red } */"
+        "@media print { rect { fill: red } }"
+        "rect[width] { fill: red } rect:hover { fill: red } rect, .x { stroke: blue }"
+        '</style><rect id="a" width="1"/>'
+    )
+    attributes = resolve(markup, "a")
+    assert "fill" not in attributes
+    assert attributes["stroke"] == "blue"
+
+
+def test_rules_apply_to_converted_prims(convert_svg):
+    stage = convert_svg(
+        '<style>.shape { fill: #ff0000 }</style>'
+        '<rect id="a" class="shape" fill="#0000ff" width="10" height="10"/>'
+    )
+    color = UsdGeom.Gprim(stage.GetPrimAtPath("/a")).GetDisplayColorAttr().Get()
+    assert tuple(color[0]) == pytest.approx((1, 0, 0))
@@ -0,0 +1,95 @@
+import numpy as np
+import pytest
+
+from svg_to_usd.converter import svgpath
+
+
+def test_relative_and_absolute_commands_agree():
+    absolute = svgpath.parse("M10 10 L20 10 L20 20 L10 20 Z")
+    relative = svgpath.parse("m10 10 l10 0 v10 h-10 z")
+    np.testing.assert_array_equal(absolute.vertices, relative.vertices)
+    assert absolute.vertices.tolist() == [[10, 10], [20, 10], [20, 20], [10, 20]]
+    assert relative.offsets.tolist() == [0, 4]
+    assert relative.closed.tolist() == [True]
+
+
+def test_implicit_lineto_after_moveto():
+    path = svgpath.parse("M0 0 10 0 10 10")
+    assert path.vertices.tolist() == [[0, 0], [10, 0], [10, 10]]
+    assert not path.is_closed
+
+
+def test_smooth_cubic_reflects_previous_control_point():
+    path = svgpath.parse("M0 0 C0 10 10 10 10 0 S20 -10 20 0")
+    explicit = svgpath.parse("M0 0 C0 10 10 10 10 0 C10 -10 20 -10 20 0")
+    np.testing.assert_allclose(path.vertices, explicit.vertices)
+    assert path.vertices[:, 1].max() == pytest.approx(-path.vertices[:, 1].min())
+
+
+def test_smooth_quadratic_reflects_previous_control_point():
+    path = svgpath.parse("M0 0 Q5 10 10 0 T20 0")
+    explicit = svgpath.parse("M0 0 Q5 10 10 0 Q15 -10 20 0")
+    np.testing.assert_allclose(path.vertices, explicit.vertices)
+    assert path.vertices[:, 1].max() == pytest.approx(5)
+    assert path.vertices[:, 1].min() == pytest.approx(-5)
+
+
+def test_compact_arc_flags():
+    compact = svgpath.parse("M0 0 a5 5 0 0110 0")
+    spaced = svgpath.parse("M0 0 a5 5 0 0 1 10 0")
+    np.testing.assert_array_equal(compact.vertices, spaced.vertices)
+    np.testing.assert_allclose(compact.vertices[-1], [10, 0])
+    assert compact.vertices[:, 1].min() == pytest.approx(-5)
+
+    # The other sweep bulges the other way
+    other = svgpath.parse("M0 0 a5 5 0 1010 0")
+    assert other.vertices[:, 1].max() == pytest.approx(5)
+
+
+def test_curves_stay_within_tolerance():
+    path = svgpath.parse("M0 0 A10 10 0 0 1 20 0", tolerance=0.01)
+    center = np.array([10.0, 0.0])
+    radii = np.linalg.norm(path.vertices - center, axis=1)
+    np.testing.assert_allclose(radii, 10, atol=0.01)
+
+    coarse = svgpath.parse("M0 0 A10 10 0 0 1 20 0", tolerance=1)
+    assert len(coarse.vertices) < len(path.vertices)
+
+
+def test_draw_after_close_starts_at_subpath_start():
+    path = svgpath.parse("M10 10 h10 v10 z l5 5 h5")
+    assert path.offsets.tolist() == [0, 3, 6]
+    assert path.closed.tolist() == [True, False]
+    assert path.vertices[3:].tolist() == [[10, 10], [15, 15], [20, 15]]
+    assert not path.is_closed
+
+
+def test_to_polygons_closes_subpaths():
+    polygons = svgpath.parse("M0 0 h10 v10 z M20 20 h5").to_polygons()
+    assert len(polygons) == 1
+    assert polygons[0].tolist() == [[0, 0], [10, 0], [10, 10], [0, 0]]
+
+
+def test_empty_path():
+    path = svgpath.parse("")
+    assert path.vertices.shape == (0, 2)
+    assert not path.is_closed
+
+
+def test_bounds_of_lines():
+    assert svgpath.bounds("M0 0 L10 20 30 -5") == (0, -5, 30, 20)
+    assert svgpath.bounds("m5 5 l10 20 h-20") == (-5, 5, 15, 25)
+    assert svgpath.bounds("") is None
+
+
+def test_bounds_contain_curves():
+    for d in (
+        "M0 0 C0 10 10 10 10 0 S20 -10 20 0",
+        "M0 0 Q5 10 10 0 T20 0",
+        "M0 0 a5 5 0 0110 0",
+        "M10 10 h10 v10 z l5 5 h5",
+    ):
+        min_x, min_y, max_x, max_y = svgpath.bounds(d)
+        vertices = svgpath.parse(d).vertices
+        assert (vertices >= [min_x, min_y]).all(), d
+        assert (vertices <= [max_x, max_y]).all(), d
@@ -0,0 +1,108 @@
+import math
+
+import numpy as np
+import pytest
+from pxr import Usd, UsdGeom
+
+from svg_to_usd.converter import utils
+
+
+def apply(affine, x, y):
+    a, b, c, d, e, f = affine
+    return (a * x + c * y + e, b * x + d * y + f)
+
+
+@pytest.mark.parametrize(
+    "transform, expected",
+    [
+        ("", utils.IDENTITY_AFFINE),
+        ("translate(10 20)", (1, 0, 0, 1, 10, 20)),
+        ("translate(10)", (1, 0, 0, 1, 10, 0)),
+        ("scale(2)", (2, 0, 0, 2, 0, 0)),
+        ("scale(2,3)", (2, 0, 0, 3, 0, 0)),
+        ("matrix(1 2 3 4 5 6)", (1, 2, 3, 4, 5, 6)),
+        ("matrix(1,2,3,4,5,6)", (1, 2, 3, 4, 5, 6)),
+        ("matrix(1-2-3 4e0 .5-6)", (1, -2, -3, 4, 0.5, -6)),
+    ],
+)
+def test_functions(transform, expected):
+    assert utils.parse_transform(transform) == pytest.approx(expected)
+
+
+def test_rotate():
+    assert apply(utils.parse_transform("rotate(90)"), 1, 0) == pytest.approx((0, 1))
+
+
+def test_rotation_keeps_lengths():
+    x, y = apply(utils.parse_transform("rotate(33)"), 3, 4)
+    assert math.hypot(x, y) == pytest.approx(5)
+
+
+def test_rotate_about_center():
+    affine = utils.parse_transform("rotate(180 10 10)")
+    assert apply(affine, 10, 10) == pytest.approx((10, 10))
+    assert apply(affine, 0, 0) == pytest.approx((20, 20))
+
+
+def test_skew():
+    assert apply(utils.parse_transform("skewX(45)"), 0, 1) == pytest.approx((1, 1))
+    assert apply(utils.parse_transform("skewY(45)"), 1, 0) == pytest.approx((1, 1))
+
+
+def test_list_composes_left_to_right():
+    # The rightmost function applies to the points first
+    affine = utils.parse_transform("translate(10, 0) scale(2)")
+    assert apply(affine, 1, 1) == pytest.approx((12, 2))
+    affine = utils.parse_transform("scale(2),translate(10 0)")
+    assert apply(affine, 1, 1) == pytest.approx((22, 2))
+
+
+def test_unknown_function_is_identity():
+    assert utils.parse_transform("translate()") == utils.IDENTITY_AFFINE
+
+
+def test_parse_is_cached():
+    transform = "rotate(30) translate(1 2)"
+    utils.parse_transform(transform)
+    hits = utils.parse_transform.cache_info().hits
+    utils.parse_transform(transform)
+    assert utils.parse_transform.cache_info().hits == hits + 1
+
+
+def test_matrix_maps_into_the_drawing_plane(monkeypatch):
+    monkeypatch.setattr(utils, "convert_position", utils.convert_position_y)
+    matrix = utils.convert_transform_attr("translate(10 20) rotate(90)")
+    point = matrix.Transform((1, 0, 0))
+    assert tuple(point) == pytest.approx((10, 0, 21))
+
+
+def world_points(stage):
+    points = {}
+    for prim in stage.Traverse():
+        if prim.IsA(UsdGeom.PointBased):
+            world = UsdGeom.Xformable(prim).ComputeLocalToWorldTransform(
+                Usd.TimeCode.Default()
+            )
+            points[prim.GetName()] = np.array(
+                [world.Transform(p) for p in UsdGeom.PointBased(prim).GetPointsAttr().Get()]
+            )
+    return points
+
+
+def test_baking_keeps_world_positions(convert_svg):
+    markup = (
+        '<g id="outer" transform="translate(10 5) rotate(30)">'
+        '<g id="inner" transform="scale(2 1) skewX(10)">'
+        '<rect id="box" x="1" y="2" width="3" height="4" transform="rotate(15 2 3)"/>'
+        '<polygon id="tri" points="0,0 5,0 0,5"/>'
+        "</g></g>"
+    )
+    expected = world_points(convert_svg(markup))
+    stage = convert_svg(markup, bake_transforms=True)
+
+    for prim in stage.Traverse():
+        assert not UsdGeom.Xformable(prim).GetOrderedXformOps(), prim.GetPath()
+    baked = world_points(stage)
+    assert sorted(baked) == ["box", "tri"]
+    for name, points in expected.items():
+        np.testing.assert_allclose(baked[name], points, atol=1e-4)